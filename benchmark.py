@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")  # headless: the render stage draws into an off-screen canvas
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from export import EXPORT_FORMATS, export_rows
+from histogram_view import HISTOGRAM_BINS
+from material_io import cache_directory, open_database, write_material_csv
+from material_table import MATERIAL_TYPES, NUMERIC_PROPERTIES, VALIDATION_RULES, MaterialTable, filter_materials, sort_indices
+from plot_view import ScatterPlot
+from query_engine import QueryEngine
+
+
+BENCHMARK_SIZES = (1_000, 10_000, 100_000, 1_000_000)  # 10_000_000 works too, given ~4 GB of RAM and disk
+BENCHMARK_STAGES = ("write_csv", "load_cold", "load_warm", "filter", "filter_drag", "histogram_drag", "sort", "sort_name",
+                    "render_full", "render_update", "export_csv", "export_npz", "export_jsonl")
+REGRESSION_THRESHOLD = 0.10  # slower by more than this fraction counts as a regression
+REGRESSION_FLOOR = 0.001  # ...and by more than this many seconds, so timer noise is ignored
+
+# Share of each material type in a synthetic catalog
+TYPE_SHARES = {"Metals": 0.25, "Plastics": 0.25, "Ceramics": 0.15, "Composites": 0.10, "Alloys": 0.25}
+# Per-type log-normal (median, sigma) of every property, in NUMERIC_PROPERTIES order:
+# density, UTS, cost, conductivity, max temperature, Young's modulus,
+# thermal capacity, yield strength, elongation, recycle fraction
+TYPE_PROFILES = {
+    "Metals": [(7800, 0.35), (400, 0.5), (5, 1.0), (60, 0.8), (1200, 0.3), (150, 0.4), (450, 0.3), (250, 0.5), (20, 0.5), (70, 0.2)],
+    "Plastics": [(1200, 0.2), (50, 0.4), (3, 0.6), (0.25, 0.4), (120, 0.4), (2.5, 0.5), (1500, 0.3), (40, 0.4), (50, 0.9), (25, 0.6)],
+    "Ceramics": [(3500, 0.3), (300, 0.6), (20, 1.0), (25, 1.0), (1600, 0.3), (300, 0.4), (800, 0.2), (250, 0.5), (0.5, 0.5), (10, 0.8)],
+    "Composites": [(1700, 0.2), (800, 0.5), (40, 0.8), (5, 1.0), (200, 0.4), (70, 0.5), (1000, 0.2), (500, 0.4), (2, 0.5), (15, 0.7)],
+    "Alloys": [(6000, 0.4), (600, 0.4), (8, 0.9), (40, 0.8), (1100, 0.3), (130, 0.4), (500, 0.3), (400, 0.4), (15, 0.5), (60, 0.3)],
+}
+
+
+# Deterministic catalog of `rows` materials in the CSV schema. Types are drawn
+# with TYPE_SHARES and properties from TYPE_PROFILES, clipped into the
+# VALIDATION_RULES ranges so every row would also pass the add form.
+def generate_catalog(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(len(MATERIAL_TYPES), size=rows, p=[TYPE_SHARES[name] for name in MATERIAL_TYPES])
+    values = np.empty((rows, len(NUMERIC_PROPERTIES)), dtype=np.float64, order="F")
+    for code, name in enumerate(MATERIAL_TYPES):
+        members = np.flatnonzero(codes == code)
+        for j, (median, sigma) in enumerate(TYPE_PROFILES[name]):
+            values[members, j] = median * rng.lognormal(0.0, sigma, len(members))
+    for j, prop in enumerate(NUMERIC_PROPERTIES):
+        low, high, low_inclusive, message = VALIDATION_RULES[prop]
+        np.clip(values[:, j], low if low_inclusive else low + 1e-3, high, out=values[:, j])
+    values = np.round(values, 3)
+    numbers = np.char.zfill(np.arange(rows).astype(str), len(str(rows)))
+    names = np.char.add(np.char.add(np.array(MATERIAL_TYPES)[codes], " "), numbers).astype(object)
+    return MaterialTable(names, values, codes, MATERIAL_TYPES)
+
+
+# Run fn `repeat` times; returns the wall-clock seconds of each run
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# Ranges of a typical search: roughly the middle of every property's spread
+def _typical_ranges(table):
+    return [(float(np.percentile(table.columns[prop], 5)), float(np.percentile(table.columns[prop], 97)))
+            for prop in NUMERIC_PROPERTIES]
+
+
+# Time every stage in `stages` on a catalog of `rows` materials written under workdir.
+# Stages left out are skipped, apart from the writing and loading later stages need.
+# Returns {stage: [seconds, ...]}.
+def benchmark_size(rows, workdir, stages=BENCHMARK_STAGES, repeat=3, seed=0):
+    timings = {}
+    # Multi-second stages at large sizes run once
+    slow_repeat = 1 if rows > 100_000 else repeat
+
+    def stage(name, fn, times):
+        if name in stages:
+            timings[name] = _timed(fn, times)
+
+    table = generate_catalog(rows, seed)
+    path = os.path.join(workdir, f"catalog_{rows}.csv")
+    write_material_csv(path, table)
+    stage("write_csv", lambda: write_material_csv(path, table), slow_repeat)
+
+    def load_cold():
+        meta_path = os.path.join(cache_directory(path), "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        open_database(path)
+
+    stage("load_cold", load_cold, slow_repeat)
+    table = open_database(path)[0]
+    stage("load_warm", lambda: open_database(path), repeat)
+
+    ranges = _typical_ranges(table)
+    indices = filter_materials(table, *ranges, MATERIAL_TYPES)
+    stage("filter", lambda: filter_materials(table, *ranges, MATERIAL_TYPES), repeat)
+
+    # A slider drag: the density minimum moves up in 20 steps, one query per step;
+    # histogram_drag does the same with the Search tab's slider histograms kept
+    for name in ("filter_drag", "histogram_drag"):
+        if name not in stages:
+            continue
+        edges = None
+        if name == "histogram_drag":
+            edges = {prop: np.linspace(0, np.nanmax(table.columns[prop]), HISTOGRAM_BINS + 1) for prop in NUMERIC_PROPERTIES}
+        engine = QueryEngine(table, histogram_edges=edges)
+        spec = {"ranges": dict(zip(NUMERIC_PROPERTIES, ranges)), "types": MATERIAL_TYPES}
+        engine.run(spec)
+        low, high = ranges[0]
+        timings[name] = []
+        for step in np.linspace(low, (low + high) / 2, 20):
+            spec["ranges"][NUMERIC_PROPERTIES[0]] = (step, high)
+            timings[name] += _timed(lambda: (engine.run(spec), engine.histograms()), 1)
+
+    stage("sort", lambda: sort_indices(table, indices, "cost_per_kg_($)"), repeat)
+    stage("sort_name", lambda: sort_indices(table, indices, "name"), repeat)
+
+    # First draw of the Compare plot, then in-place updates as the matches change
+    if "render_full" in stages or "render_update" in stages:
+        figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(figure)
+        plot = ScatterPlot(figure)
+        plot.set_data(table, indices, "density_(kg/m^3)", "young_modulus_(GPa)")
+        if "render_full" in stages:
+            timings["render_full"] = [plot.last_redraw[1]]
+        rng = np.random.default_rng(seed)
+        if "render_update" in stages:
+            timings["render_update"] = []
+            for _ in range(repeat):
+                plot.set_data(table, indices[rng.random(len(indices)) < 0.9], "density_(kg/m^3)", "young_modulus_(GPa)")
+                timings["render_update"].append(plot.last_redraw[1])
+
+    # Same writer as the Search tab's "Export Results", in each format
+    for output_format in EXPORT_FORMATS:
+        export_path = os.path.join(workdir, f"export_{rows}.{output_format}")
+        stage(f"export_{output_format}", lambda: export_rows(table, indices, export_path, output_format), slow_repeat)
+    return {name: timings[name] for name in stages if name in timings}
+
+
+# Run the suite for every size; returns the JSON-ready results document
+def run_benchmarks(sizes=BENCHMARK_SIZES, stages=BENCHMARK_STAGES, repeat=3, seed=0, workdir=None, log=None):
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        for rows in sizes:
+            for stage, samples in benchmark_size(rows, directory, stages, repeat, seed).items():
+                result = {"stage": stage, "rows": rows, "seconds": float(np.median(samples)),
+                          "min_seconds": float(min(samples)), "samples": [float(s) for s in samples]}
+                results.append(result)
+                if log is not None:
+                    log(f"{rows:>10} rows  {stage:<14} {result['seconds'] * 1000:10.2f} ms")
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# Stage timings of two runs side by side. A (stage, rows) pair is a regression
+# when the new median is more than `threshold` slower and at least `floor`
+# seconds slower. Returns a list of dicts, one per pair found in both runs.
+def compare_runs(baseline, current, threshold=REGRESSION_THRESHOLD, floor=REGRESSION_FLOOR):
+    before = {(result["stage"], result["rows"]): result["seconds"] for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        key = (result["stage"], result["rows"])
+        if key not in before:
+            continue
+        old, new = before[key], result["seconds"]
+        ratio = new / old if old else float("inf")
+        comparison.append({"stage": key[0], "rows": key[1], "before": old, "after": new, "ratio": ratio,
+                           "regression": ratio > 1 + threshold and new - old > floor})
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time load, filter, sort, render and export on synthetic catalogs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks and write JSON results")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES),
+                            help="catalog sizes in rows (default 1e3 to 1e6)")
+    run_parser.add_argument("--stages", nargs="+", choices=BENCHMARK_STAGES, default=list(BENCHMARK_STAGES))
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the median is reported")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--workdir", help="directory for the generated CSV files (default: system temp)")
+    run_parser.add_argument("--output", default="-", help="JSON results file ('-' writes stdout, the default)")
+    compare_parser = commands.add_parser("compare", help="compare two result files and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                help=f"relative slowdown that counts as a regression (default {REGRESSION_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.stages, args.repeat, args.seed, args.workdir,
+                                 log=lambda line: print(line, file=sys.stderr))
+        text = json.dumps(results, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, mode='w', encoding='utf-8') as file:
+                file.write(text + "\n")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.current, encoding='utf-8') as file:
+        current = json.load(file)
+    comparison = compare_runs(baseline, current, args.threshold)
+    for row in comparison:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['rows']:>10} rows  {row['stage']:<14} {row['before'] * 1000:10.2f} ms -> "
+              f"{row['after'] * 1000:10.2f} ms  x{row['ratio']:.2f}  {flag}")
+    regressions = sum(row["regression"] for row in comparison)
+    print(f"{regressions} regression(s) in {len(comparison)} timings")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
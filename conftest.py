@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from material_table import MATERIAL_TYPES, NUMERIC_PROPERTIES, MaterialTable
+
+
+# Factory of reproducible tables: random_table(seed, rows) has uniform [0, 1)
+# property values, random types and names "Material 0", "Material 1", ...
+@pytest.fixture
+def random_table():
+    def make(seed, rows=200):
+        rng = np.random.default_rng(seed)
+        values = rng.random((rows, len(NUMERIC_PROPERTIES)))
+        names = np.array([f"Material {i}" for i in range(rows)], dtype=object)
+        return MaterialTable(names, values, rng.integers(0, len(MATERIAL_TYPES), rows), MATERIAL_TYPES)
+    return make
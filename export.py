@@ -0,0 +1,214 @@
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+
+EXPORT_FORMATS = ("csv", "npz", "jsonl")
+EXPORT_CHUNK_ROWS = 65536  # rows gathered and written per step; progress and cancel are checked in between
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+# Export format of a file name, from its extension (default csv)
+def export_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in EXPORT_FORMATS else "csv"
+
+
+# Write the rows `indices` of a table (in that order) to path as csv, npz
+# (one array per column) or jsonl (one JSON object per line; missing and
+# infinite values become null). Rows are gathered from the columns chunk_rows at a time, so
+# memory stays bounded whatever the result size. The file is written under a
+# temporary name, fsynced and renamed over path at the end, so readers never
+# see half an export. progress(rows_written, total_rows) is called after
+# every chunk; a set cancel event stops the export at the next chunk with
+# ExportCancelled and leaves path untouched. Returns the number of rows written.
+def export_rows(table, indices, path, output_format=None, progress=None, cancel=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    output_format = output_format or export_format(path)
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}, not {output_format}")
+    indices = np.asarray(indices, dtype=np.intp)
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(directory, os.path.basename(path) + ".tmp")
+    writer = {"csv": _write_csv, "npz": _write_npz, "jsonl": _write_jsonl}[output_format]
+    try:
+        with open(temp_path, mode='wb') as file:
+            for done in writer(file, table, indices, chunk_rows):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                if progress is not None:
+                    progress(done, len(indices))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(indices)
+
+
+# Column values of one chunk of rows as Python lists, in csv_columns() order
+def _chunk_columns(table, rows):
+    block = table.values[rows]
+    columns = [table.names[rows].tolist()]
+    columns += [block[:, j].tolist() for j in range(len(table.properties))]
+    columns.append(table.types_of(rows).tolist())
+    columns += [extra[rows].tolist() for extra in table.extra_columns.values()]
+    return columns
+
+
+def _chunks(indices, chunk_rows):
+    for start in range(0, len(indices), chunk_rows):
+        yield start + min(chunk_rows, len(indices) - start), indices[start:start + chunk_rows]
+
+
+# Same text as the csv.DictWriter export it replaces, written a chunk of row tuples at a time
+def _write_csv(file, table, indices, chunk_rows):
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(table.csv_columns())
+    yield 0
+    for done, rows in _chunks(indices, chunk_rows):
+        writer.writerows(zip(*_chunk_columns(table, rows)))
+        yield done
+    text.detach()
+
+
+# Every value is encoded column by column (repr is the JSON text of a finite
+# float), then each line is one %-format of a template holding the keys
+def _write_jsonl(file, table, indices, chunk_rows):
+    encode = json.JSONEncoder().encode
+    template = "{" + ", ".join(encode(column).replace("%", "%%") + ": %s" for column in table.csv_columns()) + "}\n"
+    numeric = range(1, len(table.properties) + 1)
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='\n', write_through=True)
+    yield 0
+    for done, rows in _chunks(indices, chunk_rows):
+        values = _chunk_columns(table, rows)
+        # JSON has no NaN or infinity
+        missing = ~np.isfinite(table.values[rows])
+        for j, column in enumerate(values):
+            if j not in numeric:
+                values[j] = list(map(encode, column))
+            elif missing[:, j - 1].any():
+                values[j] = ["null" if not math.isfinite(value) else repr(value) for value in column]
+            else:
+                values[j] = list(map(repr, column))
+        text.write("".join(template % row for row in zip(*values)))
+        yield done
+    text.detach()
+
+
+# An .npz archive (np.load reads it) whose member arrays are streamed: each
+# .npy header is written with the final shape, then the column chunk by chunk.
+# Text columns become fixed-width unicode arrays as wide as their longest value.
+def _write_npz(file, table, indices, chunk_rows):
+    total = len(indices) * (len(table.properties) + 2 + len(table.extra_columns))
+    done = 0
+    with zipfile.ZipFile(file, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        yield 0
+
+        def member(column, dtype, gather):
+            nonlocal done
+            with archive.open(column + ".npy", mode='w', force_zip64=True) as stream:
+                header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (len(indices),)}
+                np.lib.format.write_array_header_2_0(stream, header)
+                for _, rows in _chunks(indices, chunk_rows):
+                    stream.write(np.ascontiguousarray(gather(rows), dtype=dtype).tobytes())
+                    done += len(rows)
+                    yield done * len(indices) // total
+
+        name_width = max(1, max(map(len, table.names[indices]), default=1))
+        yield from member("name", np.dtype(f"<U{name_width}"), lambda rows: table.names[rows].astype(str))
+        for j, prop in enumerate(table.properties):
+            yield from member(prop, np.dtype("<f8"), lambda rows, j=j: table.values[rows, j])
+        type_width = max(1, max(map(len, table.type_names), default=1))
+        yield from member("type", np.dtype(f"<U{type_width}"), lambda rows: table.types_of(rows).astype(str))
+        for column, values in table.extra_columns.items():
+            width = max(1, max(map(len, values[indices]), default=1))
+            yield from member(column, np.dtype(f"<U{width}"), lambda rows, values=values: values[rows].astype(str))
+
+
+# Runs export_rows on a worker thread. The Tk thread polls progress (rows
+# written, total), done and error from a window.after loop; cancel() asks
+# the worker to stop at its next chunk.
+class BackgroundExport:
+    def __init__(self, table, indices, path, output_format=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        self.path = path
+        self.output_format = output_format or export_format(path)
+        self.progress = (0, len(indices))
+        self.error = None
+        self.seconds = None
+        self._cancel = threading.Event()
+        # The selected rows are copied out first, so later edits (update_record
+        # writes into the table's arrays in place), appends or deletes do not
+        # change what is written
+        table = table.take(np.asarray(indices, dtype=np.intp))
+        indices = np.arange(len(table))
+        self._thread = threading.Thread(target=self._run, args=(table, indices, chunk_rows),
+                                        name="export-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return isinstance(self.error, ExportCancelled)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self, table, indices, chunk_rows):
+        start = time.perf_counter()
+        try:
+            export_rows(table, indices, self.path, self.output_format,
+                        progress=lambda done, total: setattr(self, "progress", (done, total)),
+                        cancel=self._cancel, chunk_rows=chunk_rows)
+        except Exception as e:
+            self.error = e
+        self.seconds = time.perf_counter() - start
+
+
+# Export throughput in rows/s of every format, for `rows` materials resampled
+# from a table, written into a temporary directory
+def benchmark_export(table, rows=1_000_000, formats=EXPORT_FORMATS, seed=0):
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(table), rows)
+    results = {"rows": rows, "formats": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for output_format in formats:
+            path = os.path.join(directory, f"export.{output_format}")
+            start = time.perf_counter()
+            export_rows(table, indices, path, output_format)
+            seconds = time.perf_counter() - start
+            results["formats"].append({"format": output_format, "seconds": seconds, "rows_per_s": rows / seconds,
+                                       "bytes": os.path.getsize(path)})
+    return results
+
+
+if __name__ == "__main__":
+    from material_io import DATABASE_FILE, open_database
+
+    parser = argparse.ArgumentParser(description="Benchmark exporting filtered results")
+    parser.add_argument("--database", default=DATABASE_FILE)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows to export, resampled from the database")
+    parser.add_argument("--formats", nargs="+", choices=EXPORT_FORMATS, default=list(EXPORT_FORMATS))
+    args = parser.parse_args()
+    table, report, journal = open_database(args.database)
+    result = benchmark_export(table, args.rows, args.formats)
+    for timing in result["formats"]:
+        print(f"{timing['format']:>5}: {result['rows']} rows in {timing['seconds']:.2f} s, "
+              f"{timing['rows_per_s']:,.0f} rows/s, {timing['bytes'] / 2**20:.1f} MB")
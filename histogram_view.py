@@ -0,0 +1,68 @@
+import tkinter as tk
+
+import numpy as np
+
+
+HISTOGRAM_BINS = 40  # bars under each property slider
+HISTOGRAM_WIDTH = 120  # pixels of bars; the count text goes to their right
+HISTOGRAM_HEIGHT = 26
+INSIDE_COLOR = "#4A90E2"  # bars within the slider's current range
+OUTSIDE_COLOR = "#5A5A5A"
+
+
+# Small bar chart next to a property's range slider: how the materials that
+# meet every other constraint are spread along the property (the query
+# engine's cross-filter histograms). Bars within the current range are
+# highlighted and the text reads "kept / available". While a slider moves,
+# the kept count is read off the cumulative counts at once; the next query
+# result replaces it with the exact number.
+class SliderHistogram(tk.Canvas):
+    def __init__(self, master, from_, to_, bins=HISTOGRAM_BINS, **kwargs):
+        super().__init__(master, width=HISTOGRAM_WIDTH + 90, height=HISTOGRAM_HEIGHT, bg="#2E2E2E",
+                         highlightthickness=0, **kwargs)
+        self.edges = np.linspace(from_, to_, bins + 1)
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # below from_, one per bar, above to_ or missing
+        self.cumulative = np.zeros(bins + 1, dtype=np.int64)  # materials in the bars below each edge
+        self.bounds = (from_, to_)
+        self.heights = np.zeros(bins, dtype=np.int64)
+        self.inside = np.zeros(bins, dtype=bool)
+        bar_width = HISTOGRAM_WIDTH / bins
+        self.bars = [self.create_rectangle(i * bar_width, HISTOGRAM_HEIGHT, (i + 1) * bar_width, HISTOGRAM_HEIGHT,
+                                           fill=OUTSIDE_COLOR, width=0) for i in range(bins)]
+        self.text = self.create_text(HISTOGRAM_WIDTH + 6, HISTOGRAM_HEIGHT / 2, anchor=tk.W, fill="white",
+                                     font=("TkDefaultFont", 8), text="")
+
+    # New histogram (see QueryEngine.histograms) and the exact number of matches
+    def set_counts(self, counts, matches):
+        if not np.array_equal(counts, self.counts):
+            self.counts = np.asarray(counts, dtype=np.int64)
+            bars = self.counts[1:-1]
+            self.cumulative = np.concatenate([[0], np.cumsum(bars)])
+            heights = np.rint(bars * (HISTOGRAM_HEIGHT - 2) / max(int(bars.max()), 1)).astype(np.int64)
+            # Any non-empty bin stays visible
+            heights[(bars > 0) & (heights == 0)] = 1
+            bar_width = HISTOGRAM_WIDTH / len(bars)
+            for i in np.flatnonzero(heights != self.heights):
+                self.coords(self.bars[i], i * bar_width, HISTOGRAM_HEIGHT - heights[i], (i + 1) * bar_width,
+                            HISTOGRAM_HEIGHT)
+            self.heights = heights
+        self._show_kept(matches)
+
+    # Highlight the bars within a candidate range and estimate how many materials it keeps
+    def set_bounds(self, low, high):
+        self.bounds = (low, high)
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        inside = (centers >= low) & (centers <= high)
+        for i in np.flatnonzero(inside != self.inside):
+            self.itemconfigure(self.bars[i], fill=INSIDE_COLOR if inside[i] else OUTSIDE_COLOR)
+        self.inside = inside
+        self._show_kept(self.estimate(low, high))
+
+    # Materials meeting every other constraint with low <= value <= high,
+    # interpolated within the bins at either end
+    def estimate(self, low, high):
+        kept = np.interp(high, self.edges, self.cumulative) - np.interp(low, self.edges, self.cumulative)
+        return int(round(max(kept, 0.0)))
+
+    def _show_kept(self, kept):
+        self.itemconfigure(self.text, text=f"{kept:,} / {int(self.counts.sum()):,}")
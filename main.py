@@ -1,601 +1,1229 @@
-import csv
-import tkinter as tk
-from tkinter import messagebox, filedialog, scrolledtext, ttk
-import matplotlib.pyplot as plt
-import numpy as np
-
-
-# Load material data from a CSV file with units in headers
-def load_material_data(filename):
-    materials = []
-    try:
-        with open(filename, mode='r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                materials.append({
-                    "name": row["name"],
-                    "density_(kg/m^3)": float(row["density_(kg/m^3)"]),
-                    "UTS_(MPa)": float(row["UTS_(MPa)"]),
-                    "cost_per_kg_($)": float(row["cost_per_kg_($)"]),
-                    "thermal_conductivity_(W/mK)": float(row["thermal_conductivity_(W/mK)"]),
-                    "maximum_temperature_(C)": float(row["maximum_temperature_(C)"]),
-                    "young_modulus_(GPa)": float(row["young_modulus_(GPa)"]),
-                    "thermal_capacity_(J/kgK)": float(row["thermal_capacity_(J/kgK)"]),
-                    "tensile_strength_yield_(MPa)": float(row["tensile_strength_yield_(MPa)"]),
-                    "Elongation_(%)": float(row["Elongation_(%)"]),
-                    "recycle_fraction_(%)": float(row["recycle_fraction_(%)"]),
-                    "type": row["type"]
-                })
-    except FileNotFoundError:
-        messagebox.showerror("File Error", f"Could not find file: {filename}")
-    except ValueError:
-        messagebox.showerror("Data Error", "Data format in file is incorrect.")
-    return materials
-
-# Save updated materials data to the CSV file
-def save_material_data(filename, materials):
-    try:
-        with open(filename, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=["name", "density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)", "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)", "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)", "type"])
-            writer.writeheader()
-            for material in materials:
-                writer.writerow(material)
-    except Exception as e:
-        messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
-
-# Filter materials based on user-defined intervals and selected types
-def filter_materials(materials, density_range, strength_range, cost_range, conductivity_range, maximum_temperature_range, young_modulus_range, thermal_capacity_range, tensile_strength_range, ductility_range, recycle_fraction_range, selected_types):
-    return [
-        material for material in materials
-        if (density_range[0] <= material["density_(kg/m^3)"] <= density_range[1] and
-            strength_range[0] <= material["UTS_(MPa)"] <= strength_range[1] and
-            cost_range[0] <= material["cost_per_kg_($)"] <= cost_range[1] and
-            conductivity_range[0] <= material["thermal_conductivity_(W/mK)"] <= conductivity_range[1] and
-            maximum_temperature_range[0] <= material["maximum_temperature_(C)"] <= maximum_temperature_range[1] and
-            young_modulus_range[0] <= material["young_modulus_(GPa)"] <= young_modulus_range[1] and
-            thermal_capacity_range[0] <= material["thermal_capacity_(J/kgK)"] <= thermal_capacity_range[1] and
-            tensile_strength_range[0] <= material["tensile_strength_yield_(MPa)"] <= tensile_strength_range[1] and
-            ductility_range[0] <= material["Elongation_(%)"] <= ductility_range[1] and
-            recycle_fraction_range[0] <= material["recycle_fraction_(%)"] <= recycle_fraction_range[1] and
-            (material["type"] in selected_types))
-    ]
-
-# Update results based on current slider values and sorting preference
-def update_results():
-    density_range = (density_min_scale.get(), density_max_scale.get())
-    strength_range = (strength_min_scale.get(), strength_max_scale.get())
-    cost_range = (cost_min_scale.get(), cost_max_scale.get())
-    conductivity_range = (conductivity_min_scale.get(), conductivity_max_scale.get())
-    maximum_temperature_range = (maximum_temperature_min_scale.get(), maximum_temperature_max_scale.get())
-    young_modulus_range = (young_modulus_min_scale.get(), young_modulus_max_scale.get())
-    thermal_capacity_range = (thermal_capacity_min_scale.get(), thermal_capacity_max_scale.get())
-    tensile_strength_range = (tensile_strength_min_scale.get(), tensile_strength_max_scale.get())
-    ductility_range = (ductility_min_scale.get(), ductility_max_scale.get())
-    recycle_fraction_range = (recycle_fraction_min_scale.get(), recycle_fraction_max_scale.get())
-
-    selected_types = [material_type for material_type, var in material_vars.items() if var.get()]
-
-    global suitable_materials
-    suitable_materials = filter_materials(materials, density_range, strength_range, cost_range, conductivity_range, maximum_temperature_range, young_modulus_range, thermal_capacity_range, tensile_strength_range, ductility_range, recycle_fraction_range, selected_types)
-
-    # Sort results based on selected property and order
-    sort_property = sort_combobox.get()
-    if sort_property:
-        suitable_materials.sort(key=lambda x: x[sort_property], reverse=not sort_order)  # Reverse if descending
-
-    result_text.delete(1.0, tk.END)  # Clear previous results
-    result_text.insert(tk.END, f"Number of suitable materials found: {len(suitable_materials)}\n\n")
-    if suitable_materials:
-        for material in suitable_materials:
-            result_text.insert(tk.END, (f"Name: {material['name']}, Density: {material['density_(kg/m^3)']} kg/m³\n"
-                                        f"UTS: {material['UTS_(MPa)']} MPa, Cost: ${material['cost_per_kg_($)']} per kg\n"
-                                        f"Thermal Conductivity: {material['thermal_conductivity_(W/mK)']} W/mK\n"
-                                        f"Maximum Temperature: {material['maximum_temperature_(C)']} C\n"
-                                        f"Young's Modulus: {material['young_modulus_(GPa)']} GPa\n"
-                                        f"Thermal Capacity: {material['thermal_capacity_(J/kgK)']} J/kgK\n"
-                                        f"Yield Tensile Strength: {material['tensile_strength_yield_(MPa)']} MPa\n"
-                                        f"Elongation: {material['Elongation_(%)']} %\n"  # Corrected line
-                                        f"Recycle Fraction: {material['recycle_fraction_(%)']} %\n"  # Corrected line
-                                        f"{'-' * 60}\n"))  # Line separator
-    else:
-        result_text.insert(tk.END, "No materials meet your criteria.")
-
-
-# Create a slider with a dual range (min and max)
-def create_range_slider(frame, row, label_text, from_, to_, default_min, default_max):
-    label = ttk.Label(frame, text=label_text)
-    label.grid(row=row, column=0, padx=5, pady=5)
-
-    min_scale = tk.Scale(frame, from_=from_, to=to_, orient=tk.HORIZONTAL, bg="#2E2E2E", fg="white")
-    min_scale.set(default_min)
-    min_scale.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
-
-    max_scale = tk.Scale(frame, from_=from_, to=to_, orient=tk.HORIZONTAL, bg="#2E2E2E", fg="white")
-    max_scale.set(default_max)
-    max_scale.grid(row=row, column=2, padx=5, pady=5, sticky=tk.W)
-
-    # Link scales to ensure max_scale value is always greater than or equal to min_scale value
-    def update_max(val):
-        if min_scale.get() > max_scale.get():
-            max_scale.set(min_scale.get())
-        update_results()  # Update results on slider move
-
-    def update_min(val):
-        if max_scale.get() < min_scale.get():
-            min_scale.set(max_scale.get())
-        update_results()  # Update results on slider move
-
-    min_scale.config(command=update_max)
-    max_scale.config(command=update_min)
-
-    return min_scale, max_scale
-
-# Export results to a CSV file
-def export_to_csv():
-    if not suitable_materials:
-        messagebox.showwarning("Export Warning", "No materials to export.")
-        return
-
-    # Ask user for a filename to save the results
-    filename = filedialog.asksaveasfilename(defaultextension=".csv",
-                                              filetypes=[("CSV files", "*.csv"),
-                                                         ("All files", "*.*")])
-    if filename:
-        try:
-            with open(filename, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=["name", "density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)", "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)", "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)", "type"])
-                writer.writeheader()
-                for material in suitable_materials:
-                    writer.writerow(material)
-            messagebox.showinfo("Export Successful", f"Results exported to {filename}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred while exporting: {e}")
-
-# Function to plot the graph based on selected properties
-def plot_graph():
-    global x_property_combobox, y_property_combobox
-    x_property = x_property_combobox.get()
-    y_property = y_property_combobox.get()
-
-    if x_property == "Select X Property" or y_property == "Select Y Property":
-        messagebox.showwarning("Selection Error", "Please select both properties to plot.")
-        return
-
-    if not suitable_materials:
-        messagebox.showwarning("Data Error", "No materials available to plot.")
-        return
-
-    x_values = [material[x_property] for material in suitable_materials]
-    y_values = [material[y_property] for material in suitable_materials]
-
-    plt.figure(figsize=(10, 6))
-    plt.scatter(x_values, y_values, color='blue')
-
-    plt.title(f"{y_property} vs {x_property}")
-    plt.xlabel(x_property.capitalize())
-    plt.ylabel(y_property.capitalize())
-    plt.grid(True)
-
-    for i, material in enumerate(suitable_materials):
-        plt.annotate(material['name'], (x_values[i], y_values[i]), fontsize=8, alpha=0.7)
-
-    plt.show()
-
-
-    # Create the GUI
-def create_gui():
-    global density_min_scale, density_max_scale, strength_min_scale, strength_max_scale
-    global cost_min_scale, cost_max_scale, conductivity_min_scale, conductivity_max_scale
-    global maximum_temperature_min_scale, maximum_temperature_max_scale, young_modulus_min_scale, young_modulus_max_scale, thermal_capacity_min_scale, thermal_capacity_max_scale
-    global tensile_strength_min_scale, tensile_strength_max_scale, ductility_min_scale, ductility_max_scale, recycle_fraction_min_scale, recycle_fraction_max_scale
-    global result_text, material_vars, sort_combobox, sort_order, suitable_materials 
-    
-    # Load materials from the CSV file
-    global materials
-    filename = 'materials_data.csv'
-    materials = load_material_data(filename)
-    
-    if not materials:
-        return  
-
-    sort_order = True  # True for ascending, False for descending
-    suitable_materials = []  
-
-    window = tk.Tk()
-    window.title("Material Selection Tool")
-    window.configure(bg="#2E2E2E")  # Dark background
-
-    # Style for ttk widgets
-    style = ttk.Style()
-    style.configure("TFrame", background="#2E2E2E")
-    style.configure("TLabel", background="#2E2E2E", foreground="white")
-    style.configure("TButton", background="#4D4D4D", foreground="black", padding=5) 
-    style.configure("ScrolledText", background="#2E2E2E", foreground="white")
-
-    style.configure("TLabelframe", background="#2E2E2E", bordercolor="#4D4D4D", relief="groove", padding=10)
-    style.configure("TLabelframe.Label", font=("Helvetica", 10, "bold"), foreground="black")
-
-    notebook = ttk.Notebook(window)
-    notebook.grid(row=0, column=0, padx=10, pady=10, sticky=tk.NSEW)
-
-    style = ttk.Style()
-    style.configure('TNotebook.Tab', padding=[10, 5])  
-
-    style.configure('TNotebook.Tab', background='#2E2E2E', foreground='black')
-    style.map('TNotebook.Tab',
-        background=[('selected', '#4A90E2')],  # Active tab color (blue)
-        foreground=[('selected', 'white')],    # Active tab text color
-        expand=[('selected', [1, 1, 1, 0])]    # Make active tab slightly larger
-    )
-
-    style.map('TNotebook.Tab',
-        background=[('active', '#3A3A3A'),     # Hover color for inactive tabs
-                    ('selected', '#4A90E2')],   # Keep active tab color
-        foreground=[('active', 'black'),       # Hover text color
-                    ('selected', 'red')]
-    )
-
-    search_frame = ttk.Frame(notebook)
-    notebook.add(search_frame, text="Search")
-
-    type_frame = ttk.Labelframe(search_frame, text="Select Material Type", padding="10")
-    type_frame.grid(row=0, column=0, padx=70, pady=10, sticky=tk.NW)
-
-    material_types = ["Metals", "Plastics", "Ceramics", "Composites", "Alloys"]
-    material_vars = {}
-
-    style.configure("TCheckbutton", background="#2E2E2E", foreground="white")
-
-    for i, material_type in enumerate(material_types):
-        var = tk.BooleanVar()
-        material_vars[material_type] = var
-        chk = ttk.Checkbutton(type_frame, text=material_type, variable=var, style="TCheckbutton")
-        chk.grid(row=i, sticky=tk.W)
-
-    input_frame = ttk.Labelframe(search_frame, text="Material Properties", padding="10")
-    input_frame.grid(row=0, column=1, padx=10, pady=10, sticky=tk.NW)
-
-    density_min_scale, density_max_scale = create_range_slider(input_frame, 0, "Density (kg/m³):", 500, 12000, 500, 12000)
-    strength_min_scale, strength_max_scale = create_range_slider(input_frame, 1, "UTS (MPa):", 0, 1500, 0, 1500)
-    cost_min_scale, cost_max_scale = create_range_slider(input_frame, 2, "Cost ($ per kg):", 0, 100, 0, 100)
-    conductivity_min_scale, conductivity_max_scale = create_range_slider(input_frame, 3, "Thermal Conductivity (W/mK):", 0, 2000, 0, 2000)
-    maximum_temperature_min_scale, maximum_temperature_max_scale = create_range_slider(input_frame, 4, "Maximum Temperature (C):", 0, 5000, 0, 5000)
-    young_modulus_min_scale, young_modulus_max_scale = create_range_slider(input_frame, 5, "Young's Modulus (GPa):", 0, 1000, 0, 1000)
-    thermal_capacity_min_scale, thermal_capacity_max_scale = create_range_slider(input_frame, 6, "Thermal Capacity (J/kgK):", 0, 2500, 0, 2500)
-    tensile_strength_min_scale, tensile_strength_max_scale = create_range_slider(input_frame, 7, "Yield Tensile Strength (MPa):", 0, 4000, 0, 4000)
-    ductility_min_scale, ductility_max_scale = create_range_slider(input_frame, 8, "Max Elongation (%):", 0, 150, 0, 150)
-    recycle_fraction_min_scale, recycle_fraction_max_scale = create_range_slider(input_frame, 9, "Recycle Fraction (%):", 0, 100, 0, 100)
-
-    # Dropdown for sorting
-    sort_frame = ttk.Frame(search_frame, padding="10")
-    sort_frame.grid(row=0, column=2, padx=10, pady=10, sticky=tk.NW)
-
-    sort_combobox = ttk.Combobox(sort_frame, values=[
-        "density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)",
-        "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)",
-        "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)"
-    ], state="readonly")
-    sort_combobox.set("Select Property to Sort")
-    sort_combobox.grid(row=0, column=0, padx=5, pady=5)
-    sort_combobox.bind("<<ComboboxSelected>>", lambda e: update_results())
-
-    # Sort order buttons
-    def set_ascending():
-        global sort_order
-        sort_order = True
-        update_results()  # Update results on button click
-
-    def set_descending():
-        global sort_order
-        sort_order = False
-        update_results()  # Update results on button click
-
-    asc_button = ttk.Button(sort_frame, text="Ascending", command=set_ascending)
-    asc_button.grid(row=0, column=1, padx=5, pady=5)
-
-    desc_button = ttk.Button(sort_frame, text="Descending", command=set_descending)
-    desc_button.grid(row=0, column=2, padx=5, pady=5)
-
-    # Export button to save results to CSV
-    export_button = ttk.Button(search_frame, text="Export to CSV", command=export_to_csv)
-    export_button.grid(row=0, column=2, padx=150, pady=75, sticky=tk.NW)
-
-    # Result display area
-    result_frame = ttk.Frame(search_frame, padding="10")
-    result_frame.grid(row=0, column=2, columnspan=6, padx=10, pady=120, sticky=tk.NW)
-
-    filtered_label = ttk.Label(result_frame, text="Filtered Materials:  ", font=("Arial", 14, "bold"))
-    filtered_label.grid(row=0, column=1, sticky="w", pady=200)  # Place label at the top of result_frame
-
-    # Text area for displaying results
-    result_text = scrolledtext.ScrolledText(result_frame, width=60, height=15, wrap=tk.WORD)
-    result_text.grid(row=0, column=2, pady=(120, 100))  # Place result_text below the label
-
- # Create "Compare" tab with enhanced functionality
-    compare_frame = ttk.Frame(notebook)
-    notebook.add(compare_frame, text="Compare")
-
-    # Property selection frame
-    selection_frame = ttk.Frame(compare_frame, padding="10")
-    selection_frame.pack(fill=tk.X, padx=10, pady=5)
-
-    # Available properties for comparison
-    properties = ["density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)", "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)", "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)"]
-    
-    # X-axis property selection
-    ttk.Label(selection_frame, text="X-axis Property:").grid(row=0, column=0, padx=5)
-    x_property_combobox = ttk.Combobox(selection_frame, values=properties, state="readonly")
-    x_property_combobox.set("Select X Property")
-    x_property_combobox.grid(row=0, column=1, padx=5)
-
-    # Y-axis property selection
-    ttk.Label(selection_frame, text="Y-axis Property:").grid(row=1, column=0, padx=5, pady=10)
-    y_property_combobox = ttk.Combobox(selection_frame, values=properties, state="readonly")
-    y_property_combobox.set("Select Y Property")
-    y_property_combobox.grid(row=1, column=1, padx=5, pady=10)
-
-    # Material type filter frame
-    filter_frame = ttk.LabelFrame(compare_frame, text="Material Types", padding="10")
-    filter_frame.pack(fill=tk.X, padx=10, pady=5)
-
-    # Create checkboxes for material types
-    compare_material_vars = {}
-    material_types = set(material["type"] for material in materials)
-    for i, mat_type in enumerate(material_types):
-        var = tk.BooleanVar(value=True)
-        compare_material_vars[mat_type] = var
-        ttk.Checkbutton(filter_frame, text=mat_type, variable=var).grid(
-            row=i//2, column=i%2, padx=5, pady=2, sticky="w"
-        )
-
-    # Add this dictionary near the top of your code or in the create_gui function
-    property_units = {
-    "density_(kg/m^3)": "kg/m³",
-    "UTS_(MPa)": "MPa",
-    "cost_per_kg_($)": "$/kg",
-    "thermal_conductivity_(W/mK)": "W/mK",
-    "maximum_temperature_(C)": "C",
-    "young_modulus_(GPa)": "GPa",
-    "thermal_capacity_(J/kgK)": "J/kg·K",
-    "tensile_strength_yield_(MPa)": "MPa",
-    "Elongation_(%)": "%",
-    "recycle_fraction_(%)": "%"
-    }
-
-
-    # Updated plot_comparison function with units
-    def plot_comparison():
-        x_prop = x_property_combobox.get()
-        y_prop = y_property_combobox.get()
-
-        if x_prop == "Select X Property" or y_prop == "Select Y Property":
-            messagebox.showwarning("Selection Error", "Please select both X and Y properties")
-            return
-
-        # Filter materials based on selected types
-        selected_materials = [
-            material for material in materials
-            if compare_material_vars[material["type"]].get()
-        ]
-
-        if not selected_materials:
-            messagebox.showwarning("Data Error", "No materials selected for comparison")
-            return
-
-        # Create the plot
-        plt.figure(figsize=(10, 6))
-        
-        # Plot points for each material type with different colors
-        material_types = set(material["type"] for material in selected_materials)
-        colors = plt.cm.Set3(np.linspace(0, 1, len(material_types)))
-        
-        for mat_type, color in zip(material_types, colors):
-            type_materials = [m for m in selected_materials if m["type"] == mat_type]
-            x_values = [m[x_prop] for m in type_materials]
-            y_values = [m[y_prop] for m in type_materials]
-            plt.scatter(x_values, y_values, label=mat_type, color=color, alpha=0.6)
-            
-            # Add material names as annotations
-            for i, material in enumerate(type_materials):
-                plt.annotate(material['name'], (x_values[i], y_values[i]), 
-                        fontsize=8, alpha=0.7, xytext=(5, 5),
-                        textcoords='offset points')
-
-        # Customize plot with units
-        x_label = f"{x_prop.split('_')[0].title()} [{property_units[x_prop]}]"
-        y_label = f"{y_prop.split('_')[0].title()} [{property_units[y_prop]}]"
-
-        
-        plt.xlabel(x_label)
-        plt.ylabel(y_label)
-        plt.title(f"Material Property Comparison\n{y_label} vs {x_label}")
-        plt.grid(True, linestyle='--', alpha=0.7)
-        plt.legend(title="Material Types", bbox_to_anchor=(1.05, 1), loc='upper left')
-
-        # Show the plot with adjusted layout
-        plt.tight_layout()
-        plt.show()
-
-    # Plot button
-    ttk.Button(compare_frame, text="Plot Comparison", command=plot_comparison).pack(pady=10)
-
-        # Database Management tab
-    database_frame = ttk.Frame(notebook)
-    notebook.add(database_frame, text="Material Database Management")
-
-    # Define material types list (make sure this matches your actual material types)
-    material_types = ["Metals", "Plastics", "Ceramics", "Composites", "Alloys"]
-
-    # Functionality to add a new material
-    def add_material():
-        name = name_entry.get().strip()
-        density = density_entry.get().strip()
-        strength = strength_entry.get().strip()
-        cost = cost_entry.get().strip()
-        conductivity = conductivity_entry.get().strip()
-        melting_point = maximum_temperature_entry.get().strip()
-        young_modulus = young_modulus_entry.get().strip()
-        thermal_capacity = thermal_capacity_entry.get().strip()
-        tensile_strength = tensile_strength_entry.get().strip()
-        ductility = ductility_entry.get().strip()
-        recycle_fraction = recycle_fraction_entry.get().strip()
-        material_type = type_combobox.get()
-
-        # Input validation
-        if not all([name, density, strength, cost, conductivity, melting_point, young_modulus, thermal_capacity,
-                        tensile_strength, ductility, recycle_fraction, material_type]):
-            messagebox.showerror("Input Error", "All fields are required!")
-            return
-        
-        if material_type == "Select Type":
-            messagebox.showerror("Input Error", "Please select a material type!")
-            return
-
-        # Validate inputs
-        try:
-            density = float(density)
-            strength = float(strength)
-            cost = float(cost)
-            conductivity = float(conductivity)
-            melting_point = float(melting_point)
-            young_modulus = float(young_modulus)
-            thermal_capacity = float(thermal_capacity)
-            tensile_strength = float(tensile_strength)
-            ductility = float(ductility)
-            recycle_fraction = float(recycle_fraction)
-
-            # Validate ranges
-            if not (0 < density <= 25000):
-                raise ValueError("Density must be between 0 and 25000 kg/m³")
-            if not (0 < strength <= 5000):  
-                raise ValueError("UTS must be between 0 and 5000 MPa")
-            if not (0 < cost <= 1000):  
-                raise ValueError("Cost must be between 0 and 1000 $/kg")
-            if not (0 <= conductivity <= 1000):  
-                raise ValueError("Thermal conductivity must be between 0 and 1000 W/mK")
-            if not (0 <= melting_point <= 5000): 
-                raise ValueError("Maximum temperature must be between 0 and 5000 C")
-            if not (0 <= young_modulus <= 1500):  
-                raise ValueError("Young's modulus must be between 0 and 1500 GPa")
-            if not (0 <= thermal_capacity <= 10000): 
-                raise ValueError("Thermal capacity must be between 0 and 10000 J/kgK")
-            if not (0 <= tensile_strength <= 1000): 
-                raise ValueError("Yield Tensile strength must be between 0 and 1000 MPa")
-            if not (0 <= ductility <= 100):  
-                raise ValueError("Max Elongation must be between 0 and 100 %")
-            if not (0 <= recycle_fraction <= 100):  
-                raise ValueError("Recycle fraction must be between 0 and 100 %")
-
-            new_material = {
-                "name": name,
-                "density_(kg/m^3)": density,
-                "UTS_(MPa)": strength,
-                "cost_per_kg_($)": cost,
-                "thermal_conductivity_(W/mK)": conductivity,
-                "maximum_temperature_(C)": melting_point,
-                "young_modulus_(GPa)": young_modulus,
-                "thermal_capacity_(J/kgK)": thermal_capacity,
-                "tensile_strength_yield_(MPa)": tensile_strength,
-                "Elongation_(%)": ductility,
-                "recycle_fraction_(%)": recycle_fraction,
-                "type": material_type
-            }
-            
-            # Check for duplicate material names
-            if any(material['name'].lower() == name.lower() for material in materials):
-                messagebox.showerror("Input Error", "A material with this name already exists!")
-                return
-
-            materials.append(new_material)
-            save_material_data(filename, materials)
-            messagebox.showinfo("Success", f"Material '{name}' added successfully!")
-            
-            # Clear all fields after successful addition
-            name_entry.delete(0, tk.END)
-            density_entry.delete(0, tk.END)
-            strength_entry.delete(0, tk.END)
-            cost_entry.delete(0, tk.END)
-            conductivity_entry.delete(0, tk.END)
-            maximum_temperature_entry.delete(0, tk.END)
-            young_modulus_entry.delete(0, tk.END)
-            thermal_capacity_entry.delete(0, tk.END)
-            tensile_strength_entry.delete(0, tk.END)
-            ductility_entry.delete(0, tk.END)
-            recycle_fraction_entry.delete(0, tk.END)
-            type_combobox.set("Select Type")
-            
-        except ValueError as e:
-            if str(e).startswith("could not convert"):
-                messagebox.showerror("Input Error", "Please enter valid numerical values for properties.")
-            else:
-                messagebox.showerror("Input Error", str(e))
-
-    # Create a form frame with better styling
-    form_frame = ttk.LabelFrame(database_frame, text="Add New Material", padding="20")
-    form_frame.pack(pady=20, padx=20, fill="x")
-
-    # Grid configuration for better alignment
-    form_frame.columnconfigure(1, weight=1)
-
-    # Entry fields with labels and proper spacing
-    ttk.Label(form_frame, text="Name:").grid(row=0, column=0, sticky="e", padx=5, pady=5)
-    name_entry = ttk.Entry(form_frame)
-    name_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Density (kg/m³):").grid(row=1, column=0, sticky="e", padx=5, pady=5)
-    density_entry = ttk.Entry(form_frame)
-    density_entry.grid(row=1, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="UTS (MPa):").grid(row=2, column=0, sticky="e", padx=5, pady=5)
-    strength_entry = ttk.Entry(form_frame)
-    strength_entry.grid(row=2, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Cost ($ per kg):").grid(row=3, column=0, sticky="e", padx=5, pady=5)
-    cost_entry = ttk.Entry(form_frame)
-    cost_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Thermal Conductivity (W/mK):").grid(row=4, column=0, sticky="e", padx=5, pady=5)
-    conductivity_entry = ttk.Entry(form_frame)
-    conductivity_entry.grid(row=4, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Maximum Temperature (C):").grid(row=6, column=0, sticky="e", padx=5, pady=5)
-    maximum_temperature_entry = ttk.Entry(form_frame)
-    maximum_temperature_entry.grid(row=6, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Young's Modulus (GPa):").grid(row=7, column=0, sticky="e", padx=5, pady=5)
-    young_modulus_entry = ttk.Entry(form_frame)
-    young_modulus_entry.grid(row=7, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Thermal Capacity (J/kgK):").grid(row=8, column=0, sticky="e", padx=5, pady=5)
-    thermal_capacity_entry = ttk.Entry(form_frame)
-    thermal_capacity_entry.grid(row=8, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Yield Tensile Strength (MPa):").grid(row=9, column=0, sticky="e", padx=5, pady=5)
-    tensile_strength_entry = ttk.Entry(form_frame)
-    tensile_strength_entry.grid(row=9, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Max Elongation (%):").grid(row=10, column=0, sticky="e", padx=5, pady=5)
-    ductility_entry = ttk.Entry(form_frame)
-    ductility_entry.grid(row=10, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Recycle Fraction (%):").grid(row=11, column=0, sticky="e", padx=5, pady=5)
-    recycle_fraction_entry = ttk.Entry(form_frame)
-    recycle_fraction_entry.grid(row=11, column=1, sticky="ew", padx=5, pady=5)
-
-    ttk.Label(form_frame, text="Type:").grid(row=5, column=0, sticky="e", padx=5, pady=5)
-    type_combobox = ttk.Combobox(form_frame, values=material_types, state="readonly")
-    type_combobox.set("Select Type")
-    type_combobox.grid(row=5, column=1, sticky="ew", padx=5, pady=5)
-
-    # Add material button
-    add_button = ttk.Button(form_frame, text="Add Material", command=add_material)
-    add_button.grid(row=16, column=0, columnspan=2, pady=20)
-
-    # Start the GUI event loop
-    window.mainloop()
-
-    
-
-# Run the GUI
-if __name__ == "__main__":
-    create_gui()
\ No newline at end of file
+from startup import startup_profile
+import argparse
+import os
+import sys
+import threading
+import tkinter as tk
+from tkinter import messagebox, filedialog, ttk
+startup_profile.mark("import standard library and tkinter")
+import numpy as np
+startup_profile.mark("import numpy")
+from material_table import MaterialTable, MATERIAL_TYPES, NUMERIC_PROPERTIES, check_material_ranges, sortable_columns
+from results_view import VirtualResultsView
+from material_io import (DATABASE_FILE, WATCH_INTERVAL, DatabaseWatcher, open_database, prepare_import,
+                         print_cache_report, write_cache, write_material_csv)
+from material_index import compile_index
+from export import BackgroundExport
+from histogram_view import SliderHistogram
+from pareto import pareto_cache
+from perf import CALLBACK_BUDGET, ProfileToggle, hud_text, instrument_tk, perf_recorder, watch_event_loop
+from similarity import normalize_similar, parse_weights, similarity_distances
+from query_engine import QueryEngine, QueryScheduler, add_query_arguments, run_query_command
+from server import add_serve_arguments, run_serve_command
+startup_profile.mark("import application modules")
+# plot_view (matplotlib) is imported when the Compare tab is first opened
+
+
+# Load material data from a CSV file with units in headers into a MaterialTable.
+# Later launches memory-map the binary cache kept next to the CSV instead of parsing it,
+# then replay the change journal on top. Rows that cannot be read are skipped and
+# listed in a warning. Returns the table and the journal that records further changes.
+# With a window, the load runs on a worker thread while the window keeps handling
+# events, and progress(bytes_read, total_bytes) is called from the main loop.
+def load_material_data(filename, progress=None, window=None):
+    try:
+        if window is None:
+            materials, report, journal = open_database(filename, progress=progress, read_only=False)
+        else:
+            materials, report, journal = open_database_in_background(window, filename, progress)
+    except FileNotFoundError:
+        messagebox.showerror("File Error", f"Could not find file: {filename}")
+        return MaterialTable.from_records([]), None
+    except (ValueError, KeyError) as e:
+        messagebox.showerror("Data Error", f"Data format in file is incorrect.\n{e}")
+        return MaterialTable.from_records([]), None
+    if report.bad_row_count:
+        messagebox.showwarning("Data Warning", report.summary() + f"\n\nUntil they are fixed, changes are kept in "
+                               f"{journal.path} and {filename} is not rewritten, so the rows are not lost.")
+    if journal.orphaned:
+        messagebox.showwarning("Journal Warning", f"Unsaved changes in {journal.path} were made to another version "
+                                                  f"of {filename} and were not applied. They are kept in {journal.orphaned}.")
+    return materials, journal
+
+# open_database on a worker thread; the name index is built there as well.
+# Errors are raised again on the calling (Tk) thread.
+def open_database_in_background(window, filename, progress=None):
+    state = {"progress": None}
+
+    def load():
+        try:
+            materials, report, journal = open_database(filename, progress=lambda *done: state.update(progress=done),
+                                                       read_only=False)
+            materials.name_index
+            state["result"] = (materials, report, journal)
+        except Exception as e:
+            state["error"] = e
+
+    worker = threading.Thread(target=load, name="database-loader", daemon=True)
+    worker.start()
+    while worker.is_alive():
+        if progress is not None and state["progress"] is not None:
+            progress(*state["progress"])
+        window.update()
+        worker.join(0.02)
+    if "error" in state:
+        raise state["error"]
+    return state["result"]
+
+# Save updated materials data to the CSV file (written to a temporary file, then renamed)
+def save_material_data(filename, materials):
+    try:
+        write_material_csv(filename, materials)
+    except Exception as e:
+        messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+
+# Snapshot of the current filter and sort settings as a query spec (see query_engine.normalize_spec)
+def current_filter_state():
+    density_range = (density_min_scale.get(), density_max_scale.get())
+    strength_range = (strength_min_scale.get(), strength_max_scale.get())
+    cost_range = (cost_min_scale.get(), cost_max_scale.get())
+    conductivity_range = (conductivity_min_scale.get(), conductivity_max_scale.get())
+    maximum_temperature_range = (maximum_temperature_min_scale.get(), maximum_temperature_max_scale.get())
+    young_modulus_range = (young_modulus_min_scale.get(), young_modulus_max_scale.get())
+    thermal_capacity_range = (thermal_capacity_min_scale.get(), thermal_capacity_max_scale.get())
+    tensile_strength_range = (tensile_strength_min_scale.get(), tensile_strength_max_scale.get())
+    ductility_range = (ductility_min_scale.get(), ductility_max_scale.get())
+    recycle_fraction_range = (recycle_fraction_min_scale.get(), recycle_fraction_max_scale.get())
+
+    selected_types = [material_type for material_type, var in material_vars.items() if var.get()]
+
+    return {
+        "ranges": dict(zip(NUMERIC_PROPERTIES, [
+            density_range, strength_range, cost_range, conductivity_range, maximum_temperature_range,
+            young_modulus_range, thermal_capacity_range, tensile_strength_range, ductility_range,
+            recycle_fraction_range
+        ])),
+        "types": selected_types,
+        "name": name_search_entry.get(),
+        "sort": sort_combobox.get() if ranking_index is None and sort_combobox.get() in sortable_columns(materials) else None,
+        "index": ranking_index,
+        "order": "asc" if sort_order else "desc",
+        "pareto": current_pareto_objectives(),
+        "similar": dict(similar_search, k=current_top_k() or 10) if similar_search is not None else None,
+        "limit": current_top_k() if ranking_index is not None else None,
+    }
+
+# Number of ranked materials to keep, from the Top k box
+def current_top_k():
+    try:
+        return max(1, int(top_k_spinbox.get()))
+    except ValueError:
+        return None
+
+# Objectives of the Search tab's Pareto filter, or None when the filter is off
+def current_pareto_objectives():
+    if not pareto_enabled.get():
+        return None
+    objectives = [(prop_box.get(), goal_box.get()) for prop_box, goal_box in pareto_objective_boxes
+                  if prop_box.get() in NUMERIC_PROPERTIES]
+    return objectives or None
+
+# Held by the query worker while it runs a query and by the Tk thread while
+# it changes the materials table in place (add, update, delete, import, append)
+table_lock = threading.Lock()
+
+# Filter and sort for a filter state; runs on the query worker thread.
+# Returns the table queried and its version along with the result and the
+# slider histograms, see show_results.
+def run_query(state):
+    # The engine keeps its incremental filter, so only the bounds that moved touch any rows
+    with table_lock:
+        engine = query_engine
+        return engine.table, engine.table.version, engine.run(state), engine.histograms()
+
+# Spans shown in the performance HUD, in this order
+HUD_SPANS = ("filter", "sort", "show", "render", "load", "save", "event loop lag")
+
+# Display a query result; runs on the Tk main loop. Results computed on a
+# table that has since been reloaded, or edited other than by appending rows
+# (their row numbers may be gone), are dropped; a newer query is on its way.
+def show_results(result):
+    table, version, indices, histograms = result
+    if table is not materials or (table.version != version and table.appended_since(version) is None):
+        return
+    with perf_recorder.span("show"):
+        show_result_rows(indices)
+        for prop, histogram in slider_histograms.items():
+            histogram.set_counts(histograms["counts"][prop], histograms["matches"])
+    if search_results_listener is not None:
+        search_results_listener()
+
+    stats = query_scheduler.stats()
+    cache = query_engine.cache.stats()
+    status_label.config(text=f"Queries: {stats['submitted']} posted, {stats['dropped']} dropped, "
+                             f"queue depth {stats['queue_depth']} | Result cache: {cache['hits']} hits, "
+                             f"{cache['misses']} misses, {cache['entries']} entries ({cache['nbytes'] / 2**20:.1f} MB)"
+                             + (f" | {database_status}" if database_status else ""))
+    update_hud()
+
+# Fill the results grid with a query result
+def show_result_rows(indices):
+    global suitable_materials
+    suitable_materials = indices
+
+    # Only the rows in view are formatted (and scored); the rest stay as indices
+    if ranking_index is not None:
+        material_index = compile_index(ranking_index)
+        results_view.set_rows(materials, suitable_materials, "index", sort_order,
+                              scores=lambda window: material_index.evaluate(materials, window), score_heading="Index")
+    elif similar_search is not None:
+        search = similar_search
+        sort_column = sort_combobox.get() if sort_combobox.get() in sortable_columns(materials) else None
+        results_view.set_rows(materials, suitable_materials, sort_column, sort_order,
+                              scores=lambda window: similarity_distances(materials, search, window),
+                              score_heading=f"Distance to {search['to']}")
+    else:
+        results_view.set_rows(materials, suitable_materials, sort_combobox.get(), sort_order)
+
+# Refresh the performance HUD line, if it is switched on (F2)
+def update_hud():
+    if hud_visible:
+        hud_label.config(text=hud_text(len(suitable_materials), HUD_SPANS))
+
+# Update results based on current slider values and sorting preference.
+# The work is posted to the query worker so slider drags never block the GUI.
+def update_results():
+    query_scheduler.submit(current_filter_state())
+
+
+# Histogram bin edges of every property slider, for the query engine
+def slider_histogram_edges():
+    return {prop: histogram.edges for prop, histogram in slider_histograms.items()}
+
+# Create a slider with a dual range (min and max) for a property and, next to
+# it, the histogram of the materials the other constraints leave
+def create_range_slider(frame, row, prop, label_text, from_, to_, default_min, default_max):
+    label = ttk.Label(frame, text=label_text)
+    label.grid(row=row, column=0, padx=5, pady=5)
+
+    min_scale = tk.Scale(frame, from_=from_, to=to_, orient=tk.HORIZONTAL, bg="#2E2E2E", fg="white")
+    min_scale.set(default_min)
+    min_scale.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
+
+    max_scale = tk.Scale(frame, from_=from_, to=to_, orient=tk.HORIZONTAL, bg="#2E2E2E", fg="white")
+    max_scale.set(default_max)
+    max_scale.grid(row=row, column=2, padx=5, pady=5, sticky=tk.W)
+
+    min_scale.prop = max_scale.prop = prop
+
+    histogram = SliderHistogram(frame, from_, to_)
+    histogram.set_bounds(default_min, default_max)
+    histogram.grid(row=row, column=3, padx=5, pady=5, sticky=tk.W)
+    slider_histograms[min_scale.prop] = histogram
+
+    # Link scales to ensure max_scale value is always greater than or equal to min_scale value
+    def update_max(val):
+        if min_scale.get() > max_scale.get():
+            max_scale.set(min_scale.get())
+        histogram.set_bounds(min_scale.get(), max_scale.get())
+        update_results()  # Update results on slider move
+
+    def update_min(val):
+        if max_scale.get() < min_scale.get():
+            min_scale.set(max_scale.get())
+        histogram.set_bounds(min_scale.get(), max_scale.get())
+        update_results()  # Update results on slider move
+
+    min_scale.config(command=update_max)
+    max_scale.config(command=update_min)
+
+    return min_scale, max_scale
+
+# Export the results as CSV, NumPy .npz or JSON Lines (chosen by file type).
+# The rows are written on a worker thread while the status bar shows progress;
+# pressing the button again cancels, and the file only appears once complete.
+def export_results():
+    global export_job
+    if export_job is not None:
+        export_job.cancel()
+        return
+    if not len(suitable_materials):
+        messagebox.showwarning("Export Warning", "No materials to export.")
+        return
+
+    # Ask user for a filename to save the results
+    filename = filedialog.asksaveasfilename(defaultextension=".csv",
+                                              filetypes=[("CSV files", "*.csv"),
+                                                         ("NumPy arrays", "*.npz"),
+                                                         ("JSON Lines", "*.jsonl"),
+                                                         ("All files", "*.*")])
+    if filename:
+        export_job = BackgroundExport(materials, suitable_materials, filename)
+        export_button.config(text="Cancel Export")
+        export_button.after(100, poll_export)
+
+# Show export progress until the worker finishes, then report the outcome
+def poll_export():
+    global export_job
+    job = export_job
+    done, total = job.progress
+    if not job.done:
+        status_label.config(text=f"Exporting {done:,} of {total:,} rows ({done / max(total, 1):.0%})... "
+                                 f"press Cancel Export to stop")
+        export_button.after(100, poll_export)
+        return
+    export_job = None
+    export_button.config(text="Export Results")
+    if job.cancelled:
+        status_label.config(text="Export cancelled")
+    elif job.error is not None:
+        messagebox.showerror("Export Error", f"An error occurred while exporting: {job.error}")
+    else:
+        perf_recorder.record("export", job.seconds)
+        status_label.config(text=f"Exported {total:,} rows in {job.seconds:.1f} s ({total / max(job.seconds, 1e-9):,.0f} rows/s)")
+        messagebox.showinfo("Export Successful", f"Results exported to {job.path}")
+
+    # Create the GUI
+def create_gui(profile=False, callback_budget=CALLBACK_BUDGET, watch_interval=WATCH_INTERVAL):
+    global density_min_scale, density_max_scale, strength_min_scale, strength_max_scale
+    global cost_min_scale, cost_max_scale, conductivity_min_scale, conductivity_max_scale
+    global maximum_temperature_min_scale, maximum_temperature_max_scale, young_modulus_min_scale, young_modulus_max_scale, thermal_capacity_min_scale, thermal_capacity_max_scale
+    global tensile_strength_min_scale, tensile_strength_max_scale, ductility_min_scale, ductility_max_scale, recycle_fraction_min_scale, recycle_fraction_max_scale
+    global results_view, material_vars, sort_combobox, sort_order, suitable_materials, query_engine
+    global query_scheduler, status_label, pareto_enabled, pareto_objective_boxes
+    global ranking_index, top_k_spinbox, search_results_listener, comparison_stale, name_search_entry, similar_search
+    global hud_label, hud_visible, database_listener, database_status, export_button, export_job, slider_histograms
+
+    # Every Tk callback is timed from here on; slow ones are logged
+    instrument_tk(callback_budget)
+    window = tk.Tk()
+    window.title("Material Selection Tool")
+    window.configure(bg="#2E2E2E")  # Dark background
+
+    # Show the window first, then load materials from the CSV file in the
+    # background with a progress bar while it is parsed
+    global materials
+    filename = DATABASE_FILE
+    loading_frame = ttk.Frame(window, padding=20)
+    loading_frame.grid(row=0, column=0)
+    ttk.Label(loading_frame, text=f"Loading {filename}...").pack()
+    loading_bar = ttk.Progressbar(loading_frame, length=300, maximum=1.0)
+    loading_bar.pack(pady=10)
+    window.update()
+    startup_profile.mark("create window")
+
+    def show_load_progress(bytes_read, total_bytes):
+        loading_bar["value"] = bytes_read / total_bytes if total_bytes else 1.0
+
+    materials, materials_journal = load_material_data(filename, progress=show_load_progress, window=window)
+    loading_frame.destroy()
+    startup_profile.mark("load database")
+    
+    if not len(materials):
+        window.destroy()
+        return  
+
+    sort_order = True  # True for ascending, False for descending
+    ranking_index = None  # material index expression the results are ranked by, if any
+    similar_search = None  # normalized similarity search ("Similar to selected"), if any
+    search_results_listener = None  # called after each Search result is shown
+    database_listener = None  # called after rows from outside are appended or the database is reloaded
+    database_status = ""  # what the last live reload did, for the status bar
+    export_job = None  # BackgroundExport running, if any
+    comparison_stale = False  # Compare plot missed Search results while hidden
+    suitable_materials = np.empty(0, dtype=np.intp)
+    slider_histograms = {}  # SliderHistogram next to each property slider
+
+    # Style for ttk widgets
+    style = ttk.Style()
+    style.configure("TFrame", background="#2E2E2E")
+    style.configure("TLabel", background="#2E2E2E", foreground="white")
+    style.configure("TButton", background="#4D4D4D", foreground="black", padding=5) 
+    style.configure("ScrolledText", background="#2E2E2E", foreground="white")
+
+    style.configure("TLabelframe", background="#2E2E2E", bordercolor="#4D4D4D", relief="groove", padding=10)
+    style.configure("TLabelframe.Label", font=("Helvetica", 10, "bold"), foreground="black")
+
+    notebook = ttk.Notebook(window)
+    notebook.grid(row=0, column=0, padx=10, pady=10, sticky=tk.NSEW)
+
+    # Status bar with query scheduler statistics
+    status_label = ttk.Label(window, text="", anchor=tk.W)
+    status_label.grid(row=1, column=0, padx=10, pady=(0, 5), sticky=tk.EW)
+
+    # Performance HUD below it: F2 shows or hides the latest timings, F3 starts
+    # and stops a cProfile of the GUI thread
+    hud_visible = False
+    hud_label = ttk.Label(window, text="", anchor=tk.W)
+    profile_toggle = ProfileToggle()
+
+    def toggle_hud(event=None):
+        global hud_visible
+        hud_visible = not hud_visible
+        if hud_visible:
+            hud_label.grid(row=2, column=0, padx=10, pady=(0, 5), sticky=tk.EW)
+            refresh_hud()
+        else:
+            hud_label.grid_remove()
+
+    # Keeps the HUD moving while nothing is being filtered (loads, saves, lag)
+    def refresh_hud():
+        if hud_visible:
+            update_hud()
+            window.after(500, refresh_hud)
+
+    def toggle_profile(event=None):
+        if not profile_toggle.running:
+            profile_toggle.start()
+            status_label.config(text="Profiling the GUI thread... press F3 again to stop")
+            return
+        try:
+            path = profile_toggle.stop(stream=sys.stderr)
+        except OSError as e:
+            messagebox.showerror("Profile Error", f"Could not write the profile: {e}")
+            return
+        status_label.config(text=f"Profile written to {os.path.abspath(path)}")
+
+    window.bind("<F2>", toggle_hud)
+    window.bind("<F3>", toggle_profile)
+    watch_event_loop(window)
+
+    # Filter queries run on a worker thread; only the newest result is shown
+    query_scheduler = QueryScheduler(window, run_query, show_results)
+
+    style = ttk.Style()
+    style.configure('TNotebook.Tab', padding=[10, 5])  
+
+    style.configure('TNotebook.Tab', background='#2E2E2E', foreground='black')
+    style.map('TNotebook.Tab',
+        background=[('selected', '#4A90E2')],  # Active tab color (blue)
+        foreground=[('selected', 'white')],    # Active tab text color
+        expand=[('selected', [1, 1, 1, 0])]    # Make active tab slightly larger
+    )
+
+    style.map('TNotebook.Tab',
+        background=[('active', '#3A3A3A'),     # Hover color for inactive tabs
+                    ('selected', '#4A90E2')],   # Keep active tab color
+        foreground=[('active', 'black'),       # Hover text color
+                    ('selected', 'red')]
+    )
+
+    search_frame = ttk.Frame(notebook)
+    notebook.add(search_frame, text="Search")
+
+    type_frame = ttk.Labelframe(search_frame, text="Select Material Type", padding="10")
+    type_frame.grid(row=0, column=0, padx=70, pady=10, sticky=tk.NW)
+
+    material_types = MATERIAL_TYPES
+    material_vars = {}
+
+    style.configure("TCheckbutton", background="#2E2E2E", foreground="white")
+
+    def add_type_checkbox(material_type):
+        var = tk.BooleanVar()
+        chk = ttk.Checkbutton(type_frame, text=material_type, variable=var, style="TCheckbutton",
+                              command=update_results)
+        chk.grid(row=len(material_vars), sticky=tk.W)
+        material_vars[material_type] = var
+
+    for material_type in material_types:
+        add_type_checkbox(material_type)
+
+    # Pareto filter: keep only the matches no other match beats on every objective
+    pareto_frame = ttk.Labelframe(search_frame, text="Pareto Filter", padding="10")
+    pareto_frame.grid(row=0, column=0, padx=70, pady=(220, 10), sticky=tk.NW)
+
+    pareto_enabled = tk.BooleanVar(value=False)
+    ttk.Checkbutton(pareto_frame, text="Only show the Pareto front", variable=pareto_enabled, style="TCheckbutton",
+                    command=update_results).grid(row=0, column=0, columnspan=2, sticky=tk.W)
+    pareto_objective_boxes = []
+    for i, (prop, goal) in enumerate([("young_modulus_(GPa)", "max"), ("density_(kg/m^3)", "min"), ("(none)", "min")]):
+        prop_box = ttk.Combobox(pareto_frame, values=["(none)"] + NUMERIC_PROPERTIES, state="readonly", width=24)
+        prop_box.set(prop)
+        prop_box.grid(row=i + 1, column=0, padx=(0, 5), pady=2)
+        goal_box = ttk.Combobox(pareto_frame, values=["min", "max"], state="readonly", width=5)
+        goal_box.set(goal)
+        goal_box.grid(row=i + 1, column=1, pady=2)
+        for box in (prop_box, goal_box):
+            box.bind("<<ComboboxSelected>>", lambda e: update_results())
+        pareto_objective_boxes.append((prop_box, goal_box))
+
+    input_frame = ttk.Labelframe(search_frame, text="Material Properties", padding="10")
+    input_frame.grid(row=0, column=1, padx=10, pady=10, sticky=tk.NW)
+
+    density_min_scale, density_max_scale = create_range_slider(input_frame, 0, "density_(kg/m^3)", "Density (kg/m³):", 500, 12000, 500, 12000)
+    strength_min_scale, strength_max_scale = create_range_slider(input_frame, 1, "UTS_(MPa)", "UTS (MPa):", 0, 1500, 0, 1500)
+    cost_min_scale, cost_max_scale = create_range_slider(input_frame, 2, "cost_per_kg_($)", "Cost ($ per kg):", 0, 100, 0, 100)
+    conductivity_min_scale, conductivity_max_scale = create_range_slider(input_frame, 3, "thermal_conductivity_(W/mK)", "Thermal Conductivity (W/mK):", 0, 2000, 0, 2000)
+    maximum_temperature_min_scale, maximum_temperature_max_scale = create_range_slider(input_frame, 4, "maximum_temperature_(C)", "Maximum Temperature (C):", 0, 5000, 0, 5000)
+    young_modulus_min_scale, young_modulus_max_scale = create_range_slider(input_frame, 5, "young_modulus_(GPa)", "Young's Modulus (GPa):", 0, 1000, 0, 1000)
+    thermal_capacity_min_scale, thermal_capacity_max_scale = create_range_slider(input_frame, 6, "thermal_capacity_(J/kgK)", "Thermal Capacity (J/kgK):", 0, 2500, 0, 2500)
+    tensile_strength_min_scale, tensile_strength_max_scale = create_range_slider(input_frame, 7, "tensile_strength_yield_(MPa)", "Yield Tensile Strength (MPa):", 0, 4000, 0, 4000)
+    ductility_min_scale, ductility_max_scale = create_range_slider(input_frame, 8, "Elongation_(%)", "Max Elongation (%):", 0, 150, 0, 150)
+    recycle_fraction_min_scale, recycle_fraction_max_scale = create_range_slider(input_frame, 9, "recycle_fraction_(%)", "Recycle Fraction (%):", 0, 100, 0, 100)
+
+    # The engine's filter keeps the slider histograms up to date as bounds move
+    query_engine = QueryEngine(materials, histogram_edges=slider_histogram_edges())
+
+    # Dropdown for sorting
+    sort_frame = ttk.Frame(search_frame, padding="10")
+    sort_frame.grid(row=0, column=2, padx=10, pady=10, sticky=tk.NW)
+
+    sort_combobox = ttk.Combobox(sort_frame, values=[
+        "density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)",
+        "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)",
+        "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)"
+    ], state="readonly")
+    sort_combobox.set("Select Property to Sort")
+    sort_combobox.grid(row=0, column=0, padx=5, pady=5)
+    sort_combobox.bind("<<ComboboxSelected>>", lambda e: update_results())
+
+    # Sort order buttons
+    def set_ascending():
+        global sort_order
+        sort_order = True
+        update_results()  # Update results on button click
+
+    def set_descending():
+        global sort_order
+        sort_order = False
+        update_results()  # Update results on button click
+
+    asc_button = ttk.Button(sort_frame, text="Ascending", command=set_ascending)
+    asc_button.grid(row=0, column=1, padx=5, pady=5)
+
+    desc_button = ttk.Button(sort_frame, text="Descending", command=set_descending)
+    desc_button.grid(row=0, column=2, padx=5, pady=5)
+
+    # Ranking by a material index such as young_modulus^(1/2)/density, keeping the top k
+    def rank_by_index():
+        global ranking_index, sort_order, similar_search
+        try:
+            ranking_index = compile_index(index_entry.get()).expression
+        except ValueError as e:
+            messagebox.showerror("Material Index", str(e))
+            return
+        similar_search = None
+        sort_order = False  # best (largest) index first
+        update_results()
+
+    def clear_ranking():
+        global ranking_index, similar_search
+        ranking_index = None
+        similar_search = None
+        update_results()
+
+    # Closest substitutes of the selected material among the current matches (Top k of them)
+    def find_similar():
+        global ranking_index, similar_search, sort_order
+        row = results_view.selected_index()
+        if row is None:
+            messagebox.showwarning("Similar Materials", "Select a material in the results first.")
+            return
+        try:
+            similar_search = normalize_similar({"to": str(materials.names[row]),
+                                                "weights": parse_weights(weights_entry.get()),
+                                                "scale": "log" if scale_var.get() else "z"}, materials)
+        except ValueError as e:
+            messagebox.showerror("Similar Materials", str(e))
+            return
+        ranking_index = None
+        sort_combobox.set("Select Property to Sort")
+        sort_order = True
+        update_results()
+
+    ttk.Label(sort_frame, text="Rank by index:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+    index_entry = ttk.Entry(sort_frame, width=30)
+    index_entry.insert(0, "young_modulus^(1/2)/density")
+    index_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=5)
+    index_entry.bind("<Return>", lambda e: rank_by_index())
+    ttk.Label(sort_frame, text="Top k:").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+    top_k_spinbox = tk.Spinbox(sort_frame, from_=1, to=1000000, width=8,
+                               command=lambda: ranking_index is not None and update_results())
+    top_k_spinbox.delete(0, tk.END)
+    top_k_spinbox.insert(0, "100")
+    top_k_spinbox.grid(row=2, column=1, padx=5, pady=5, sticky=tk.W)
+    ttk.Button(sort_frame, text="Rank", command=rank_by_index).grid(row=2, column=2, padx=5, pady=5)
+    ttk.Button(sort_frame, text="Clear", command=clear_ranking).grid(row=2, column=3, padx=5, pady=5)
+    ttk.Label(sort_frame, text="Weights:").grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+    weights_entry = ttk.Entry(sort_frame, width=30)
+    weights_entry.insert(0, "cost=0")
+    weights_entry.grid(row=4, column=1, columnspan=2, padx=5, pady=5)
+    weights_entry.bind("<Return>", lambda e: find_similar())
+    scale_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(sort_frame, text="Log scale", variable=scale_var).grid(row=4, column=3, padx=5, pady=5, sticky=tk.W)
+    ttk.Button(sort_frame, text="Similar to selected", command=find_similar).grid(row=4, column=4, padx=5, pady=5)
+
+    # Type-ahead name search (exact, prefix, substring, then close spellings), combined with the filters
+    ttk.Label(sort_frame, text="Find name:").grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
+    name_search_entry = ttk.Entry(sort_frame, width=30)
+    name_search_entry.grid(row=3, column=1, columnspan=2, padx=5, pady=5)
+    name_search_entry.bind("<KeyRelease>", lambda e: update_results())
+
+    # Export button to save results to a file
+    export_button = ttk.Button(sort_frame, text="Export Results", command=export_results)
+    export_button.grid(row=3, column=3, padx=5, pady=5, sticky=tk.W)
+
+    # Result display area
+    result_frame = ttk.Frame(search_frame, padding="10")
+    result_frame.grid(row=0, column=2, columnspan=6, padx=10, pady=(205, 120), sticky=tk.NW)
+
+    filtered_label = ttk.Label(result_frame, text="Filtered Materials:  ", font=("Arial", 14, "bold"))
+    filtered_label.grid(row=0, column=1, sticky="w", pady=200)  # Place label at the top of result_frame
+
+    # Results grid; clicking a column header sorts by it, clicking again flips the order
+    def sort_by_column(column):
+        global sort_order, ranking_index
+        if column == "index":
+            if similar_search is not None:
+                return  # neighbours always come nearest first
+            sort_order = not sort_order
+        else:
+            sort_order = not sort_order if ranking_index is None and sort_combobox.get() == column else True
+            ranking_index = None
+            sort_combobox.set(column)
+        update_results()
+
+    result_columns = [
+        ("name", "Name"), ("type", "Type"),
+        ("density_(kg/m^3)", "Density (kg/m³)"), ("UTS_(MPa)", "UTS (MPa)"),
+        ("cost_per_kg_($)", "Cost ($/kg)"), ("thermal_conductivity_(W/mK)", "Conductivity (W/mK)"),
+        ("maximum_temperature_(C)", "Max Temp (C)"), ("young_modulus_(GPa)", "Young's Mod. (GPa)"),
+        ("thermal_capacity_(J/kgK)", "Capacity (J/kgK)"), ("tensile_strength_yield_(MPa)", "Yield (MPa)"),
+        ("Elongation_(%)", "Elongation (%)"), ("recycle_fraction_(%)", "Recycle (%)"), ("index", "Index")
+    ]
+    results_view = VirtualResultsView(result_frame, result_columns, on_sort=sort_by_column, height=15,
+                                      score_column="index")
+    results_view.grid(row=0, column=2, pady=(120, 100))  # Place results below the label
+
+    startup_profile.mark("build Search tab")
+
+    # The other tabs are only added as empty pages here and filled in on first selection
+    compare_frame = ttk.Frame(notebook)
+    notebook.add(compare_frame, text="Compare")
+    database_frame = ttk.Frame(notebook)
+    notebook.add(database_frame, text="Material Database Management")
+
+    # Create "Compare" tab with enhanced functionality
+    def build_compare_tab():
+        global search_results_listener, database_listener
+        # matplotlib is the slowest import by far, so it waits until a plot is needed
+        with startup_profile.timed("import plot_view (matplotlib)"):
+            from plot_view import PlotPanel
+
+        # Property selection frame
+        selection_frame = ttk.Frame(compare_frame, padding="10")
+        selection_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        # Available properties for comparison
+        properties = ["density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)", "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)", "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)"]
+    
+        # X-axis property selection
+        ttk.Label(selection_frame, text="X-axis Property:").grid(row=0, column=0, padx=5)
+        x_property_combobox = ttk.Combobox(selection_frame, values=properties, state="readonly")
+        x_property_combobox.set("Select X Property")
+        x_property_combobox.grid(row=0, column=1, padx=5)
+
+        # Y-axis property selection
+        ttk.Label(selection_frame, text="Y-axis Property:").grid(row=1, column=0, padx=5, pady=10)
+        y_property_combobox = ttk.Combobox(selection_frame, values=properties, state="readonly")
+        y_property_combobox.set("Select Y Property")
+        y_property_combobox.grid(row=1, column=1, padx=5, pady=10)
+
+        # Trade-off direction of each axis, for the Pareto front
+        x_goal_combobox = ttk.Combobox(selection_frame, values=["min", "max"], state="readonly", width=5)
+        x_goal_combobox.set("min")
+        x_goal_combobox.grid(row=0, column=2, padx=5)
+        y_goal_combobox = ttk.Combobox(selection_frame, values=["min", "max"], state="readonly", width=5)
+        y_goal_combobox.set("max")
+        y_goal_combobox.grid(row=1, column=2, padx=5, pady=10)
+        show_front = tk.BooleanVar(value=True)
+        ttk.Checkbutton(selection_frame, text="Highlight Pareto front", variable=show_front).grid(row=0, column=3, padx=10)
+
+        # Material type filter frame
+        filter_frame = ttk.LabelFrame(compare_frame, text="Material Types", padding="10")
+        filter_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        # Create checkboxes for material types
+        compare_material_vars = {}
+        material_types = materials.present_types()
+        for i, mat_type in enumerate(material_types):
+            var = tk.BooleanVar(value=True)
+            compare_material_vars[mat_type] = var
+            ttk.Checkbutton(filter_frame, text=mat_type, variable=var).grid(
+                row=i//2, column=i%2, padx=5, pady=2, sticky="w"
+            )
+
+        # Add this dictionary near the top of your code or in the create_gui function
+        property_units = {
+        "density_(kg/m^3)": "kg/m³",
+        "UTS_(MPa)": "MPa",
+        "cost_per_kg_($)": "$/kg",
+        "thermal_conductivity_(W/mK)": "W/mK",
+        "maximum_temperature_(C)": "C",
+        "young_modulus_(GPa)": "GPa",
+        "thermal_capacity_(J/kgK)": "J/kg·K",
+        "tensile_strength_yield_(MPa)": "MPa",
+        "Elongation_(%)": "%",
+        "recycle_fraction_(%)": "%"
+        }
+
+
+        # Plot embedded in the tab; one figure for the whole session, updated in place
+        compare_source = tk.StringVar(value="types")
+        source_frame = ttk.Frame(compare_frame)
+        source_frame.pack(fill=tk.X, padx=10)
+        ttk.Radiobutton(source_frame, text="All materials of the checked types", variable=compare_source,
+                        value="types", command=lambda: plot_comparison()).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(source_frame, text="Search tab results (live)", variable=compare_source,
+                        value="search", command=lambda: plot_comparison()).pack(side=tk.LEFT, padx=5)
+        redraw_label = ttk.Label(source_frame, text="")
+        redraw_label.pack(side=tk.RIGHT, padx=5)
+
+        plot_panel = PlotPanel(compare_frame, figsize=(10, 6))
+
+        # Most material names drawn at once; the rest are left unlabeled to avoid clutter
+        def set_label_budget():
+            try:
+                plot_panel.plot.label_budget = max(0, int(label_budget_spinbox.get()))
+            except ValueError:
+                return
+            plot_comparison(warn=False)
+
+        label_budget_spinbox = tk.Spinbox(source_frame, from_=0, to=500, width=5, command=set_label_budget)
+        label_budget_spinbox.delete(0, tk.END)
+        label_budget_spinbox.insert(0, str(plot_panel.plot.label_budget))
+        label_budget_spinbox.bind("<Return>", lambda e: set_label_budget())
+        label_budget_spinbox.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(source_frame, text="Labels:").pack(side=tk.RIGHT)
+
+        # Updated plot_comparison function with units
+        def plot_comparison(warn=True):
+            global comparison_stale
+            x_prop = x_property_combobox.get()
+            y_prop = y_property_combobox.get()
+
+            if x_prop == "Select X Property" or y_prop == "Select Y Property":
+                if warn:
+                    messagebox.showwarning("Selection Error", "Please select both X and Y properties")
+                return
+
+            # Filter materials based on selected types, or follow the Search tab
+            selected_types = [mat_type for mat_type, var in compare_material_vars.items() if var.get()]
+            type_mask = materials.type_mask(selected_types)
+            if compare_source.get() == "search":
+                # Keep the Search tab's order, so its top-ranked materials are labelled first
+                selected_materials = suitable_materials[type_mask[suitable_materials]]
+            else:
+                selected_materials = np.flatnonzero(type_mask)
+
+            if not len(selected_materials) and warn:
+                messagebox.showwarning("Data Error", "No materials selected for comparison")
+
+            # Non-dominated materials for the chosen directions, joined in x order
+            front = None
+            if show_front.get() and x_prop != y_prop and len(selected_materials):
+                front = pareto_cache.front(materials, selected_materials,
+                                           [(x_prop, x_goal_combobox.get()), (y_prop, y_goal_combobox.get())])
+                front = front[np.argsort(materials.columns[x_prop][front], kind="stable")]
+
+            # Customize plot with units
+            x_label = f"{x_prop.split('_')[0].title()} [{property_units[x_prop]}]"
+            y_label = f"{y_prop.split('_')[0].title()} [{property_units[y_prop]}]"
+
+            with perf_recorder.span("render"):
+                plot_panel.plot.set_data(materials, selected_materials, x_prop, y_prop, x_label, y_label, front,
+                                         title=f"Material Property Comparison\n{y_label} vs {x_label}")
+            plot = plot_panel.plot
+            kind, seconds = plot.last_redraw
+            redraw_label.config(text=f"{len(selected_materials)} materials, {kind} redraw {seconds * 1000:.0f} ms, "
+                                     f"{plot.visible_labels} labels placed in {plot.last_label_time * 1000:.1f} ms")
+            comparison_stale = False
+
+        # Called with every new Search result; the plot only follows it while it is on screen
+        def on_search_results():
+            global comparison_stale
+            if compare_source.get() != "search":
+                return
+            if notebook.select() == str(compare_frame):
+                plot_comparison(warn=False)
+            else:
+                comparison_stale = True
+
+        def on_tab_changed(event):
+            if comparison_stale and notebook.select() == str(compare_frame):
+                plot_comparison(warn=False)
+
+        # Rows added from outside: new types get a checkbox, and a plot of all
+        # materials of the checked types is redrawn (a Search-driven one follows the new results)
+        def on_database_changed():
+            global comparison_stale
+            for mat_type in materials.present_types():
+                if mat_type not in compare_material_vars:
+                    var = tk.BooleanVar(value=True)
+                    i = len(compare_material_vars)
+                    compare_material_vars[mat_type] = var
+                    ttk.Checkbutton(filter_frame, text=mat_type, variable=var).grid(
+                        row=i//2, column=i%2, padx=5, pady=2, sticky="w"
+                    )
+                    var.trace_add("write", lambda *args: plot_comparison(warn=False))
+            if compare_source.get() == "search":
+                return
+            if notebook.select() == str(compare_frame):
+                plot_comparison(warn=False)
+            else:
+                comparison_stale = True
+
+        search_results_listener = on_search_results
+        database_listener = on_database_changed
+        notebook.bind("<<NotebookTabChanged>>", on_tab_changed, add="+")
+
+        # Any change of axes, goals or types updates the plot in place
+        for combobox in (x_property_combobox, y_property_combobox, x_goal_combobox, y_goal_combobox):
+            combobox.bind("<<ComboboxSelected>>", lambda e: plot_comparison(warn=False))
+        for var in list(compare_material_vars.values()) + [show_front]:
+            var.trace_add("write", lambda *args: plot_comparison(warn=False))
+
+        # Plot button
+        ttk.Button(compare_frame, text="Plot Comparison", command=plot_comparison).pack(pady=10)
+        plot_panel.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    # Database Management tab
+    def build_database_tab():
+        # Define material types list (make sure this matches your actual material types)
+        material_types = MATERIAL_TYPES
+
+        # Read and validate the form; returns the material dict, or None after showing the error
+        def read_material_form():
+            name = name_entry.get().strip()
+            density = density_entry.get().strip()
+            strength = strength_entry.get().strip()
+            cost = cost_entry.get().strip()
+            conductivity = conductivity_entry.get().strip()
+            melting_point = maximum_temperature_entry.get().strip()
+            young_modulus = young_modulus_entry.get().strip()
+            thermal_capacity = thermal_capacity_entry.get().strip()
+            tensile_strength = tensile_strength_entry.get().strip()
+            ductility = ductility_entry.get().strip()
+            recycle_fraction = recycle_fraction_entry.get().strip()
+            material_type = type_combobox.get()
+
+            # Input validation
+            if not all([name, density, strength, cost, conductivity, melting_point, young_modulus, thermal_capacity,
+                            tensile_strength, ductility, recycle_fraction, material_type]):
+                messagebox.showerror("Input Error", "All fields are required!")
+                return None
+        
+            if material_type == "Select Type":
+                messagebox.showerror("Input Error", "Please select a material type!")
+                return None
+
+            # Validate inputs
+            try:
+                density = float(density)
+                strength = float(strength)
+                cost = float(cost)
+                conductivity = float(conductivity)
+                melting_point = float(melting_point)
+                young_modulus = float(young_modulus)
+                thermal_capacity = float(thermal_capacity)
+                tensile_strength = float(tensile_strength)
+                ductility = float(ductility)
+                recycle_fraction = float(recycle_fraction)
+
+                material = {
+                    "name": name,
+                    "density_(kg/m^3)": density,
+                    "UTS_(MPa)": strength,
+                    "cost_per_kg_($)": cost,
+                    "thermal_conductivity_(W/mK)": conductivity,
+                    "maximum_temperature_(C)": melting_point,
+                    "young_modulus_(GPa)": young_modulus,
+                    "thermal_capacity_(J/kgK)": thermal_capacity,
+                    "tensile_strength_yield_(MPa)": tensile_strength,
+                    "Elongation_(%)": ductility,
+                    "recycle_fraction_(%)": recycle_fraction,
+                    "type": material_type
+                }
+
+                # Validate ranges
+                check_material_ranges(material)
+                return material
+
+            except ValueError as e:
+                if str(e).startswith("could not convert"):
+                    messagebox.showerror("Input Error", "Please enter valid numerical values for properties.")
+                else:
+                    messagebox.showerror("Input Error", str(e))
+                return None
+
+        def clear_material_form():
+            name_entry.delete(0, tk.END)
+            density_entry.delete(0, tk.END)
+            strength_entry.delete(0, tk.END)
+            cost_entry.delete(0, tk.END)
+            conductivity_entry.delete(0, tk.END)
+            maximum_temperature_entry.delete(0, tk.END)
+            young_modulus_entry.delete(0, tk.END)
+            thermal_capacity_entry.delete(0, tk.END)
+            tensile_strength_entry.delete(0, tk.END)
+            ductility_entry.delete(0, tk.END)
+            recycle_fraction_entry.delete(0, tk.END)
+            type_combobox.set("Select Type")
+
+        # Changes are appended to the journal (one fsynced write) instead of
+        # rewriting the CSV; the journal is folded into the CSV now and then
+        def commit_journal():
+            if materials_journal.needs_compaction():
+                compact_journal()
+            update_results()
+
+        # Functionality to add a new material
+        def add_material():
+            new_material = read_material_form()
+            if new_material is None:
+                return
+            name = new_material["name"]
+
+            # Check for duplicate material names
+            if materials.find(name) is not None:
+                messagebox.showerror("Input Error", "A material with this name already exists!")
+                return
+
+            try:
+                materials_journal.add([new_material])
+            except OSError as e:
+                messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+                return
+            with table_lock:
+                materials.append_records([new_material])
+            messagebox.showinfo("Success", f"Material '{name}' added successfully!")
+        
+            # Clear all fields after successful addition
+            clear_material_form()
+            commit_journal()
+
+        # Overwrite an existing material (matched by name) with the form values
+        def update_material():
+            new_material = read_material_form()
+            if new_material is None:
+                return
+            name = new_material["name"]
+            index = materials.find(name)
+            if index is None:
+                messagebox.showerror("Input Error", f"No material named '{name}' exists!")
+                return
+
+            try:
+                materials_journal.edit(name, new_material)
+            except OSError as e:
+                messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+                return
+            with table_lock:
+                materials.update_record(index, new_material)
+            messagebox.showinfo("Success", f"Material '{name}' updated successfully!")
+            clear_material_form()
+            commit_journal()
+
+        # Delete the material named in the form
+        def delete_material():
+            global similar_search
+            name = name_entry.get().strip()
+            index = materials.find(name) if name else None
+            if index is None:
+                messagebox.showerror("Input Error", f"No material named '{name}' exists!")
+                return
+            if not messagebox.askyesno("Delete Material", f"Delete material '{name}'?"):
+                return
+
+            try:
+                materials_journal.delete(name)
+            except OSError as e:
+                messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+                return
+            with table_lock:
+                materials.delete_rows([index])
+            # Until the next result arrives, the shown rows follow the rows that moved up
+            remaining = suitable_materials[suitable_materials != index]
+            show_result_rows(remaining - (remaining > index))
+            if similar_search is not None and materials.find(similar_search["to"]) is None:
+                similar_search = None  # its reference material is gone
+            clear_material_form()
+            commit_journal()
+
+        # Import many materials from a CSV or JSON file. Every row is checked with the
+        # same rules as the form (column-wide), accepted rows are committed in one write
+        # and a per-row accept/reject report is saved next to the imported file.
+        def bulk_import():
+            path = filedialog.askopenfilename(filetypes=[("CSV or JSON files", "*.csv *.json"),
+                                                         ("All files", "*.*")])
+            if not path:
+                return
+            try:
+                result = prepare_import(materials, path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Import Error", f"Could not read {path}: {e}")
+                return
+
+            report_path = os.path.splitext(path)[0] + "_import_report.csv"
+            try:
+                result.write_report(report_path)
+            except OSError as e:
+                report_path = None
+                messagebox.showwarning("Import Warning", f"Could not write the import report: {e}")
+            if result.accepted_count:
+                try:
+                    with table_lock:
+                        materials_journal.add_table(materials, result.accepted, compact=False)
+                except OSError as e:
+                    messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+                    return
+                commit_journal()
+
+            summary = f"Imported {result.accepted_count} material(s), rejected {result.rejected_count}."
+            if report_path:
+                summary += f"\nReport saved to {report_path}"
+            messagebox.showinfo("Import Finished", summary)
+
+        # Create a form frame with better styling
+        form_frame = ttk.LabelFrame(database_frame, text="Add New Material", padding="20")
+        form_frame.pack(pady=20, padx=20, fill="x")
+
+        # Grid configuration for better alignment
+        form_frame.columnconfigure(1, weight=1)
+
+        # Entry fields with labels and proper spacing
+        ttk.Label(form_frame, text="Name:").grid(row=0, column=0, sticky="e", padx=5, pady=5)
+        name_entry = ttk.Entry(form_frame)
+        name_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Density (kg/m³):").grid(row=1, column=0, sticky="e", padx=5, pady=5)
+        density_entry = ttk.Entry(form_frame)
+        density_entry.grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="UTS (MPa):").grid(row=2, column=0, sticky="e", padx=5, pady=5)
+        strength_entry = ttk.Entry(form_frame)
+        strength_entry.grid(row=2, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Cost ($ per kg):").grid(row=3, column=0, sticky="e", padx=5, pady=5)
+        cost_entry = ttk.Entry(form_frame)
+        cost_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Thermal Conductivity (W/mK):").grid(row=4, column=0, sticky="e", padx=5, pady=5)
+        conductivity_entry = ttk.Entry(form_frame)
+        conductivity_entry.grid(row=4, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Maximum Temperature (C):").grid(row=6, column=0, sticky="e", padx=5, pady=5)
+        maximum_temperature_entry = ttk.Entry(form_frame)
+        maximum_temperature_entry.grid(row=6, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Young's Modulus (GPa):").grid(row=7, column=0, sticky="e", padx=5, pady=5)
+        young_modulus_entry = ttk.Entry(form_frame)
+        young_modulus_entry.grid(row=7, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Thermal Capacity (J/kgK):").grid(row=8, column=0, sticky="e", padx=5, pady=5)
+        thermal_capacity_entry = ttk.Entry(form_frame)
+        thermal_capacity_entry.grid(row=8, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Yield Tensile Strength (MPa):").grid(row=9, column=0, sticky="e", padx=5, pady=5)
+        tensile_strength_entry = ttk.Entry(form_frame)
+        tensile_strength_entry.grid(row=9, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Max Elongation (%):").grid(row=10, column=0, sticky="e", padx=5, pady=5)
+        ductility_entry = ttk.Entry(form_frame)
+        ductility_entry.grid(row=10, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Recycle Fraction (%):").grid(row=11, column=0, sticky="e", padx=5, pady=5)
+        recycle_fraction_entry = ttk.Entry(form_frame)
+        recycle_fraction_entry.grid(row=11, column=1, sticky="ew", padx=5, pady=5)
+
+        ttk.Label(form_frame, text="Type:").grid(row=5, column=0, sticky="e", padx=5, pady=5)
+        type_combobox = ttk.Combobox(form_frame, values=material_types, state="readonly")
+        type_combobox.set("Select Type")
+        type_combobox.grid(row=5, column=1, sticky="ew", padx=5, pady=5)
+
+        # Add, update and delete buttons
+        button_frame = ttk.Frame(form_frame)
+        button_frame.grid(row=16, column=0, columnspan=2, pady=20)
+        add_button = ttk.Button(button_frame, text="Add Material", command=add_material)
+        add_button.grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="Update Material", command=update_material).grid(row=0, column=1, padx=5)
+        ttk.Button(button_frame, text="Delete Material", command=delete_material).grid(row=0, column=2, padx=5)
+        ttk.Button(button_frame, text="Bulk Import...", command=bulk_import).grid(row=0, column=3, padx=5)
+
+    tab_builders = {str(compare_frame): build_compare_tab, str(database_frame): build_database_tab}
+
+    def build_selected_tab(event):
+        builder = tab_builders.pop(notebook.select(), None)
+        if builder is not None:
+            builder()
+
+    notebook.bind("<<NotebookTabChanged>>", build_selected_tab, add="+")
+
+    # Live reload: rows other programs append to the CSV are parsed on the
+    # watcher thread and merged in here; any other outside change swaps in a
+    # freshly loaded table with this session's journal replayed on top
+    database_watcher = DatabaseWatcher(filename, materials_journal.base_sha256, watch_interval)
+
+    def apply_database_change(event):
+        global materials, query_engine, similar_search, database_status
+        if event["kind"] == "append":
+            if event["base_sha256"] != materials_journal.base_sha256:
+                database_watcher.request_reload()  # the CSV moved on under us; start over
+                return
+            materials_journal.rebase(event["sha256"], event["report"].size)
+            materials_journal.skipped_rows += event["report"].bad_row_count
+            with table_lock:
+                materials.append_table(event["table"])
+            message = f"{len(event['table'])} material(s) appended to {filename}"
+        else:
+            if event["sha256"] == materials_journal.base_sha256:
+                return  # our own journal compaction
+            table = event["table"]
+            materials_journal.rebase(event["sha256"], event["report"].size)
+            materials_journal.skipped_rows = event["report"].bad_row_count
+            materials_journal.replay(table)
+            materials = table
+            query_engine = QueryEngine(materials, histogram_edges=slider_histogram_edges())
+            if similar_search is not None and materials.find(similar_search["to"]) is None:
+                similar_search = None
+            message = f"{filename} changed on disk, reloaded {len(materials)} materials"
+        if event["report"].bad_row_count:
+            message += f" ({event['report'].bad_row_count} unreadable row(s) skipped)"
+        for material_type in materials.present_types():
+            if material_type not in material_vars:
+                add_type_checkbox(material_type)
+        database_status = message
+        update_results()
+        if database_listener is not None:
+            database_listener()
+
+    def apply_database_changes():
+        for event in database_watcher.events():
+            try:
+                apply_database_change(event)
+            except OSError as e:
+                messagebox.showerror("Save Error", f"Could not update the journal after a reload: {e}")
+
+    def poll_database():
+        apply_database_changes()
+        window.after(250, poll_database)
+
+    if watch_interval:
+        window.after(250, poll_database)
+
+    # Fold the journal into the CSV, after taking in anything appended by others
+    # so the rewrite does not drop it. Looking for those changes can mean
+    # reloading the whole CSV, so the watcher's check runs on a worker thread;
+    # its events are applied and the CSV rewritten back on the Tk thread.
+    # done() is called afterwards, whether or not the compaction succeeded.
+    compaction = {"worker": None, "error": None, "callbacks": []}
+
+    def compact_journal(done=None):
+        if done is not None:
+            compaction["callbacks"].append(done)
+        if compaction["worker"] is None:
+            start_compaction_check()
+
+    def start_compaction_check():
+        def check():
+            try:
+                database_watcher.check()
+            except (OSError, ValueError) as e:
+                compaction["error"] = e
+
+        compaction["error"] = None
+        compaction["worker"] = threading.Thread(target=check, name="compaction-check", daemon=True)
+        compaction["worker"].start()
+        window.after(50, finish_compaction)
+
+    def finish_compaction():
+        if compaction["worker"].is_alive():
+            window.after(50, finish_compaction)
+            return
+        try:
+            if compaction["error"] is not None:
+                raise compaction["error"]
+            apply_database_changes()
+            if not database_watcher.is_current():
+                start_compaction_check()  # changed again meanwhile (or needs a full reload): look once more
+                return
+            materials_journal.compact(materials)
+            database_watcher.synced(materials_journal.base_sha256)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+        compaction["worker"] = None
+        callbacks, compaction["callbacks"] = compaction["callbacks"], []
+        for callback in callbacks:
+            callback()
+
+    # Fold outstanding journal entries into the CSV on a clean exit. Without
+    # any, rows appended during the session go into the binary cache instead,
+    # so the next start does not parse the CSV again.
+    def on_close():
+        if compaction["callbacks"]:
+            return  # already closing once the compaction is done
+        database_watcher.stop()
+        apply_database_changes()
+        if materials_journal.entry_count:
+            if materials_journal.can_compact():
+                status_label.config(text=f"Saving {filename}...")
+                compact_journal(window.destroy)
+                return
+            # otherwise the journal is replayed on the next start
+        elif database_watcher.appends and database_watcher.is_current():
+            try:
+                write_cache(filename, materials, materials_journal.base_sha256)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Save Error", f"An error occurred while saving: {e}")
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+
+    # --startup-profile: report once the first frame is drawn, time the deferred tabs, then quit
+    def finish_profile():
+        startup_profile.mark("draw first frame")
+        for name, frame in (("Compare", compare_frame), ("Material Database Management", database_frame)):
+            builder = tab_builders.pop(str(frame), None)
+            if builder is not None:
+                with startup_profile.timed(f"build {name} tab"):
+                    builder()
+        print(startup_profile.report())
+        window.destroy()
+
+    if profile:
+        window.after_idle(finish_profile)
+
+    # Start the GUI event loop
+    window.mainloop()
+
+    
+
+# Run the GUI
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Material Selection Tool")
+    parser.add_argument("--cache-report", action="store_true",
+                        help="time a cold (CSV parse) and a warm (binary cache) database load, then exit")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long imports and each start-up phase take, then exit")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL,
+                        help="seconds between checks of the CSV for changes by other programs, 0 to disable "
+                             "(default %(default)g)")
+    parser.add_argument("--callback-budget", type=float, default=CALLBACK_BUDGET * 1000,
+                        help="log GUI callbacks that take longer than this many milliseconds (default %(default)g)")
+    subparsers = parser.add_subparsers(dest="command")
+    query_parser = subparsers.add_parser("query", help="run selection queries from a JSON/YAML spec without the GUI")
+    add_query_arguments(query_parser)
+    serve_parser = subparsers.add_parser("serve", help="answer selection queries over HTTP/JSON on localhost")
+    add_serve_arguments(serve_parser)
+    args = parser.parse_args()
+    startup_profile.mark("parse arguments")
+    if args.command == "query":
+        sys.exit(run_query_command(args))
+    elif args.command == "serve":
+        sys.exit(run_serve_command(args))
+    elif args.cache_report:
+        print_cache_report(DATABASE_FILE)
+    else:
+        create_gui(profile=args.startup_profile, callback_budget=args.callback_budget / 1000,
+                   watch_interval=args.watch_interval)
\ No newline at end of file
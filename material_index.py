@@ -0,0 +1,125 @@
+import ast
+import functools
+
+import numpy as np
+
+
+# Short names for the property columns in index expressions, e.g.
+# "young_modulus^(1/2)/density". The full column names cannot appear in an
+# expression because of their unit suffixes.
+PROPERTY_ALIASES = {
+    "density": "density_(kg/m^3)",
+    "rho": "density_(kg/m^3)",
+    "UTS": "UTS_(MPa)",
+    "strength": "UTS_(MPa)",
+    "cost": "cost_per_kg_($)",
+    "conductivity": "thermal_conductivity_(W/mK)",
+    "max_temperature": "maximum_temperature_(C)",
+    "young_modulus": "young_modulus_(GPa)",
+    "E": "young_modulus_(GPa)",
+    "thermal_capacity": "thermal_capacity_(J/kgK)",
+    "yield_strength": "tensile_strength_yield_(MPa)",
+    "elongation": "Elongation_(%)",
+    "recycle_fraction": "recycle_fraction_(%)",
+}
+
+INDEX_FUNCTIONS = {
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "abs": np.abs,
+}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.UAdd, ast.USub)
+
+
+class _NumbersToScalars(ast.NodeTransformer):
+    def __init__(self):
+        self.constants = {}
+
+    def visit_Constant(self, node):
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = np.float64(node.value)
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+
+# A material index compiled from an expression over property columns.
+# The expression is checked against a small grammar (numbers, property
+# aliases, + - * / ^ and INDEX_FUNCTIONS) and then compiled to one Python code
+# object that evaluates on whole numpy columns at once.
+class MaterialIndex:
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        if not self.expression:
+            raise ValueError("The material index is empty")
+        try:
+            tree = ast.parse(self.expression.replace("^", "**"), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Cannot read material index {self.expression!r}: {e.msg}")
+        self.properties = []
+        self._check(tree.body)
+        # Numbers become numpy scalars, so 1/0 or 10^400 give inf like column math does
+        numbers = _NumbersToScalars()
+        tree = ast.fix_missing_locations(numbers.visit(tree))
+        self._constants = numbers.constants
+        self._code = compile(tree, "<material index>", "eval")
+
+    def _check(self, node):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _OPERATORS):
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _OPERATORS):
+            self._check(node.operand)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            pass
+        elif isinstance(node, ast.Name) and node.id in PROPERTY_ALIASES:
+            if PROPERTY_ALIASES[node.id] not in self.properties:
+                self.properties.append(PROPERTY_ALIASES[node.id])
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in INDEX_FUNCTIONS
+              and len(node.args) == 1 and not node.keywords):
+            self._check(node.args[0])
+        elif isinstance(node, ast.Name):
+            known = ", ".join(sorted(PROPERTY_ALIASES))
+            raise ValueError(f"Unknown property {node.id!r} in material index; use one of {known}")
+        else:
+            raise ValueError(f"Material indices only allow numbers, properties, + - * / ^ and "
+                             f"{', '.join(INDEX_FUNCTIONS)}(); not {ast.unparse(node)!r}")
+
+    # Index values of the rows `indices` (all rows when None); NaN where undefined
+    def evaluate(self, table, indices=None):
+        namespace = {"__builtins__": {}}
+        namespace.update(INDEX_FUNCTIONS)
+        namespace.update(self._constants)
+        for alias, prop in PROPERTY_ALIASES.items():
+            if prop in self.properties:
+                column = table.columns[prop]
+                namespace[alias] = column if indices is None else column[indices]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            values = eval(self._code, namespace)
+        size = len(table) if indices is None else len(indices)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (size,))
+        return np.where(np.isfinite(values), values, np.nan)
+
+
+# Parsed indices are reused, so a refresh never re-parses the expression
+@functools.lru_cache(maxsize=64)
+def compile_index(expression):
+    return MaterialIndex(expression)
+
+
+# Order indices by a material index; with k, only the best k are selected
+# (argpartition, O(n)) and sorted. Rows where the index is undefined go last,
+# and are left out entirely when k is given.
+def rank_by_index(table, indices, material_index, descending=True, k=None):
+    indices = np.asarray(indices, dtype=np.intp)
+    values = material_index.evaluate(table, indices)
+    keys = -values if descending else values
+    if k is not None:
+        defined = np.flatnonzero(~np.isnan(keys))
+        if k < len(defined):
+            defined = defined[np.argpartition(keys[defined], k)[:k]] if k else defined[:0]
+        order = defined[np.argsort(keys[defined], kind="stable")]
+    else:
+        order = np.argsort(keys, kind="stable")  # NaN sorts last
+    return indices[order]
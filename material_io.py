@@ -0,0 +1,877 @@
+import collections
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from material_table import (MaterialTable, MATERIAL_SCHEMA, MATERIAL_TYPES, NAME_COLUMN, TYPE_COLUMN, VALIDATION_RULES,
+                            normalize_name, range_violations)
+from perf import perf_recorder
+
+
+DATABASE_FILE = 'materials_data.csv'
+CACHE_FORMAT = 3
+CHUNK_ROWS = 65536  # rows parsed per bulk conversion
+MAX_REPORTED_ROWS = 1000  # bad rows kept with details; the rest are only counted
+WATCH_INTERVAL = 2.0  # seconds between checks of the CSV for changes made by other programs
+
+
+# Outcome of loading a CSV: how many rows were read and which ones were skipped
+class LoadReport:
+    def __init__(self, filename, max_reported=MAX_REPORTED_ROWS):
+        self.filename = filename
+        self.max_reported = max_reported
+        self.rows_loaded = 0
+        self.bad_rows = []  # (line_number, column, value, message, name)
+        self.bad_row_count = 0
+        self.extra_columns = []
+        self.from_cache = False
+        self.sha256 = None
+        self.size = None  # bytes of the file that sha256 covers
+
+    def add_bad_row(self, line_number, column, value, message, name=""):
+        self.bad_row_count += 1
+        if self.max_reported is None or len(self.bad_rows) < self.max_reported:
+            self.bad_rows.append((line_number, column, value, message, name))
+
+    def summary(self, limit=10):
+        lines = [f"{self.bad_row_count} row(s) in {self.filename} could not be read and were skipped:"]
+        for line_number, column, value, message, name in self.bad_rows[:limit]:
+            lines.append(f"  line {line_number}" + (f" ({name})" if name else "") + f": {message}")
+        if self.bad_row_count > limit:
+            lines.append(f"  ... and {self.bad_row_count - limit} more")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "rows_loaded": self.rows_loaded,
+            "bad_rows": self.bad_rows,
+            "bad_row_count": self.bad_row_count,
+            "extra_columns": self.extra_columns,
+        }
+
+    @classmethod
+    def from_dict(cls, filename, data):
+        report = cls(filename)
+        report.rows_loaded = data["rows_loaded"]
+        report.bad_rows = [tuple(row) for row in data["bad_rows"]]
+        report.bad_row_count = data["bad_row_count"]
+        report.extra_columns = data["extra_columns"]
+        return report
+
+
+# Preallocated array that doubles its capacity as chunks are appended
+class _GrowableArray:
+    def __init__(self, dtype, width=None, capacity=CHUNK_ROWS):
+        shape = (capacity,) if width is None else (capacity, width)
+        self.data = np.empty(shape, dtype=dtype)
+        self.size = 0
+
+    def extend(self, block):
+        end = self.size + len(block)
+        if end > len(self.data):
+            grown = np.empty((max(end, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = block
+        self.size = end
+
+    def array(self):
+        return self.data[:self.size]
+
+
+# Raw file reader that keeps a byte count and running SHA-256 of what was read
+class _HashingReader(io.RawIOBase):
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+        self.digest = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+            self.bytes_read += count
+        return count
+
+
+# Builds a MaterialTable from rows of text fields laid out as in `header`.
+# Each numeric column of a batch of rows is converted in one bulk call into
+# growable arrays; rows that cannot be parsed are recorded in the report and
+# left out. Columns that are not in MATERIAL_SCHEMA are kept as text.
+class _TableBuilder:
+    def __init__(self, header, report, source):
+        missing = [column for column, kind in MATERIAL_SCHEMA if column not in header]
+        if missing:
+            raise ValueError(f"Missing column(s) in {source}: {', '.join(missing)}")
+        self.header = header
+        self.report = report
+        self.positions = {column: header.index(column) for column in header}
+        self.properties = [column for column, kind in MATERIAL_SCHEMA if kind == "number"]
+        self.extra_names = [column for column in header if column not in dict(MATERIAL_SCHEMA)]
+        report.extra_columns = self.extra_names
+        self.names = _GrowableArray(object)
+        self.values = _GrowableArray(np.float64, len(self.properties))
+        self.type_codes = _GrowableArray(np.int16)
+        self.extras = {column: _GrowableArray(object) for column in self.extra_names}
+        self.type_lookup = {}
+        self.labels = _GrowableArray(np.int64)  # line number (or position) of every kept row
+
+    def add_rows(self, rows, line_numbers):
+        header, positions = self.header, self.positions
+        bad_rows = []  # (line number, column, value, message, name), reported in line order at the end
+        widths = np.fromiter(map(len, rows), dtype=np.intp, count=len(rows))
+        if (widths != len(header)).any():
+            name_position = positions[NAME_COLUMN]
+            for i in np.flatnonzero((widths != len(header)) & (widths > 0)):  # empty rows are blank lines
+                name = rows[i][name_position] if widths[i] > name_position else ""
+                bad_rows.append((int(line_numbers[i]), None, "", f"expected {len(header)} fields, found {widths[i]}", name))
+            well_formed = widths == len(header)
+            rows = [row for row, ok in zip(rows, well_formed) if ok]
+            line_numbers = line_numbers[well_formed]
+            if not rows:
+                self._report_bad_rows(bad_rows)
+                return
+
+        fields = list(zip(*rows))
+        block = np.empty((len(rows), len(self.properties)), dtype=np.float64)
+        good = np.ones(len(rows), dtype=bool)
+        for j, prop in enumerate(self.properties):
+            strings = fields[positions[prop]]
+            try:
+                block[:, j] = np.array(strings, dtype=np.float64)
+            except ValueError:
+                # Fall back to one value at a time to find the offending rows
+                for i, text in enumerate(strings):
+                    try:
+                        block[i, j] = float(text)
+                    except ValueError:
+                        if good[i]:
+                            bad_rows.append((int(line_numbers[i]), prop, text, f"{prop} is not a number: {text!r}",
+                                             fields[positions[NAME_COLUMN]][i]))
+                        good[i] = False
+        self._report_bad_rows(bad_rows)
+
+        keep = np.flatnonzero(good) if not good.all() else slice(None)
+        type_lookup = self.type_lookup
+        codes = np.array([type_lookup.setdefault(text, len(type_lookup)) for text in fields[positions[TYPE_COLUMN]]],
+                         dtype=np.int16)
+        self.names.extend(np.array(fields[positions[NAME_COLUMN]], dtype=object)[keep])
+        self.values.extend(block[keep])
+        self.type_codes.extend(codes[keep])
+        self.labels.extend(np.asarray(line_numbers)[keep])
+        for column, array in self.extras.items():
+            array.extend(np.array(fields[positions[column]], dtype=object)[keep])
+
+    def _report_bad_rows(self, bad_rows):
+        for bad_row in sorted(bad_rows, key=lambda bad_row: bad_row[0]):
+            self.report.add_bad_row(*bad_row)
+
+    def table(self):
+        self.report.rows_loaded = self.names.size
+        # Types seen only on skipped rows keep their code but never match anything
+        return MaterialTable(self.names.array().copy(), self.values.array(), self.type_codes.array().copy(),
+                             list(self.type_lookup), self.properties,
+                             {column: array.array().copy() for column, array in self.extras.items()})
+
+
+# Stream the materials CSV into a MaterialTable following MATERIAL_SCHEMA.
+# The file is read chunk_rows rows at a time, so memory beyond the table itself
+# stays bounded. Rows that cannot be parsed are skipped and recorded with
+# their line number in the returned LoadReport; columns that are not in the
+# schema are kept as text. progress(bytes_read, total_bytes) is called after
+# every chunk. Raises FileNotFoundError for a missing file and ValueError when
+# required columns are missing.
+def read_material_csv(filename, progress=None, chunk_rows=CHUNK_ROWS, with_line_numbers=False, report=None):
+    report = report if report is not None else LoadReport(filename)
+    total_bytes = os.path.getsize(filename)
+    with open(filename, mode='rb') as file:
+        raw = _HashingReader(file)
+        text = io.TextIOWrapper(io.BufferedReader(raw, 1 << 20), encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{filename} is empty")
+        builder = _TableBuilder([column.strip() for column in header], report, filename)
+        _read_rows(reader, builder, chunk_rows,
+                   progress=None if progress is None else lambda: progress(raw.bytes_read, total_bytes))
+
+    report.sha256 = raw.digest.hexdigest()
+    report.size = raw.bytes_read
+    table = builder.table()
+    if with_line_numbers:
+        return table, report, builder.labels.array().copy()
+    return table, report
+
+
+# Feed every row of a csv.reader to a _TableBuilder, chunk_rows at a time.
+# line_offset is added to the reader's own line numbers (lines before the text it reads).
+def _read_rows(reader, builder, chunk_rows=CHUNK_ROWS, line_offset=0, progress=None):
+    while True:
+        # Line numbers are exact unless a quoted field spans several lines,
+        # in which case later rows of that chunk are counted per record
+        first_line = line_offset + reader.line_num + 1
+        rows = list(itertools.islice(reader, chunk_rows))
+        if not rows:
+            break
+        builder.add_rows(rows, np.arange(first_line, first_line + len(rows)))
+        if progress is not None:
+            progress()
+
+
+# Parse rows appended to a materials CSV: `data` holds the new bytes (whole
+# lines) and line_offset the number of lines before them. The file's own
+# header gives the column layout. Returns (table, LoadReport) for the new rows.
+def read_appended_rows(filename, data, line_offset, report=None):
+    report = report if report is not None else LoadReport(filename)
+    with open(filename, mode='r', encoding='utf-8-sig', newline='') as file:
+        header = next(csv.reader(file), None)
+    if header is None:
+        raise ValueError(f"{filename} is empty")
+    builder = _TableBuilder([column.strip() for column in header], report, filename)
+    _read_rows(csv.reader(io.StringIO(data.decode('utf-8'), newline='')), builder, line_offset=line_offset)
+    return builder.table(), report
+
+
+# Directory holding the binary cache that belongs to a CSV file
+def cache_directory(filename):
+    return filename + ".cache"
+
+
+# SHA-256 of a file, read in 1 MB blocks
+def file_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Write the parsed table next to the CSV as .npy files plus a meta.json.
+# meta.json is written last, so a half-written cache is never picked up.
+def write_cache(filename, table, content_hash=None, report=None):
+    directory = cache_directory(filename)
+    os.makedirs(directory, exist_ok=True)
+    stat = os.stat(filename)
+    meta = {
+        "format": CACHE_FORMAT,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": content_hash or file_hash(filename),
+        "rows": len(table),
+        "properties": table.properties,
+        "type_names": table.type_names,
+        "extra_columns": list(table.extra_columns),
+        "load_report": report.to_dict() if report is not None else None,
+    }
+    arrays = {
+        "values": np.asfortranarray(table.values),
+        "type_codes": table.type_codes,
+        "names": np.asarray(table.names, dtype=str),
+    }
+    for i, values in enumerate(table.extra_columns.values()):
+        arrays[f"extra_{i}"] = np.asarray(values, dtype=str)
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for name, array in arrays.items():
+        temp_path = os.path.join(directory, name + ".tmp.npy")
+        np.save(temp_path, array)
+        os.replace(temp_path, os.path.join(directory, name + ".npy"))
+    with open(meta_path + ".tmp", mode='w') as file:
+        json.dump(meta, file)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+# Memory-map a cached table, or return None if the cache is missing or stale.
+# Size and mtime decide on the fast path; when only the mtime differs the
+# content hash settles it, so touching the CSV does not force a rebuild.
+# Returns (table, report), the report being the one from the original parse.
+def read_cache(filename):
+    directory = cache_directory(filename)
+    meta_path = os.path.join(directory, "meta.json")
+    try:
+        with open(meta_path, mode='r') as file:
+            meta = json.load(file)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != CACHE_FORMAT or meta["size"] != stat.st_size:
+        return None
+    if meta["mtime_ns"] != stat.st_mtime_ns:
+        if meta["sha256"] != file_hash(filename):
+            return None
+        meta["mtime_ns"] = stat.st_mtime_ns
+        try:
+            with open(meta_path + ".tmp", mode='w') as file:
+                json.dump(meta, file)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError:
+            pass
+    try:
+        values = np.load(os.path.join(directory, "values.npy"), mmap_mode='r')
+        type_codes = np.load(os.path.join(directory, "type_codes.npy"), mmap_mode='r')
+        names = np.load(os.path.join(directory, "names.npy"), mmap_mode='r')
+        extra_columns = {column: np.load(os.path.join(directory, f"extra_{i}.npy"), mmap_mode='r')
+                         for i, column in enumerate(meta["extra_columns"])}
+    except (OSError, ValueError):
+        return None
+    if len(names) != meta["rows"]:
+        return None
+    table = MaterialTable(names, values, type_codes, meta["type_names"], meta["properties"], extra_columns)
+    report = LoadReport(filename)
+    if meta["load_report"] is not None:
+        report = LoadReport.from_dict(filename, meta["load_report"])
+    report.rows_loaded = len(table)
+    report.from_cache = True
+    report.sha256 = meta["sha256"]
+    report.size = meta["size"]
+    return table, report
+
+
+# Load the materials database, going through the binary cache when it is current.
+# A missing or stale cache is rebuilt from the CSV transparently.
+# Returns (table, LoadReport); progress is only called when the CSV is parsed.
+def load_table(filename, use_cache=True, progress=None):
+    if use_cache:
+        cached = read_cache(filename)
+        if cached is not None:
+            return cached
+    table, report = read_material_csv(filename, progress)
+    if use_cache:
+        try:
+            write_cache(filename, table, report.sha256, report)
+        except OSError:
+            pass  # read-only install directory; run without a cache
+    return table, report
+
+
+# Load the database and replay its change journal on top.
+# Returns (table, LoadReport, MaterialJournal). Only the program that records
+# changes (the GUI) opens the journal with read_only=False; everyone else
+# replays it without ever writing to it, see MaterialJournal.replay.
+def open_database(filename=DATABASE_FILE, progress=None, use_cache=True, read_only=True):
+    with perf_recorder.span("load"):
+        table, report = load_table(filename, use_cache, progress)
+        journal = MaterialJournal(filename, report.sha256, report.size, read_only=read_only,
+                                  skipped_rows=report.bad_row_count)
+        journal.replay(table)
+    return table, report, journal
+
+
+# Time a cold start (CSV parse plus cache build) against warm starts from the cache
+def cache_timing_report(filename, repeats=5):
+    meta_path = os.path.join(cache_directory(filename), "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    start = time.perf_counter()
+    table, report = read_material_csv(filename)
+    parse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    write_cache(filename, table, report.sha256, report)
+    build_time = time.perf_counter() - start
+
+    warm_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        warm = read_cache(filename)
+        warm_times.append(time.perf_counter() - start)
+    if warm is None:
+        raise RuntimeError(f"Cache for {filename} could not be read back")
+    return {
+        "rows": len(table),
+        "csv_bytes": os.path.getsize(filename),
+        "cold_parse_s": parse_time,
+        "cold_cache_build_s": build_time,
+        "cold_total_s": parse_time + build_time,
+        "warm_best_s": min(warm_times),
+        "warm_mean_s": sum(warm_times) / len(warm_times),
+        "speedup": parse_time / min(warm_times) if min(warm_times) else float("inf"),
+    }
+
+
+def print_cache_report(filename, repeats=5):
+    report = cache_timing_report(filename, repeats)
+    print(f"Startup timing for {filename} ({report['rows']} rows, {report['csv_bytes']} bytes)")
+    print(f"  cold: CSV parse       {report['cold_parse_s'] * 1000:10.2f} ms")
+    print(f"  cold: cache build     {report['cold_cache_build_s'] * 1000:10.2f} ms")
+    print(f"  warm: cache mmap best {report['warm_best_s'] * 1000:10.2f} ms (mean {report['warm_mean_s'] * 1000:.2f} ms over {repeats})")
+    print(f"  speedup (parse / warm): {report['speedup']:.1f}x")
+    return report
+
+
+# Write a table to CSV atomically: a temporary file in the same directory is
+# written and fsynced, then renamed over the target. Returns the SHA-256 and
+# size of the new file's contents.
+def write_material_csv(filename, table):
+    temp_path, sha256, size = _write_temp_csv(filename, table)
+    os.replace(temp_path, filename)
+    return sha256, size
+
+
+# First half of write_material_csv: returns (temporary path, SHA-256, size)
+def _write_temp_csv(filename, table):
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_path = os.path.join(directory, os.path.basename(filename) + ".tmp")
+    digest = hashlib.sha256()
+    with open(temp_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=table.csv_columns())
+        writer.writeheader()
+        writer.writerows(table.records())
+        file.flush()
+        os.fsync(file.fileno())
+    size = 0
+    with open(temp_path, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return temp_path, digest.hexdigest(), size
+
+
+# True when the first `size` bytes of a file hash to sha256 and end a line:
+# the file is that content with whole lines appended
+def _grew_from(filename, sha256, size):
+    digest = hashlib.sha256()
+    last = b"\n"
+    try:
+        with open(filename, mode='rb') as file:
+            remaining = size
+            while remaining:
+                block = file.read(min(1 << 20, remaining))
+                if not block:
+                    return False
+                digest.update(block)
+                last = block[-1:]
+                remaining -= len(block)
+    except OSError:
+        return False
+    return digest.hexdigest() == sha256 and last == b"\n"
+
+
+# Append-only change log kept next to the CSV (<csv>.journal, JSON lines).
+# Adds, edits and deletes cost one fsynced append instead of a rewrite of the
+# whole CSV; the journal is replayed on load and folded back into the CSV by
+# compact(). The first line names the SHA-256 and size of the CSV the journal
+# applies to. Before compaction replaces the CSV it appends a "compacted"
+# entry naming the new file, so a journal left behind by an interrupted
+# compaction is recognised as already applied.
+# Only the program that records changes opens the journal for writing; a
+# read-only journal is replayed but never changed, truncated or moved.
+class MaterialJournal:
+    def __init__(self, filename, base_sha256, base_size=None, compact_after=1000, read_only=False, skipped_rows=0):
+        self.filename = filename
+        self.path = filename + ".journal"
+        self.base_sha256 = base_sha256
+        self.base_size = base_size
+        self.compact_after = compact_after
+        self.read_only = read_only
+        # Rows of the CSV the loader could not read. Compaction rewrites the CSV
+        # from the table and would drop them, so it waits until they are fixed.
+        self.skipped_rows = skipped_rows
+        self.entry_count = 0
+        self.orphaned = None  # where a journal that did not fit the CSV was moved to
+
+    # Apply the journal to a freshly loaded table; returns the number of entries replayed.
+    # When the CSV only had rows appended since the journal was started (another
+    # program adding to a shared catalog) the entries still apply, on top of the
+    # new rows. A journal that does not fit the CSV at all is left out: the
+    # writer moves it aside to <journal>.orphaned and warns, it is never deleted.
+    def replay(self, table):
+        try:
+            with open(self.path, mode='r', encoding='utf-8', newline='') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return 0
+        entries = []
+        valid_bytes = 0
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Torn write from a crash, or for a reader an append in progress:
+                # keep everything before it. The writer cuts it off so later
+                # appends start on a fresh line.
+                if not self.read_only:
+                    with open(self.path, mode='r+b') as file:
+                        file.truncate(valid_bytes)
+                break
+            valid_bytes += len(line.encode('utf-8'))
+        if not entries:
+            if not self.read_only:
+                os.remove(self.path)  # nothing but a torn first line, now cut off
+            return 0
+        base = entries[0]
+        if base.get("op") != "base":
+            self._set_aside("it does not start with a base entry")
+            return 0
+        if base.get("sha256") != self.base_sha256:
+            compacted = [entry for entry in entries if entry.get("op") == "compacted"]
+            if compacted and self._csv_grew_from(compacted[-1].get("sha256"), compacted[-1].get("size")):
+                if not self.read_only:
+                    os.remove(self.path)  # the compaction got as far as replacing the CSV
+                return 0
+            if not self._csv_grew_from(base.get("sha256"), base.get("size")):
+                self._set_aside("it was written for a different version of the file")
+                return 0
+            if not self.read_only:
+                self.rebase(self.base_sha256, self.base_size)
+
+        pending_adds = []
+        for entry in entries[1:]:
+            if entry["op"] == "add":
+                pending_adds.append(entry["record"])
+                continue
+            if pending_adds:
+                table.append_records(pending_adds)
+                pending_adds = []
+            if entry["op"] == "compacted":
+                continue  # the compaction stopped before replacing the CSV
+            index = table.find(entry["name"])
+            if index is None:
+                continue
+            if entry["op"] == "edit":
+                table.update_record(index, entry["record"])
+            elif entry["op"] == "delete":
+                table.delete_rows([index])
+        if pending_adds:
+            table.append_records(pending_adds)
+        self.entry_count = len(entries) - 1
+        return self.entry_count
+
+    def add(self, records):
+        self._append([{"op": "add", "record": record} for record in records])
+
+    def edit(self, name, record):
+        self._append([{"op": "edit", "name": name, "record": record}])
+
+    def delete(self, name):
+        self._append([{"op": "delete", "name": name}])
+
+    # Add many rows with a single write: one journal append while the journal is
+    # small, otherwise straight into a compacted CSV. compact=False always
+    # appends to the journal and leaves compacting to the caller (the GUI
+    # compacts through the live-reload watcher, see main.compact_journal).
+    def add_table(self, table, added, compact=True):
+        if not compact or not self.can_compact() or self.entry_count + len(added) < self.compact_after:
+            self.add(list(added.records()))
+            table.append_table(added)
+            return
+        new_rows = table.append_table(added)
+        try:
+            self.compact(table)
+        except OSError:
+            table.delete_rows(new_rows)
+            raise
+
+    # Point the journal at a new version of the CSV (rows appended by another
+    # program, or an outside rewrite) so its entries keep applying on top of it
+    def rebase(self, sha256, size=None):
+        self._check_writable()
+        self.base_sha256 = sha256
+        self.base_size = size
+        try:
+            with open(self.path, mode='r', encoding='utf-8', newline='') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        lines[0] = self._base_line()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, mode='w', encoding='utf-8', newline='') as file:
+            file.write("".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+    # False while the CSV has rows that could not be read (see skipped_rows)
+    def can_compact(self):
+        return not self.skipped_rows
+
+    def needs_compaction(self):
+        return self.entry_count >= self.compact_after and self.can_compact()
+
+    # Fold the journal into the CSV: atomic rewrite, then drop the journal and refresh the cache
+    def compact(self, table):
+        self._check_writable()
+        if not self.can_compact():
+            raise ValueError(f"{self.filename} has {self.skipped_rows} row(s) that could not be read and rewriting "
+                             f"it would drop them; fix or remove them first. Changes are kept in {self.path}.")
+        with perf_recorder.span("save"):
+            temp_path, sha256, size = _write_temp_csv(self.filename, table)
+            if os.path.exists(self.path):
+                self._append([{"op": "compacted", "sha256": sha256, "size": size}])
+            os.replace(temp_path, self.filename)
+        self.base_sha256, self.base_size = sha256, size
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entry_count = 0
+        try:
+            write_cache(self.filename, table, self.base_sha256)
+        except OSError:
+            pass
+
+    def _append(self, entries):
+        self._check_writable()
+        lines = [json.dumps(entry) + "\n" for entry in entries]
+        if not os.path.exists(self.path):
+            lines.insert(0, self._base_line())
+        with perf_recorder.span("save"), open(self.path, mode='a', encoding='utf-8') as file:
+            file.write("".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        self.entry_count += len(entries)
+
+    def _base_line(self):
+        return json.dumps({"op": "base", "sha256": self.base_sha256, "size": self.base_size}) + "\n"
+
+    # True when the loaded CSV is the file described by (sha256, size), or that file with rows appended
+    def _csv_grew_from(self, sha256, size):
+        if sha256 == self.base_sha256:
+            return True
+        if sha256 is None or size is None or self.base_size is None or size >= self.base_size:
+            return False
+        return _grew_from(self.filename, sha256, size)
+
+    # Keep a journal that does not fit the CSV out of the way without losing it
+    def _set_aside(self, reason):
+        if self.read_only:
+            print(f"ignoring {self.path}: {reason}", file=sys.stderr)
+            return
+        target = self.path + ".orphaned"
+        number = 1
+        while os.path.exists(target):
+            target = f"{self.path}.orphaned.{number}"
+            number += 1
+        os.replace(self.path, target)
+        self.orphaned = target
+        print(f"{self.path} was moved to {target}: {reason}", file=sys.stderr)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"{self.path} is open read-only")
+
+
+# Watches the materials CSV for changes made by other programs, polling its
+# size, mtime and inode on a background thread. When the file only grew (the
+# bytes already loaded still hash to the known SHA-256 and the new ones end in
+# a full line) just the new bytes are parsed; any other change reloads the
+# whole CSV. Changes are queued as events for the GUI thread to apply:
+#   {"kind": "append", "base_sha256", "sha256", "table", "report"}
+#   {"kind": "reload", "sha256", "table", "report"}
+# An append applies to the file contents named by base_sha256; when the
+# consumer holds something else it calls request_reload().
+class DatabaseWatcher:
+    def __init__(self, filename, sha256, interval=WATCH_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.sha256 = sha256  # contents as of the last event queued
+        self.appends = 0
+        self.reloads = 0
+        self.state = self._stat()
+        self._reload_requested = False
+        self._events = collections.deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if interval:
+            threading.Thread(target=self._watch, name="database-watcher", daemon=True).start()
+
+    # Look for a change now; queues and returns its event, or returns None
+    def check(self):
+        with self._lock:
+            state = self._stat()
+            if state is None or (state == self.state and not self._reload_requested):
+                return None  # unchanged, or being replaced right now
+            event = None
+            if not self._reload_requested and state[2] == self.state[2] and state[0] > self.state[0]:
+                event = self._read_appended(self.state[0], state[0])
+                if event == "incomplete":
+                    return None  # the writer is not done with its last line yet
+            if event is None:
+                table, report = load_table(self.filename)
+                event = {"kind": "reload", "sha256": report.sha256, "table": table, "report": report}
+                self.reloads += 1
+            else:
+                self.appends += 1
+            self.state = state
+            self.sha256 = event["sha256"]
+            self._reload_requested = False
+            self._events.append(event)
+            return event
+
+    # Queued events, oldest first
+    def events(self):
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    # The next check reloads the whole CSV
+    def request_reload(self):
+        self._reload_requested = True
+
+    # The CSV was written by this program (journal compaction) and holds `sha256`
+    def synced(self, sha256):
+        with self._lock:
+            self.state = self._stat()
+            self.sha256 = sha256
+
+    # True when the CSV still is what the last event described
+    def is_current(self):
+        with self._lock:
+            return not self._events and not self._reload_requested and self._stat() == self.state
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except (OSError, ValueError) as e:
+                print(f"reload of {self.filename} failed, keeping the loaded data: {e}", file=sys.stderr)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    # Append event for the bytes [old_size, size), None when the earlier bytes
+    # changed, or "incomplete" when the last new line is still being written
+    def _read_appended(self, old_size, size):
+        digest = hashlib.sha256()
+        line_count = 0
+        last = b"\n"
+        with open(self.filename, mode='rb') as file:
+            remaining = old_size
+            while remaining:
+                block = file.read(min(1 << 20, remaining))
+                if not block:
+                    return None
+                digest.update(block)
+                line_count += block.count(b"\n")
+                last = block[-1:]
+                remaining -= len(block)
+            if digest.hexdigest() != self.sha256 or last != b"\n":
+                return None
+            data = file.read(size - old_size)
+        if not data.endswith(b"\n"):
+            return "incomplete"
+        base_sha256 = digest.hexdigest()
+        digest.update(data)
+        with perf_recorder.span("load"):
+            table, report = read_appended_rows(self.filename, data, line_count)
+        report.sha256 = digest.hexdigest()
+        report.size = size
+        return {"kind": "append", "base_sha256": base_sha256, "sha256": report.sha256, "table": table, "report": report}
+
+
+# Outcome of a bulk import: the rows that passed and an accept/reject line per input row
+class ImportResult:
+    def __init__(self, source):
+        self.source = source
+        self.accepted = None  # MaterialTable of the accepted rows
+        self.rows = []  # (row, name, status, reason); row is the CSV line or JSON position
+
+    @property
+    def accepted_count(self):
+        return len(self.accepted) if self.accepted is not None else 0
+
+    @property
+    def rejected_count(self):
+        return len(self.rows) - self.accepted_count
+
+    def write_report(self, path):
+        with open(path, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(["row", "name", "status", "reason"])
+            writer.writerows(sorted(self.rows, key=lambda row: row[0]))
+
+
+# Text form of a JSON value for the table builder
+def _json_field(value):
+    if value is None:
+        return ""
+    return str(value)
+
+
+# Read a CSV or JSON file of new materials with the same bulk parser as the database.
+# JSON may be a list of objects or {"materials": [...]}. Returns (table, report,
+# row labels), where the labels are CSV line numbers or 1-based JSON positions.
+def read_import_file(path):
+    report = LoadReport(path, max_reported=None)
+    if not path.lower().endswith(".json"):
+        return read_material_csv(path, with_line_numbers=True, report=report)
+    with open(path, mode='r', encoding='utf-8-sig') as file:
+        data = json.load(file)
+    records = data.get("materials", []) if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        raise ValueError(f"{path} must hold a list of materials")
+    header = [column for column, kind in MATERIAL_SCHEMA]
+    for record in records:
+        if isinstance(record, dict):
+            header.extend(column for column in record if column not in header)
+    builder = _TableBuilder(header, report, path)
+    for start in range(0, len(records), CHUNK_ROWS):
+        chunk = records[start:start + CHUNK_ROWS]
+        rows = [[_json_field(record.get(column)) for column in header] if isinstance(record, dict) else []
+                for record in chunk]
+        for i, record in enumerate(chunk):
+            if not isinstance(record, dict):
+                report.add_bad_row(start + i + 1, None, "", "entry is not an object")
+        builder.add_rows(rows, np.arange(start + 1, start + len(chunk) + 1))
+    return builder.table(), report, builder.labels.array().copy()
+
+
+# Check a file of new materials against the database without changing it.
+# Range rules are applied column-wide (range_violations), names are matched
+# through a hash set of normalized names, and every input row gets an
+# accepted/rejected entry with a reason.
+def prepare_import(table, path, allowed_types=MATERIAL_TYPES):
+    candidates, report, labels = read_import_file(path)
+    result = ImportResult(path)
+    for line_number, column, value, message, name in report.bad_rows:
+        result.rows.append((line_number, name, "rejected", message))
+
+    reasons = np.full(len(candidates), "", dtype=object)
+    messages = np.array([rule[3] for rule in VALIDATION_RULES.values()], dtype=object)
+    failed_rule = range_violations(candidates)
+    rejected = failed_rule >= 0
+    reasons[rejected] = messages[failed_rule[rejected]]
+    wrong_type = ~candidates.type_mask(allowed_types) & ~rejected
+    reasons[wrong_type] = f"type must be one of: {', '.join(allowed_types)}"
+    rejected |= wrong_type
+
+    existing = table.name_index
+    first_seen = {}
+    names = candidates.names
+    for i in range(len(candidates)):
+        key = normalize_name(names[i])
+        if not key:
+            reasons[i] = "name is empty"
+        elif rejected[i]:
+            continue
+        elif existing.find(key) is not None:
+            reasons[i] = "a material with this name already exists"
+        elif key in first_seen:
+            reasons[i] = f"duplicate of row {first_seen[key]}"
+        else:
+            first_seen[key] = int(labels[i])
+            continue
+        rejected[i] = True
+
+    result.accepted = candidates.take(np.flatnonzero(~rejected))
+    for i in range(len(candidates)):
+        result.rows.append((int(labels[i]), str(names[i]), "rejected" if rejected[i] else "accepted", reasons[i]))
+    return result
@@ -0,0 +1,737 @@
+import bisect
+import itertools
+import numbers
+
+import numpy as np
+
+
+# Columns of the materials CSV, in file order
+NAME_COLUMN = "name"
+TYPE_COLUMN = "type"
+NUMERIC_PROPERTIES = [
+    "density_(kg/m^3)", "UTS_(MPa)", "cost_per_kg_($)", "thermal_conductivity_(W/mK)",
+    "maximum_temperature_(C)", "young_modulus_(GPa)", "thermal_capacity_(J/kgK)",
+    "tensile_strength_yield_(MPa)", "Elongation_(%)", "recycle_fraction_(%)"
+]
+# Schema of the materials CSV: (column, kind) with kind "text", "number" or
+# "category". Columns in a file that are not part of the schema are kept as
+# extra text columns and written back unchanged.
+MATERIAL_SCHEMA = [(NAME_COLUMN, "text")] + [(prop, "number") for prop in NUMERIC_PROPERTIES] + [(TYPE_COLUMN, "category")]
+CSV_COLUMNS = [column for column, kind in MATERIAL_SCHEMA]
+
+MATERIAL_TYPES = ["Metals", "Plastics", "Ceramics", "Composites", "Alloys"]
+
+# Name search: how far NameIndex.search widens, narrowest first
+NAME_MATCHES = ("exact", "prefix", "substring", "fuzzy")
+NAME_FUZZY_THRESHOLD = 0.4  # minimum trigram similarity (Dice coefficient) of a fuzzy match
+NAME_VERIFY_CANDIDATES = 256  # substring candidates few enough to check without more postings
+NAME_INDEX_CHUNK = 65536  # names turned into trigrams at once when building the index
+
+# Accepted ranges for new materials: property -> (low, high, low_inclusive, message).
+# The upper bound is always inclusive.
+VALIDATION_RULES = {
+    "density_(kg/m^3)": (0, 25000, False, "Density must be between 0 and 25000 kg/m³"),
+    "UTS_(MPa)": (0, 5000, False, "UTS must be between 0 and 5000 MPa"),
+    "cost_per_kg_($)": (0, 1000, False, "Cost must be between 0 and 1000 $/kg"),
+    "thermal_conductivity_(W/mK)": (0, 1000, True, "Thermal conductivity must be between 0 and 1000 W/mK"),
+    "maximum_temperature_(C)": (0, 5000, True, "Maximum temperature must be between 0 and 5000 C"),
+    "young_modulus_(GPa)": (0, 1500, True, "Young's modulus must be between 0 and 1500 GPa"),
+    "thermal_capacity_(J/kgK)": (0, 10000, True, "Thermal capacity must be between 0 and 10000 J/kgK"),
+    "tensile_strength_yield_(MPa)": (0, 1000, True, "Yield Tensile strength must be between 0 and 1000 MPa"),
+    "Elongation_(%)": (0, 100, True, "Max Elongation must be between 0 and 100 %"),
+    "recycle_fraction_(%)": (0, 100, True, "Recycle fraction must be between 0 and 100 %"),
+}
+
+
+# Key used to compare material names: case and repeated whitespace do not matter
+def normalize_name(name):
+    return " ".join(str(name).split()).casefold()
+
+
+# Raise ValueError with the rule's message if a material is out of range
+def check_material_ranges(material):
+    for prop, (low, high, low_inclusive, message) in VALIDATION_RULES.items():
+        value = material[prop]
+        if not ((low <= value if low_inclusive else low < value) and value <= high):
+            raise ValueError(message)
+
+
+# Vectorized form of check_material_ranges over a whole table.
+# Returns, per row, the index into VALIDATION_RULES of the first rule it
+# breaks, or -1 for rows that pass every rule.
+def range_violations(table):
+    failed_rule = np.full(len(table), -1, dtype=np.int16)
+    for k, (prop, (low, high, low_inclusive, message)) in enumerate(VALIDATION_RULES.items()):
+        column = table.columns[prop]
+        ok = (column >= low) if low_inclusive else (column > low)
+        ok &= column <= high
+        failed_rule[~ok & (failed_rule < 0)] = k
+    return failed_rule
+
+
+# A count in a query spec (limit, k): a whole number that is not a bool, at
+# least 0. Raises ValueError naming the field for anything else.
+def spec_count(value, field):
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, numbers.Real):
+        raise ValueError(f"{field} must be a whole number, not {value!r}")
+    if not isinstance(value, numbers.Integral) and not float(value).is_integer():
+        raise ValueError(f"{field} must be a whole number, not {value!r}")
+    if value < 0:
+        raise ValueError(f"{field} must not be negative")
+    return int(value)
+
+
+_table_tokens = itertools.count()  # MaterialTable.token of each new table
+
+
+# Columnar store of the materials database.
+# Every numeric property is a contiguous float64 column (a view into one
+# Fortran-ordered block), and the material type is kept as small integer
+# codes into type_names, so filters never touch Python objects per row.
+# extra_columns holds any non-schema CSV columns as text arrays.
+class MaterialTable:
+    def __init__(self, names, values, type_codes, type_names, properties=None, extra_columns=None):
+        self.properties = list(properties if properties is not None else NUMERIC_PROPERTIES)
+        self.names = names if isinstance(names, np.ndarray) else np.asarray(names, dtype=object)
+        values = np.asarray(values, dtype=np.float64).reshape(len(self.names), len(self.properties))
+        self.values = np.asfortranarray(values)
+        self.columns = {prop: self.values[:, j] for j, prop in enumerate(self.properties)}
+        self.type_codes = np.asarray(type_codes, dtype=np.int16)
+        self.type_names = list(type_names)
+        self.extra_columns = dict(extra_columns or {})
+        self.version = 0
+        # Never reused, unlike id(): caches key on (token, version) so a reloaded
+        # table cannot pick up entries of one that has been freed
+        self.token = next(_table_tokens)
+        self._name_index = None
+        self._append_lengths = {0: len(self.names)}  # version -> row count, for versions reached by appends alone
+
+    # NameIndex over the names, built on first use and kept current on append
+    @property
+    def name_index(self):
+        if self._name_index is None or len(self._name_index) != len(self):
+            self._name_index = NameIndex(self.names)
+        return self._name_index
+
+    # Build a table from an iterable of per-material dicts (CSV rows, form input, ...)
+    @classmethod
+    def from_records(cls, records, properties=None, extra_names=()):
+        properties = list(properties if properties is not None else NUMERIC_PROPERTIES)
+        records = list(records)
+        extra_columns = {column: np.array([record.get(column, "") for record in records], dtype=object)
+                         for column in extra_names}
+        type_names = []
+        type_lookup = {}
+        type_codes = np.empty(len(records), dtype=np.int16)
+        values = np.empty((len(records), len(properties)), dtype=np.float64, order="F")
+        names = np.empty(len(records), dtype=object)
+        for i, record in enumerate(records):
+            names[i] = record[NAME_COLUMN]
+            values[i] = [float(record[prop]) for prop in properties]
+            material_type = record[TYPE_COLUMN]
+            if material_type not in type_lookup:
+                type_lookup[material_type] = len(type_names)
+                type_names.append(material_type)
+            type_codes[i] = type_lookup[material_type]
+        return cls(names, values, type_codes, type_names, properties, extra_columns)
+
+    def __len__(self):
+        return len(self.names)
+
+    # Header for writing this table back to CSV, schema columns first
+    def csv_columns(self):
+        return [NAME_COLUMN] + self.properties + [TYPE_COLUMN] + list(self.extra_columns)
+
+    # Integer code of a material type, or -1 if no material has that type
+    def type_code(self, material_type):
+        try:
+            return self.type_names.index(material_type)
+        except ValueError:
+            return -1
+
+    # Material types that occur at least once, in first-seen order
+    def present_types(self):
+        counts = np.bincount(self.type_codes, minlength=len(self.type_names))
+        return [name for name, count in zip(self.type_names, counts) if count]
+
+    # Boolean mask of the rows whose type is in selected_types
+    def type_mask(self, selected_types):
+        selected = np.zeros(len(self.type_names), dtype=bool)
+        for material_type in selected_types:
+            code = self.type_code(material_type)
+            if code >= 0:
+                selected[code] = True
+        return selected[self.type_codes]
+
+    # Material type name of every row in indices
+    def types_of(self, indices):
+        return np.asarray(self.type_names, dtype=object)[self.type_codes[indices]]
+
+    # A single row as the dict layout used by the CSV files
+    def record(self, index):
+        record = {NAME_COLUMN: str(self.names[index])}
+        record.update(zip(self.properties, self.values[index].tolist()))
+        record[TYPE_COLUMN] = self.type_names[self.type_codes[index]]
+        for column, values in self.extra_columns.items():
+            record[column] = str(values[index])
+        return record
+
+    def records(self, indices=None):
+        if indices is None:
+            indices = range(len(self))
+        for index in indices:
+            yield self.record(index)
+
+    # Append rows given as dicts; returns the indices of the new rows
+    def append_records(self, records):
+        return self.append_table(MaterialTable.from_records(records, self.properties, list(self.extra_columns)))
+
+    # Append all rows of another table; returns the indices of the new rows
+    def append_table(self, added):
+        start = len(self)
+        if not len(added):
+            return np.arange(start, start)
+        remap = np.array([self._intern_type(name) for name in added.type_names], dtype=np.int16)
+        self.names = np.concatenate([np.asarray(self.names, dtype=object), np.asarray(added.names, dtype=object)])
+        self.values = np.asfortranarray(np.concatenate([self.values, added.values]))
+        self.columns = {prop: self.values[:, j] for j, prop in enumerate(self.properties)}
+        self.type_codes = np.concatenate([self.type_codes, remap[added.type_codes]])
+        for column, values in self.extra_columns.items():
+            new_values = added.extra_columns.get(column, np.full(len(added), "", dtype=object))
+            self.extra_columns[column] = np.concatenate([np.asarray(values, dtype=object), np.asarray(new_values, dtype=object)])
+        if self._name_index is not None:
+            self._name_index.add(added.names)
+        self.version += 1
+        self._append_lengths[self.version] = len(self)
+        return np.arange(start, len(self))
+
+    # First row appended since `version`, or None when rows were also edited or
+    # deleted since then; lets indexes over the table take in just the new rows
+    def appended_since(self, version):
+        return self._append_lengths.get(version)
+
+    # New table holding the given rows
+    def take(self, indices):
+        return MaterialTable(np.asarray(self.names, dtype=object)[indices], self.values[indices], self.type_codes[indices],
+                             self.type_names, self.properties,
+                             {column: np.asarray(values, dtype=object)[indices] for column, values in self.extra_columns.items()})
+
+    # Row index of the material with this name (case and spacing ignored), or None
+    def find(self, name):
+        return self.name_index.find(name)
+
+    # Overwrite one row with the values of a record dict
+    def update_record(self, index, record):
+        self._make_writable()
+        if self._name_index is not None:
+            self._name_index.rename(index, record[NAME_COLUMN])
+        self.names[index] = record[NAME_COLUMN]
+        self.values[index] = [float(record[prop]) for prop in self.properties]
+        self.type_codes[index] = self._intern_type(record[TYPE_COLUMN])
+        for column, values in self.extra_columns.items():
+            values[index] = record.get(column, values[index])
+        self.version += 1
+        self._append_lengths = {self.version: len(self)}
+
+    # Remove rows; later rows move up to close the gap
+    def delete_rows(self, indices):
+        keep = np.ones(len(self), dtype=bool)
+        keep[indices] = False
+        self.names = np.asarray(self.names, dtype=object)[keep]
+        self.values = np.asfortranarray(self.values[keep])
+        self.columns = {prop: self.values[:, j] for j, prop in enumerate(self.properties)}
+        self.type_codes = self.type_codes[keep]
+        self.extra_columns = {column: np.asarray(values, dtype=object)[keep] for column, values in self.extra_columns.items()}
+        if self._name_index is not None:
+            self._name_index.delete(np.flatnonzero(~keep))
+        self.version += 1
+        self._append_lengths = {self.version: len(self)}
+
+    # Copy memory-mapped (read-only) columns into memory before editing in place
+    def _make_writable(self):
+        if not self.values.flags.writeable:
+            self.values = np.array(self.values, order="F")
+            self.columns = {prop: self.values[:, j] for j, prop in enumerate(self.properties)}
+        if self.names.dtype != object:
+            self.names = np.asarray(self.names, dtype=object)
+        if not self.type_codes.flags.writeable:
+            self.type_codes = self.type_codes.copy()
+        for column, values in self.extra_columns.items():
+            if values.dtype != object:
+                self.extra_columns[column] = np.asarray(values, dtype=object)
+
+    def _intern_type(self, material_type):
+        code = self.type_code(material_type)
+        if code < 0:
+            code = len(self.type_names)
+            self.type_names.append(material_type)
+        return code
+
+
+# Boolean mask of the rows inside every (min, max) range and of a selected type.
+# ranges maps a property name to an inclusive (min, max) pair; the mask is built
+# column by column in place so no per-row Python work is done.
+def filter_mask(table, ranges, selected_types):
+    mask = table.type_mask(selected_types)
+    scratch = np.empty(len(table), dtype=bool)
+    for prop, (low, high) in ranges.items():
+        column = table.columns[prop]
+        np.greater_equal(column, low, out=scratch)
+        mask &= scratch
+        np.less_equal(column, high, out=scratch)
+        mask &= scratch
+    return mask
+
+
+# Filter materials based on user-defined intervals and selected types.
+# Returns the row indices of the matching materials in table order.
+def filter_materials(materials, density_range, strength_range, cost_range, conductivity_range, maximum_temperature_range, young_modulus_range, thermal_capacity_range, tensile_strength_range, ductility_range, recycle_fraction_range, selected_types):
+    ranges = dict(zip(NUMERIC_PROPERTIES, [
+        density_range, strength_range, cost_range, conductivity_range, maximum_temperature_range,
+        young_modulus_range, thermal_capacity_range, tensile_strength_range, ductility_range,
+        recycle_fraction_range
+    ]))
+    return np.flatnonzero(filter_mask(materials, ranges, selected_types))
+
+
+# Columns that sort_indices can order by
+def sortable_columns(table):
+    return [NAME_COLUMN] + table.properties + [TYPE_COLUMN]
+
+
+# Order indices by a property, the name or the type; stable so ties keep table order
+def sort_indices(table, indices, sort_property, ascending=True):
+    if sort_property == NAME_COLUMN:
+        keys = np.asarray(table.names[indices], dtype=str)
+    elif sort_property == TYPE_COLUMN:
+        type_rank = np.argsort(np.argsort(np.asarray(table.type_names, dtype=str), kind="stable"))
+        keys = type_rank[table.type_codes[indices]]
+    else:
+        keys = table.columns[sort_property][indices]
+    order = np.argsort(keys, kind="stable")
+    if not ascending:
+        order = order[::-1]
+    return indices[order]
+
+
+# Sorted view of one property column: argsort permutation plus sorted values
+class SortedIndex:
+    def __init__(self, column):
+        self.order = np.argsort(column, kind="stable")
+        self.sorted_values = column[self.order]
+
+    # Half-open span [start, stop) of sorted positions with low <= value <= high
+    def span(self, low, high):
+        start = int(np.searchsorted(self.sorted_values, low, side="left"))
+        stop = int(np.searchsorted(self.sorted_values, high, side="right"))
+        return start, max(start, stop)
+
+    # Merge in rows appended to the column. They go after equal values already
+    # present, where a stable argsort of the whole column would put them.
+    def insert(self, values, rows):
+        order = np.argsort(values, kind="stable")
+        values, rows = values[order], rows[order]
+        positions = np.searchsorted(self.sorted_values, values, side="right")
+        self.order = np.insert(self.order, positions, rows)
+        self.sorted_values = np.insert(self.sorted_values, positions, values)
+
+
+# Name lookups by normalized name: exact (hash), prefix (sorted keys),
+# substring (rows holding every trigram of the query, verified) and fuzzy (trigram
+# overlap). Trigram postings are stored as one array of rows sorted by trigram
+# code, so building them is a handful of numpy sorts. Appended names go to a
+# small side index and are folded in once it grows.
+# Exact lookups map a name to a slot, a row number that does not change when
+# rows before it are deleted; the row is the slot's position in the ascending
+# array of live slots. Renames and deletes therefore only touch the names
+# involved, and the prefix and trigram structures are rebuilt on the next
+# search() that needs them.
+class NameIndex:
+    def __init__(self, names):
+        self._build([normalize_name(name) for name in names])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _build(self, keys, search=True):
+        self.keys = keys
+        self._slots = np.arange(len(keys))
+        self._next_slot = len(keys)
+        self._first_slot = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+        if search:
+            self._build_search()
+        else:
+            self._stale = True
+
+    # Sorted keys and trigram postings of the current keys
+    def _build_search(self):
+        keys = self.keys
+        key_array = np.array(keys, dtype=str) if keys else np.empty(0, dtype="<U1")
+        order = np.argsort(key_array, kind="stable")
+        self._sorted_keys = key_array[order].tolist()
+        self._sorted_rows = order.tolist()
+
+        codes, rows = [], []
+        for start in range(0, len(keys), NAME_INDEX_CHUNK):
+            chunk_codes, chunk_rows = _trigram_codes(keys[start:start + NAME_INDEX_CHUNK])
+            codes.append(chunk_codes)
+            rows.append(chunk_rows + start)
+        codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        order = np.argsort(codes, kind="stable")  # rows stay ascending within a trigram
+        codes, rows = codes[order], rows[order]
+        if len(codes):
+            # A trigram that occurs twice in one name is posted once
+            unique = np.ones(len(codes), dtype=bool)
+            unique[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+            codes, rows = codes[unique], rows[unique]
+        starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]])) if len(codes) else np.empty(0, dtype=np.intp)
+        self._codes = codes[starts]
+        self._offsets = np.append(starts, len(codes))
+        self._rows = rows
+        self._trigram_counts = np.bincount(rows, minlength=len(keys))
+        self._added = {}
+        self._added_rows = 0
+        self._stale = False
+
+    # Index the names of rows appended to the table
+    def add(self, names):
+        start = len(self.keys)
+        keys = [normalize_name(name) for name in names]
+        if not self._stale and self._added_rows + len(keys) > max(NAME_INDEX_CHUNK // 8, len(self.keys) // 8):
+            self._build(self.keys + keys)
+            return
+        self.keys.extend(keys)
+        slots = np.arange(self._next_slot, self._next_slot + len(keys))
+        self._next_slot += len(keys)
+        self._slots = np.concatenate([self._slots, slots])
+        for key, slot in zip(keys, slots.tolist()):
+            self._first_slot.setdefault(key, slot)
+        if self._stale:
+            return
+        counts = []
+        for row, key in enumerate(keys, start):
+            position = bisect.bisect_right(self._sorted_keys, key)
+            self._sorted_keys.insert(position, key)
+            self._sorted_rows.insert(position, row)
+            trigrams = {_trigram_code(key[i:i + 3]) for i in range(len(key) - 2)}
+            for code in trigrams:
+                self._added.setdefault(code, []).append(row)
+            counts.append(len(trigrams))
+        self._trigram_counts = np.concatenate([self._trigram_counts, np.array(counts, dtype=np.intp)])
+        self._added_rows += len(keys)
+
+    # The row was renamed
+    def rename(self, row, name):
+        key, old = normalize_name(name), self.keys[row]
+        if key == old:
+            return
+        slot = int(self._slots[row])
+        self.keys[row] = key
+        if self._first_slot.get(old) == slot:
+            self._find_next(old, row)
+        if self._first_slot.get(key, slot) >= slot:
+            self._first_slot[key] = slot
+        self._stale = True
+
+    # The rows were deleted; later rows moved up to close the gaps
+    def delete(self, rows):
+        rows = np.unique(rows)
+        if len(rows) > NAME_INDEX_CHUNK // 8:
+            keep = np.ones(len(self.keys), dtype=bool)
+            keep[rows] = False
+            self._build([key for key, kept in zip(self.keys, keep.tolist()) if kept], search=False)
+            return
+        removed = [(self.keys[row], int(self._slots[row])) for row in rows.tolist()]
+        for row in reversed(rows.tolist()):
+            del self.keys[row]
+        self._slots = np.delete(self._slots, rows)
+        for i, (key, slot) in enumerate(removed):
+            if self._first_slot.get(key) == slot:
+                self._find_next(key, int(rows[i]) - i)
+        self._stale = True
+
+    # The first row with `key` is gone: point it at the next one from `start`, if any
+    def _find_next(self, key, start):
+        try:
+            self._first_slot[key] = int(self._slots[self.keys.index(key, start)])
+        except ValueError:
+            del self._first_slot[key]
+
+    # Row of the first material with this name (case and spacing ignored), or None
+    def find(self, name):
+        slot = self._first_slot.get(normalize_name(name))
+        return None if slot is None else int(np.searchsorted(self._slots, slot))
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._first_slot
+
+    # Rows matching text, best matches first, widening up to `match`:
+    # "exact", "prefix" (alphabetical), "substring" (table order) and
+    # "fuzzy" (by trigram similarity, at least NAME_FUZZY_THRESHOLD).
+    # Substring and fuzzy matching need at least three characters.
+    def search(self, text, match="fuzzy"):
+        if match not in NAME_MATCHES:
+            raise ValueError(f"Name match must be one of {', '.join(NAME_MATCHES)}, not {match}")
+        level = NAME_MATCHES.index(match)
+        if self._stale:
+            self._build_search()
+        query = normalize_name(text)
+        if not query:
+            return np.arange(len(self.keys))
+        start = bisect.bisect_left(self._sorted_keys, query)
+        stop = bisect.bisect_right(self._sorted_keys, query) if level == 0 else \
+            bisect.bisect_left(self._sorted_keys, query + "\U0010ffff", start)
+        found = [np.array(self._sorted_rows[start:stop], dtype=np.intp)]
+        trigrams = sorted({_trigram_code(query[i:i + 3]) for i in range(len(query) - 2)})
+        if level >= 2 and trigrams:
+            seen = np.zeros(len(self.keys), dtype=bool)
+            seen[found[0]] = True
+            # Rows holding every trigram of the query, rarest trigram first; once
+            # few candidates are left they are checked directly
+            postings = sorted((self._postings(code) for code in trigrams), key=len)
+            candidates = postings[0]
+            for rows in postings[1:]:
+                if len(candidates) <= NAME_VERIFY_CANDIDATES:
+                    break
+                positions = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+                candidates = candidates[rows[positions] == candidates] if len(rows) else rows
+            candidates = candidates[~seen[candidates]]
+            substring = np.array([row for row in candidates.tolist() if query in self.keys[row]], dtype=np.intp)
+            found.append(substring)
+            seen[substring] = True
+            if level == 3:
+                # Dice similarity of the trigram sets, from how many query trigrams each row shares
+                shared = np.bincount(np.concatenate(postings), minlength=len(self.keys))
+                close = np.flatnonzero(shared)
+                close = close[~seen[close]]
+                score = 2.0 * shared[close] / (len(trigrams) + self._trigram_counts[close])
+                keep = score >= NAME_FUZZY_THRESHOLD
+                close, score = close[keep], score[keep]
+                found.append(close[np.argsort(-score, kind="stable")])
+        return np.concatenate(found)
+
+    # Rows whose name contains the trigram, ascending
+    def _postings(self, code):
+        position = np.searchsorted(self._codes, code)
+        if position < len(self._codes) and self._codes[position] == code:
+            rows = self._rows[self._offsets[position]:self._offsets[position + 1]]
+        else:
+            rows = self._rows[:0]
+        if code in self._added:
+            rows = np.concatenate([rows, np.array(self._added[code], dtype=np.intp)])
+        return rows
+
+
+def _trigram_code(trigram):
+    return (ord(trigram[0]) << 42) | (ord(trigram[1]) << 21) | ord(trigram[2])
+
+
+# (trigram code, row) pairs of every three-character window of keys; code
+# points fit in 21 bits, so a trigram packs into one int64
+def _trigram_codes(keys):
+    chars = np.array(keys, dtype=str) if keys else np.empty(0, dtype="<U1")
+    width = chars.itemsize // 4
+    if width < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp)
+    lengths = np.char.str_len(chars)
+    points = chars.view(np.uint32).reshape(len(keys), width).astype(np.int64)
+    codes = (points[:, :-2] << 42) | (points[:, 1:-1] << 21) | points[:, 2:]
+    valid = np.arange(width - 2) < (lengths - 2)[:, None]
+    rows = np.nonzero(valid)[0]
+    return codes[valid], rows
+
+
+# Filter state that is updated one bound at a time.
+# satisfied[i] counts how many constraints row i currently meets (one per
+# property range plus the type selection) and a row matches when it meets
+# all of them. Moving a bound only touches the rows between its old and new
+# position in that property's SortedIndex.
+# With histogram_edges ({property: bin edges}) the filter also keeps, per
+# property, a histogram of the rows meeting every constraint except that
+# property's own range (a cross-filter): what its slider could still select.
+# Bin 0 counts values below the first edge, the last bin values above the
+# last edge or missing. They follow the same row deltas, using a bitmask of
+# the constraints each row fails and a row-major matrix of bin numbers, so a
+# moved bound costs one short gather per row whose count crossed a match.
+class IncrementalFilter:
+    def __init__(self, table, histogram_edges=None):
+        self.table = table
+        self.version = table.version
+        self.constraint_count = len(table.properties) + 1
+        self.indexes = {prop: SortedIndex(table.columns[prop]) for prop in table.properties}
+        self.type_order = np.argsort(table.type_codes, kind="stable")
+        self.type_bounds = np.searchsorted(table.type_codes[self.type_order], np.arange(len(table.type_names) + 1))
+        self.satisfied = np.zeros(len(table), dtype=np.int8)
+        self.match_count = 0
+        self.spans = {prop: (0, 0) for prop in table.properties}
+        self.ranges = {}
+        self.selected_codes = set()
+        # Bit of each constraint (None for the types) in the failure bitmask of the histograms
+        self._constraint_bits = {prop: 1 << j for j, prop in enumerate(table.properties)}
+        self._constraint_bits[None] = 1 << len(table.properties)
+        self.histograms = None
+        for prop in table.properties:
+            self.set_range(prop, -np.inf, np.inf)
+        if histogram_edges:
+            self._init_histograms(histogram_edges)
+
+    # Move the (min, max) bounds of one property
+    def set_range(self, prop, low, high):
+        self.ranges[prop] = (low, high)
+        index = self.indexes[prop]
+        start, stop = index.span(low, high)
+        old_start, old_stop = self.spans[prop]
+        if (start, stop) == (old_start, old_stop):
+            return
+        self.spans[prop] = (start, stop)
+        # Rows of the old span outside the new one drop out, rows of the new
+        # span outside the old one come in (each row moves at most once, even
+        # when the spans do not overlap)
+        self._apply(index.order[old_start:min(old_stop, start)], -1, prop)
+        self._apply(index.order[max(old_start, stop):old_stop], -1, prop)
+        self._apply(index.order[start:min(stop, old_start)], 1, prop)
+        self._apply(index.order[max(start, old_stop):stop], 1, prop)
+
+    # Change the set of accepted material types
+    def set_types(self, selected_types):
+        codes = {self.table.type_code(material_type) for material_type in selected_types} - {-1}
+        for code in codes - self.selected_codes:
+            self._apply(self._type_rows(code), 1, None)
+        for code in self.selected_codes - codes:
+            self._apply(self._type_rows(code), -1, None)
+        self.selected_codes = codes
+
+    # Apply a full filter state; only the bounds that moved cost anything
+    def update(self, ranges, selected_types):
+        for prop, (low, high) in ranges.items():
+            self.set_range(prop, low, high)
+        self.set_types(selected_types)
+
+    # Take in rows appended to the table since the filter last saw it: they are
+    # merged into the sorted indexes and checked against the current bounds,
+    # and nothing else is touched
+    def extend(self):
+        start = self.table.appended_since(self.version)
+        rows = np.arange(start, len(self.table))
+        satisfied = np.zeros(len(rows), dtype=np.int8)
+        failing = np.zeros(len(rows), dtype=np.uint64)
+        for prop in self.table.properties:
+            values = self.table.columns[prop][start:]
+            low, high = self.ranges[prop]
+            self.indexes[prop].insert(values, rows)
+            self.spans[prop] = self.indexes[prop].span(low, high)
+            inside = (values >= low) & (values <= high)
+            satisfied += inside
+            failing[~inside] |= np.uint64(self._constraint_bits[prop])
+        selected = np.isin(self.table.type_codes[start:], list(self.selected_codes))
+        satisfied += selected
+        failing[~selected] |= np.uint64(self._constraint_bits[None])
+        self.satisfied = np.concatenate([self.satisfied, satisfied])
+        self.match_count += int(np.count_nonzero(satisfied == self.constraint_count))
+        if self.histograms is not None:
+            self.failing = np.concatenate([self.failing, failing.astype(self.failing.dtype)])
+            bins = [self._bin_ids(prop, self.table.columns[prop][start:]) for prop in self.histogram_edges]
+            self.bin_ids = np.concatenate([self.bin_ids, np.column_stack(bins).astype(self.bin_ids.dtype)])
+            self._histogram_add(rows, 1)
+        self.type_order = np.argsort(self.table.type_codes, kind="stable")
+        self.type_bounds = np.searchsorted(self.table.type_codes[self.type_order], np.arange(len(self.table.type_names) + 1))
+        self.version = self.table.version
+
+    # Row indices of the materials meeting every constraint, in table order
+    def indices(self):
+        return np.flatnonzero(self.satisfied == self.constraint_count)
+
+    def _type_rows(self, code):
+        return self.type_order[self.type_bounds[code]:self.type_bounds[code + 1]]
+
+    # Add delta to the satisfied count of rows when the constraint on `moved`
+    # (a property, or None for the types) lets them in or out
+    def _apply(self, rows, delta, moved):
+        if not len(rows):
+            return
+        full = self.constraint_count
+        counts = self.satisfied[rows]
+        self.match_count -= int(np.count_nonzero(counts == full))
+        if self.histograms is not None:
+            # Only rows one constraint short of a match, before or after, are
+            # in any histogram; they leave with their old failures and come
+            # back with the new ones
+            near = rows[np.maximum(counts, counts + delta) >= full - 1]
+            self._histogram_add(near, -1)
+            bit = self.failing.dtype.type(self._constraint_bits[moved])
+            if delta > 0:
+                self.failing[rows] &= ~bit
+            else:
+                self.failing[rows] |= bit
+        counts += delta
+        self.satisfied[rows] = counts
+        self.match_count += int(np.count_nonzero(counts == full))
+        if self.histograms is not None:
+            self._histogram_add(near, 1)
+
+    # Failure bitmask and bin matrix from the current spans, then the histograms from scratch
+    def _init_histograms(self, histogram_edges):
+        properties = self.table.properties
+        self.histogram_edges = {prop: np.asarray(histogram_edges[prop], dtype=np.float64)
+                                for prop in properties if prop in histogram_edges}
+        size = max(len(edges) for edges in self.histogram_edges.values()) + 1
+        self._histogram_array = np.zeros((len(self.histogram_edges), size), dtype=np.int64)
+        self.histograms = {prop: self._histogram_array[k, :len(edges) + 1]
+                           for k, (prop, edges) in enumerate(self.histogram_edges.items())}
+        # Bins are numbered through all histograms (histogram k starts at k * size),
+        # so one bincount fills them all
+        self._bin_offsets = {prop: k * size for k, prop in enumerate(self.histogram_edges)}
+        bin_type = np.min_scalar_type(self._histogram_array.size)
+        self.bin_ids = np.empty((len(self.table), len(self.histogram_edges)), dtype=bin_type)
+        for k, prop in enumerate(self.histogram_edges):
+            self.bin_ids[:, k] = self._sorted_bin_ids(prop)
+        # Histogram (column of bin_ids) of every failure bitmask with one
+        # property range in it, -1 for all other bitmasks
+        type_bit = self._constraint_bits[None]
+        self._single_failures = np.full(2 * type_bit, -1, dtype=np.intp)
+        for k, prop in enumerate(self.histogram_edges):
+            self._single_failures[self._constraint_bits[prop]] = k
+
+        self.failing = np.full(len(self.table), type_bit, dtype=np.min_scalar_type(2 * type_bit - 1))
+        for code in self.selected_codes:
+            self.failing[self._type_rows(code)] = 0
+        for prop in properties:
+            start, stop = self.spans[prop]
+            outside = np.ones(len(self.table), dtype=bool)
+            outside[self.indexes[prop].order[start:stop]] = False
+            self.failing[outside] |= self.failing.dtype.type(self._constraint_bits[prop])
+        self._histogram_add(np.arange(len(self.table)), 1)
+
+    # Count rows into (sign 1) or out of (sign -1) the histograms they belong
+    # to: a match is in every one, a row failing one property's range only in
+    # that property's
+    def _histogram_add(self, rows, sign):
+        failing = self.failing[rows]
+        matched = np.take(self.bin_ids, rows[failing == 0], axis=0).ravel()
+        columns = self._single_failures[failing]
+        missed = columns >= 0
+        missed = self.bin_ids.ravel().take(rows[missed] * self.bin_ids.shape[1] + columns[missed])
+        counts = np.bincount(np.concatenate([matched, missed]), minlength=self._histogram_array.size)
+        if sign > 0:
+            self._histogram_array += counts.reshape(self._histogram_array.shape)
+        else:
+            self._histogram_array -= counts.reshape(self._histogram_array.shape)
+
+    # Histogram bin of every row of a property, read off its SortedIndex:
+    # the edges split the sorted values into runs, one per bin
+    def _sorted_bin_ids(self, prop):
+        edges = self.histogram_edges[prop]
+        index = self.indexes[prop]
+        positions = np.concatenate([np.searchsorted(index.sorted_values, edges[:-1], side="left"),
+                                    np.searchsorted(index.sorted_values, edges[-1:], side="right"), [len(index.order)]])
+        ids = np.empty(len(index.order), dtype=self.bin_ids.dtype)
+        ids[index.order] = np.repeat(np.arange(len(edges) + 1) + self._bin_offsets[prop], np.diff(positions, prepend=0))
+        return ids
+
+    # The same bins for values outside any index (appended rows)
+    def _bin_ids(self, prop, values):
+        edges = self.histogram_edges[prop]
+        ids = np.searchsorted(edges[:-1], values, side="right")
+        ids[~(values <= edges[-1])] = len(edges)
+        return ids + self._bin_offsets[prop]
@@ -0,0 +1,155 @@
+import collections
+import hashlib
+import threading
+
+import numpy as np
+
+
+PARETO_GOALS = ("min", "max")
+PARETO_BLOCK = 512  # candidates compared against the front at once in the k-D filter
+PARETO_CACHE_SIZE = 32
+
+
+# Objectives as (property, goal) pairs. Accepts [prop, goal] lists or
+# {"property": prop, "goal": goal} dicts; raises ValueError for bad input.
+def normalize_objectives(objectives, properties):
+    if not isinstance(objectives, (list, tuple)):
+        raise ValueError(f"Pareto objectives must be a list of [property, \"min\"|\"max\"], not {objectives!r}")
+    normalized = []
+    for objective in objectives:
+        if isinstance(objective, dict):
+            objective = (objective.get("property"), objective.get("goal", "min"))
+        if not isinstance(objective, (list, tuple)) or len(objective) != 2 or not isinstance(objective[1], str):
+            raise ValueError(f"A Pareto objective must be [property, \"min\"|\"max\"], not {objective!r}")
+        prop, goal = objective
+        goal = goal.lower()
+        if prop not in properties:
+            raise ValueError(f"Unknown Pareto property: {prop}")
+        if goal not in PARETO_GOALS:
+            raise ValueError(f"Pareto goal must be min or max, not {goal}")
+        if prop in (p for p, g in normalized):
+            raise ValueError(f"Pareto property listed twice: {prop}")
+        normalized.append((prop, goal))
+    if not normalized:
+        raise ValueError("A Pareto filter needs at least one objective")
+    return normalized
+
+
+# Non-dominated points of two minimized coordinates in O(n log n).
+# After sorting by x (then y), a point is on the front exactly when its y is
+# below every y seen before it. Identical points share the fate of the first.
+# Returns positions into x/y in ascending x order.
+def skyline_2d(x, y):
+    order = np.lexsort((y, x))
+    xs, ys = x[order], y[order]
+    best_before = np.empty_like(ys)
+    best_before[:1] = np.inf
+    np.minimum.accumulate(ys[:-1], out=best_before[1:])
+    keep = ys < best_before
+    if len(order) > 1:
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+        keep = keep[starts][np.cumsum(starts) - 1]
+    return order[keep]
+
+
+# Non-dominated rows of an (n, k) array of minimized values (sort-filter-skyline).
+# Rows are visited best-sum first, so strong points join the front early: the
+# front of the first block is used to discard most rows in one vectorized pass,
+# then the remaining rows are checked block by block against the front found
+# so far and against their own block.
+def skyline(values):
+    n, k = values.shape
+    if k == 1:
+        return np.flatnonzero(values[:, 0] == values[:, 0].min()) if n else np.empty(0, dtype=np.intp)
+    if k == 2:
+        return skyline_2d(values[:, 0], values[:, 1])
+
+    # Scale each objective to [0, 1] so the visiting order is not dominated by one unit
+    low, high = values.min(axis=0), values.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    order = np.argsort(((values - low) / span).sum(axis=1), kind="stable")
+
+    seed, rest = order[:PARETO_BLOCK], order[PARETO_BLOCK:]
+    seed = seed[~_dominated_by(values[seed], values[seed])]
+    front, front_rows = values[seed], [seed]
+    rest = rest[~_dominated_by(values[rest], front)]
+    for start in range(0, len(rest), PARETO_BLOCK):
+        rows = rest[start:start + PARETO_BLOCK]
+        block = values[rows]
+        alive = ~_dominated_by(block, front)
+        rows, block = rows[alive], block[alive]
+        if len(rows):
+            alive = ~_dominated_by(block, block)
+            front = np.concatenate([front, block[alive]])
+            front_rows.append(rows[alive])
+    return np.sort(np.concatenate(front_rows))
+
+
+# For each row of points, whether some row of others dominates it
+# (no worse in every objective and better in at least one). The objective axis
+# is kept outermost so the all/any reductions combine whole planes.
+def _dominated_by(points, others):
+    dominated = np.zeros(len(points), dtype=bool)
+    if not len(others):
+        return dominated
+    k = points.shape[1]
+    points, others = np.ascontiguousarray(points.T), np.ascontiguousarray(others.T)
+    point_step = max(1, min(points.shape[1], (1 << 20) // (others.shape[1] * k)))
+    other_step = max(1, (1 << 20) // (point_step * k))
+    for p in range(0, points.shape[1], point_step):
+        chunk = points[:, p:p + point_step, None]
+        for o in range(0, others.shape[1], other_step):
+            rivals = others[:, None, o:o + other_step]
+            beats = (rivals <= chunk).all(axis=0) & (rivals < chunk).any(axis=0)
+            dominated[p:p + point_step] |= beats.any(axis=1)
+    return dominated
+
+
+# Pareto-optimal subset of the rows `indices` of a table for [(property, goal)]
+# objectives, in table order. Rows with a missing (NaN) objective value are
+# never on the front. Two objectives take O(n log n); with more, the cost also
+# grows with the size of the front.
+def pareto_front(table, indices, objectives):
+    indices = np.asarray(indices, dtype=np.intp)
+    values = np.empty((len(indices), len(objectives)), dtype=np.float64)
+    for k, (prop, goal) in enumerate(objectives):
+        column = table.columns[prop][indices]
+        values[:, k] = -column if goal == "max" else column
+    finite = ~np.isnan(values).any(axis=1)
+    if not finite.all():
+        indices, values = indices[finite], values[finite]
+    return np.sort(indices[skyline(values)])
+
+
+# LRU of recent fronts keyed by (table, version, objectives, candidate rows).
+# The candidate rows stand in for the filter state, so the Search tab, the
+# Compare tab and the server share entries whenever they ask the same question.
+class ParetoCache:
+    def __init__(self, max_entries=PARETO_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def front(self, table, indices, objectives):
+        indices = np.ascontiguousarray(indices, dtype=np.intp)
+        key = (table.token, table.version, tuple(objectives), len(indices),
+               hashlib.blake2b(indices.data, digest_size=16).digest())
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        front = pareto_front(table, indices, objectives)
+        front.flags.writeable = False
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = front
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return front
+
+
+pareto_cache = ParetoCache()
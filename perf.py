@@ -0,0 +1,167 @@
+import cProfile
+import collections
+import contextlib
+import logging
+import os
+import pstats
+import threading
+import time
+
+import numpy as np
+
+
+SPAN_WINDOW = 512  # latest timings kept per span for the percentiles
+CALLBACK_BUDGET = 0.050  # Tk callbacks slower than this (seconds) are logged
+LAG_INTERVAL = 100  # ms between event-loop lag probes
+SLOW_LOG_SIZE = 50  # slow callbacks remembered for the HUD
+PROFILE_TOP = 25  # functions printed when a profile is dumped
+
+logger = logging.getLogger("material_selector.perf")
+
+
+# Rolling timings of the hot paths (load, filter, sort, show, render, save, ...).
+# span() is cheap enough to leave on everywhere: two perf_counter calls and an
+# append. Safe to use from the query worker and loader threads.
+class PerfRecorder:
+    def __init__(self, window=SPAN_WINDOW):
+        self.window = window
+        self.counts = collections.Counter()
+        self.slow = collections.deque(maxlen=SLOW_LOG_SIZE)  # (time, callback, seconds)
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples[name].append(seconds)
+            self.counts[name] += 1
+
+    # A Tk callback ran for longer than the budget
+    def record_slow(self, callback, seconds):
+        with self._lock:
+            self.slow.append((time.time(), callback, seconds))
+        logger.warning("slow callback %s took %.1f ms", callback, seconds * 1000)
+
+    # {span: {"count", "last_ms", "p50_ms", "p95_ms", "max_ms"}}
+    def summary(self):
+        with self._lock:
+            items = [(name, list(samples), self.counts[name]) for name, samples in self._samples.items()]
+        stats = {}
+        for name, samples, count in items:
+            milliseconds = np.array(samples) * 1000.0
+            stats[name] = {
+                "count": count,
+                "last_ms": float(milliseconds[-1]),
+                "p50_ms": float(np.percentile(milliseconds, 50)),
+                "p95_ms": float(np.percentile(milliseconds, 95)),
+                "max_ms": float(milliseconds.max()),
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self.counts.clear()
+            self.slow.clear()
+
+
+perf_recorder = PerfRecorder()
+
+
+# Name of a Tk callback for the slow-callback log, with where it is defined
+# since most of them are lambdas and closures
+def _callback_name(func):
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", repr(func))
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        name += f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+# Time every Tk callback registered from now on and log those over budget.
+# tkinter wraps every command, binding and after() callback in its module-level
+# CallWrapper, so swapping in a timing subclass covers all widgets at once.
+# Must run before the widgets are created; callbacks registered earlier stay
+# untimed. (tkinter is imported here so the query CLI and server never need it.)
+def instrument_tk(budget=CALLBACK_BUDGET):
+    import tkinter
+
+    class TimedCallWrapper(tkinter.CallWrapper):
+        def __call__(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().__call__(*args)
+            finally:
+                seconds = time.perf_counter() - start
+                if seconds > budget:
+                    perf_recorder.record_slow(_callback_name(self.func), seconds)
+
+    tkinter.CallWrapper = TimedCallWrapper
+
+
+# Event backlog: how late a timer fires compared with when it was due, which
+# is the time pending events waited behind whatever ran before them
+def watch_event_loop(window, interval=LAG_INTERVAL):
+    def probe(due):
+        perf_recorder.record("event loop lag", max(0.0, time.perf_counter() - due))
+        window.after(interval, probe, time.perf_counter() + interval / 1000.0)
+
+    window.after(interval, probe, time.perf_counter() + interval / 1000.0)
+
+
+# One line for the status-bar HUD: the match count, then the latest time and
+# p50/p95/max of each given span that has run so far, and the slow callbacks
+def hud_text(matches, spans):
+    stats = perf_recorder.summary()
+    parts = [f"{matches} matches"]
+    for name in spans:
+        if name in stats:
+            span = stats[name]
+            parts.append(f"{name} {span['last_ms']:.1f} ms (p50 {span['p50_ms']:.1f} p95 {span['p95_ms']:.1f} "
+                         f"max {span['max_ms']:.1f})")
+    if perf_recorder.slow:
+        when, callback, seconds = perf_recorder.slow[-1]
+        parts.append(f"{len(perf_recorder.slow)} slow callbacks, last {callback.split(' ')[0]} {seconds * 1000:.0f} ms")
+    return " | ".join(parts)
+
+
+# cProfile of the Tk thread, switched on and off from a key binding. stop()
+# writes the stats to a file (for snakeviz, pstats, ...) and prints the top
+# functions by cumulative time. Work on the query worker is not included;
+# its filter and sort spans show up in the HUD instead.
+class ProfileToggle:
+    def __init__(self, prefix="material_selector"):
+        self.prefix = prefix
+        self.profile = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    # Returns the path of the dump
+    def stop(self, stream=None):
+        profile, self.profile = self.profile, None
+        profile.disable()
+        path = f"{self.prefix}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+        profile.dump_stats(path)
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        return path
+
+    # Start, or stop and dump; returns the dump path when one was written
+    def toggle(self, stream=None):
+        if self.running:
+            return self.stop(stream)
+        self.start()
+        return None
@@ -0,0 +1,410 @@
+import argparse
+import time
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+
+
+LABEL_BUDGET = 40  # most material names drawn on the plot at once
+LABEL_CANDIDATES = 2000  # highest-priority points in view considered for a label
+LABEL_FONT_SIZE = 8
+# Label positions tried around a point: (offset in points, horizontal, vertical alignment)
+LABEL_OFFSETS = [((5, 5), "left", "bottom"), ((-5, 5), "right", "bottom"),
+                 ((5, -5), "left", "top"), ((-5, -5), "right", "top")]
+LOD_THRESHOLD = 5000  # above this many visible points the plot shows a density raster
+LOD_BIN_PIXELS = 3  # raster bin size in screen pixels
+LOD_MAX_BINNED = 1_000_000  # above this many visible points the raster bins an even sample
+TYPE_PALETTE = colormaps["tab10"]
+
+
+# Color of a material type code; fixed per code so types keep their color between updates
+def type_color(code):
+    return TYPE_PALETTE(int(code) % TYPE_PALETTE.N)
+
+
+# Uniform grid over display space holding the boxes of placed labels, so a
+# new box is only tested against boxes in the cells it touches
+class LabelGrid:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.boxes = []
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = (int(v // self.cell_size) for v in box)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def collides(self, box):
+        x0, y0, x1, y1 = box
+        for cell in self._cells(box):
+            for k in self.cells.get(cell, ()):
+                bx0, by0, bx1, by1 = self.boxes[k]
+                if x0 < bx1 and bx0 < x1 and y0 < by1 and by0 < y1:
+                    return True
+        return False
+
+    def add(self, box):
+        self.boxes.append(box)
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(len(self.boxes) - 1)
+
+
+# Scatter plot that lives for the whole session on one Figure.
+# All data artists (points, Pareto front, name labels) are created once and
+# marked animated: set_data() swaps their offsets and colors in place and
+# redraws only them over a cached background (blitting). The background
+# (axes, ticks, legend) is redrawn only when the axes, limits or legend change.
+# Level of detail: when more than lod_threshold points fall inside the axes
+# limits, the markers are replaced by a 2-D histogram raster binned for the
+# current limits, each bin colored by its most common material type and
+# shaded by log count. Zooming or panning re-bins (or brings the markers
+# back once few enough points are in view), so drawing cost depends on the
+# raster size rather than on the number of materials; past LOD_MAX_BINNED
+# visible points an evenly strided sample is binned.
+# Names are drawn for at most label_budget points that are in view, chosen by
+# priority (Pareto front first, then the order of `indices`, i.e. the rank)
+# and placed where they do not overlap another label; see _place_labels.
+class ScatterPlot:
+    def __init__(self, figure, lod_threshold=LOD_THRESHOLD, label_budget=LABEL_BUDGET):
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.lod_threshold = lod_threshold
+        self.label_budget = label_budget
+        self.axes = figure.add_subplot()
+        self.axes.grid(True, linestyle='--', alpha=0.7)
+        self.axes.set_autoscale_on(False)  # limits are managed by set_data and the toolbar
+        self.points = self.axes.scatter(np.empty(0), np.empty(0), s=36, alpha=0.6, animated=True)
+        self.raster = AxesImage(self.axes, interpolation="nearest", origin="lower", zorder=1, animated=True)
+        self.raster.set_data(np.zeros((1, 1, 4)))
+        self.raster.set_visible(False)
+        self.axes.add_image(self.raster)
+        self.front_line, = self.axes.plot([], [], color="black", linewidth=1.2, zorder=3, animated=True)
+        self.front_points = self.axes.scatter(np.empty(0), np.empty(0), s=120, facecolors="none", edgecolors="red",
+                                              linewidths=1.5, zorder=4, animated=True)
+        self.labels = []  # pool of Text artists, reused between updates
+        self.visible_labels = 0
+        self.labeled_rows = np.empty(0, dtype=np.intp)  # rows named last time, kept first when still in view
+        self.last_label_time = 0.0
+        self.x_prop = self.y_prop = None
+        self.background = None
+        self.layout = None  # (x label, y label, legend entries) of the current background
+        self.last_redraw = None  # ("blit" or "full", seconds)
+        self.data = None  # (table, row indices, x, y, type codes, palette, front rows) currently shown
+        self.detail_limits = None  # axes limits and box the markers/raster/labels were last prepared for
+        self.aggregated = False  # True while the raster stands in for the markers
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # Show rows `indices` of table; front (row indices, in x order) is outlined and joined.
+    # Returns "blit" when only the data artists were redrawn, "full" otherwise.
+    def set_data(self, table, indices, x_prop, y_prop, x_label=None, y_label=None, front=None, title=None):
+        start = time.perf_counter()
+        self.x_prop, self.y_prop = x_prop, y_prop
+        x = table.columns[x_prop][indices]
+        y = table.columns[y_prop][indices]
+        codes = table.type_codes[indices]
+        palette = np.array([type_color(code) for code in range(len(table.type_names))]).reshape(-1, 4)
+        self.data = (table, indices, x, y, codes, palette, front if front is not None else indices[:0])
+
+        if front is not None and len(front):
+            front_xy = np.column_stack([table.columns[x_prop][front], table.columns[y_prop][front]])
+            self.front_line.set_data(front_xy[:, 0], front_xy[:, 1])
+            self.front_points.set_offsets(front_xy)
+        else:
+            self.front_line.set_data([], [])
+            self.front_points.set_offsets(np.empty((0, 2)))
+
+        present = np.flatnonzero(np.bincount(codes, minlength=len(table.type_names)))
+        legend = tuple((table.type_names[code], int(code)) for code in present)
+        if front is not None:
+            legend += ((f"Pareto front ({len(front)})", -1),)
+        layout = (x_label or x_prop, y_label or y_prop, title, legend)
+        limits_changed = self._update_limits(x, y)
+        full = limits_changed or layout != self.layout
+        if full:
+            self._set_layout(layout)
+        self._update_detail()
+        if full:
+            self.canvas.draw()
+        else:
+            self._blit()
+        self.last_redraw = ("full" if full else "blit", time.perf_counter() - start)
+        return self.last_redraw[0]
+
+    # Markers or raster for the points inside the current limits
+    def _update_detail(self):
+        if self.data is None:
+            return
+        table, indices, x, y, codes, palette, front = self.data
+        (x0, x1), (y0, y1) = self.axes.get_xlim(), self.axes.get_ylim()
+        self.detail_limits = self._view()
+        in_view = x >= x0
+        in_view &= x <= x1
+        in_view &= y >= y0
+        in_view &= y <= y1
+        visible = int(np.count_nonzero(in_view))
+        self.aggregated = visible > self.lod_threshold
+        if self.aggregated:
+            self.points.set_offsets(np.empty((0, 2)))
+            candidates = front  # too many points to name; only the front gets labels
+            shown = np.flatnonzero(in_view)[::max(1, visible // LOD_MAX_BINNED)]
+            self.raster.set_data(self._density_raster(x[shown], y[shown], codes[shown], palette))
+            self.raster.set_extent((x0, x1, y0, y1))
+            self.raster.set_visible(True)
+        else:
+            self.raster.set_visible(False)
+            self.points.set_offsets(np.column_stack([x, y]))
+            self.points.set_facecolor(palette[codes])
+            candidates = np.concatenate([front, indices[in_view][:LABEL_CANDIDATES]])
+        self._place_labels(table, candidates)
+
+    # Name up to label_budget of the candidate rows (in priority order) without
+    # overlaps. Label sizes are estimated from the text length, which is far
+    # cheaper than measuring Text artists. Rows labeled in the previous pass
+    # are tried first, so labels stay put while panning and zooming.
+    def _place_labels(self, table, candidates):
+        start = time.perf_counter()
+        x_prop, y_prop = self.x_prop, self.y_prop
+        candidates = np.asarray(candidates, dtype=np.intp)
+        if len(self.labeled_rows) and len(candidates):
+            kept = np.isin(candidates, self.labeled_rows)
+            candidates = np.concatenate([candidates[kept], candidates[~kept]])
+        candidates = candidates[np.sort(np.unique(candidates, return_index=True)[1])]
+
+        xy = np.column_stack([table.columns[x_prop][candidates], table.columns[y_prop][candidates]])
+        display = self.axes.transData.transform(xy) if len(xy) else xy
+        bounds = self.axes.bbox
+        inside = ((display[:, 0] >= bounds.x0) & (display[:, 0] <= bounds.x1) &
+                  (display[:, 1] >= bounds.y0) & (display[:, 1] <= bounds.y1)) if len(xy) else np.zeros(0, bool)
+        pixels = self.figure.dpi / 72.0
+        char_width, text_height = 0.6 * LABEL_FONT_SIZE * pixels, 1.2 * LABEL_FONT_SIZE * pixels
+
+        grid = LabelGrid()
+        placed = []  # (row, x, y, offset, ha, va)
+        for k in np.flatnonzero(inside):
+            if len(placed) >= self.label_budget:
+                break
+            row = candidates[k]
+            px, py = display[k]
+            width = char_width * len(str(table.names[row]))
+            for (dx, dy), ha, va in LABEL_OFFSETS:
+                left = px + dx * pixels - (width if ha == "right" else 0)
+                bottom = py + dy * pixels - (text_height if va == "top" else 0)
+                box = (left, bottom, left + width, bottom + text_height)
+                if box[0] < bounds.x0 or box[2] > bounds.x1 or box[1] < bounds.y0 or box[3] > bounds.y1:
+                    continue
+                if not grid.collides(box):
+                    grid.add(box)
+                    placed.append((row, xy[k], (dx, dy), ha, va))
+                    break
+
+        while len(self.labels) < len(placed):
+            self.labels.append(self.axes.annotate("", (0, 0), fontsize=LABEL_FONT_SIZE, alpha=0.7, xytext=(5, 5),
+                                                  textcoords='offset points', animated=True))
+        for label, (row, point, offset, ha, va) in zip(self.labels, placed):
+            label.set_text(table.names[row])
+            label.xy = tuple(point)
+            label.set_position(offset)
+            label.set_horizontalalignment(ha)
+            label.set_verticalalignment(va)
+            label.set_visible(True)
+        for label in self.labels[len(placed):self.visible_labels]:
+            label.set_visible(False)
+        self.visible_labels = len(placed)
+        self.labeled_rows = np.array([row for row, *rest in placed], dtype=np.intp)
+        self.last_label_time = time.perf_counter() - start
+
+    # RGBA image of per-bin counts for the current limits: the most common type
+    # in each bin gives its color, log(count) its opacity
+    def _density_raster(self, x, y, codes, palette):
+        (x0, x1), (y0, y1) = self.axes.get_xlim(), self.axes.get_ylim()
+        width, height = self.axes.bbox.width, self.axes.bbox.height
+        nx = max(1, int(width / LOD_BIN_PIXELS))
+        ny = max(1, int(height / LOD_BIN_PIXELS))
+        type_count = len(palette)
+        bins = np.minimum(((y - y0) * (ny / (y1 - y0))).astype(np.intp), ny - 1)
+        bins += codes.astype(np.intp) * ny
+        bins *= nx
+        bins += np.minimum(((x - x0) * (nx / (x1 - x0))).astype(np.intp), nx - 1)
+        counts = np.bincount(bins, minlength=type_count * ny * nx).reshape(type_count, ny, nx)
+        total = counts.sum(axis=0)
+        image = palette[counts.argmax(axis=0)]
+        shade = np.log1p(total) / np.log1p(max(1, total.max()))
+        image[..., 3] = np.where(total > 0, 0.25 + 0.75 * shade, 0.0)
+        return image
+
+    # Keep the current limits while the data still fills a good part of them;
+    # returns True when they had to change
+    def _update_limits(self, x, y):
+        changed = False
+        for values, get_limits, set_limits in ((x, self.axes.get_xlim, self.axes.set_xlim),
+                                               (y, self.axes.get_ylim, self.axes.set_ylim)):
+            low, high = float(values.min(initial=np.inf)), float(values.max(initial=-np.inf))
+            if not (np.isfinite(low) and np.isfinite(high)):
+                values = values[np.isfinite(values)]
+                if not len(values):
+                    continue
+                low, high = float(values.min()), float(values.max())
+            pad = (high - low) * 0.05 or abs(high) * 0.05 or 1.0
+            current_low, current_high = get_limits()
+            inside = current_low <= low and high <= current_high
+            if not inside or (high - low + 2 * pad) < 0.4 * (current_high - current_low):
+                set_limits(low - pad, high + pad)
+                changed = True
+        return changed
+
+    def _set_layout(self, layout):
+        x_label, y_label, title, legend = layout
+        self.layout = layout
+        self.axes.set_xlabel(x_label)
+        self.axes.set_ylabel(y_label)
+        self.axes.set_title(title or f"{y_label} vs {x_label}")
+        handles = [Line2D([], [], linestyle="", marker="o", markersize=7, alpha=0.6,
+                          color=type_color(code) if code >= 0 else "black",
+                          markerfacecolor=type_color(code) if code >= 0 else "none",
+                          markeredgecolor="red" if code < 0 else None)
+                   for name, code in legend]
+        if handles:
+            self.axes.legend(handles, [name for name, code in legend], title="Material Types",
+                             bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=8)
+        elif self.axes.get_legend() is not None:
+            self.axes.get_legend().remove()
+        self.figure.tight_layout()
+
+    # Data limits and screen box of the axes; markers, raster and labels depend on both
+    def _view(self):
+        return self.axes.get_xlim() + self.axes.get_ylim() + tuple(self.axes.bbox.bounds)
+
+    def animated_artists(self):
+        return [self.raster, self.points, self.front_line, self.front_points] + self.labels[:self.visible_labels]
+
+    # After every full draw: remember the background, then draw the data on top of it.
+    # Zoom and pan end in a full draw, so this is where the raster follows new limits.
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self._view() != self.detail_limits:
+            self._update_detail()
+        for artist in self.animated_artists():
+            self.axes.draw_artist(artist)
+
+    def _blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self.animated_artists():
+            self.axes.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+
+# The scatter plot embedded in a Tk frame, with matplotlib's pan/zoom toolbar
+class PlotPanel(ttk.Frame):
+    def __init__(self, master, figsize=(8, 5), **kwargs):
+        super().__init__(master, **kwargs)
+        figure = Figure(figsize=figsize, dpi=100)
+        self.canvas = FigureCanvasTkAgg(figure, master=self)
+        toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.plot = ScatterPlot(figure)
+
+
+# The old Compare path: a new figure, one scatter per type and one annotation per material
+def _draw_new_figure(table, indices, x_prop, y_prop):
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    codes = table.type_codes[indices]
+    for code in np.unique(codes):
+        rows = indices[codes == code]
+        x, y = table.columns[x_prop][rows], table.columns[y_prop][rows]
+        axes.scatter(x, y, label=table.type_names[code], color=type_color(code), alpha=0.6)
+        for i, name in enumerate(table.names[rows]):
+            axes.annotate(name, (x[i], y[i]), fontsize=8, alpha=0.7, xytext=(5, 5), textcoords='offset points')
+    axes.legend(title="Material Types", bbox_to_anchor=(1.05, 1), loc='upper left')
+    figure.tight_layout()
+    figure.canvas.draw()
+
+
+# Time the old rebuild-a-figure path against in-place updates of one ScatterPlot,
+# over `updates` random subsets of the table (as a slider drag would produce)
+def benchmark_redraw(table, x_prop, y_prop, updates=20, seed=0):
+    rng = np.random.default_rng(seed)
+    subsets = [np.flatnonzero(rng.random(len(table)) < rng.uniform(0.5, 1.0)) for _ in range(updates)]
+
+    start = time.perf_counter()
+    for indices in subsets[:max(1, updates // 4)]:
+        _draw_new_figure(table, indices, x_prop, y_prop)
+    rebuild = (time.perf_counter() - start) / max(1, updates // 4)
+
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    plot = ScatterPlot(figure)
+    plot.set_data(table, np.arange(len(table)), x_prop, y_prop)
+    timings = {"blit": [], "full": []}
+    for indices in subsets:
+        kind = plot.set_data(table, indices, x_prop, y_prop)
+        timings[kind].append(plot.last_redraw[1])
+    return {
+        "rows": len(table),
+        "rebuild_s": rebuild,
+        "blit_s": float(np.median(timings["blit"])) if timings["blit"] else None,
+        "full_s": float(np.median(timings["full"])) if timings["full"] else None,
+        "blit_updates": len(timings["blit"]),
+        "full_updates": len(timings["full"]),
+    }
+
+
+# Redraw time of an in-place update at growing sizes; with level of detail it
+# should stay roughly flat once the raster takes over
+def benchmark_lod(sizes=(10_000, 100_000, 1_000_000, 10_000_000), type_count=5, seed=0):
+    from material_table import MaterialTable
+
+    rng = np.random.default_rng(seed)
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    plot = ScatterPlot(figure)
+    results = []
+    for size in sizes:
+        codes = rng.integers(0, type_count, size)
+        values = np.column_stack([rng.lognormal(8, 0.5, size) + 1000 * codes, rng.lognormal(4, 1, size)])
+        table = MaterialTable(np.full(size, "", dtype=object), values, codes,
+                              [f"Type {k}" for k in range(type_count)], ["x", "y"])
+        indices = np.arange(size)
+        plot.set_data(table, indices, "x", "y")
+        timings = []
+        for _ in range(3):
+            plot.set_data(table, indices[rng.random(size) < 0.9], "x", "y")
+            timings.append(plot.last_redraw[1])
+        results.append({"rows": size, "aggregated": plot.aggregated, "redraw_s": float(np.median(timings))})
+    return results
+
+
+if __name__ == "__main__":
+    from material_io import DATABASE_FILE, open_database
+
+    parser = argparse.ArgumentParser(description="Benchmark Compare-tab redraws")
+    parser.add_argument("--database", default=DATABASE_FILE)
+    parser.add_argument("--rows", type=int, default=5000, help="rows to plot, sampled from the database")
+    parser.add_argument("--x", default="density_(kg/m^3)")
+    parser.add_argument("--y", default="young_modulus_(GPa)")
+    parser.add_argument("--lod", action="store_true", help="time synthetic 10k-10M point plots instead")
+    args = parser.parse_args()
+    if args.lod:
+        for result in benchmark_lod():
+            mode = "raster" if result["aggregated"] else "markers"
+            print(f"{result['rows']:>10} points ({mode}): {result['redraw_s'] * 1000:.1f} ms per update")
+        raise SystemExit
+    table, report, journal = open_database(args.database)
+    table = table.take(np.random.default_rng(0).integers(0, len(table), args.rows))
+    result = benchmark_redraw(table, args.x, args.y)
+    print(f"{result['rows']} rows: new figure per plot {result['rebuild_s'] * 1000:.1f} ms, "
+          f"in-place blit {result['blit_s'] * 1000 if result['blit_s'] is not None else float('nan'):.1f} ms "
+          f"({result['blit_updates']} updates), in-place full redraw "
+          f"{result['full_s'] * 1000 if result['full_s'] is not None else float('nan'):.1f} ms ({result['full_updates']} updates)")
@@ -0,0 +1,514 @@
+import argparse
+import collections
+import csv
+import functools
+import io
+import json
+import multiprocessing
+import numbers
+import sys
+import threading
+
+import numpy as np
+
+from material_io import DATABASE_FILE, open_database
+from material_table import (MATERIAL_TYPES, NAME_COLUMN, NAME_MATCHES, TYPE_COLUMN, IncrementalFilter, filter_mask,
+                            sort_indices, sortable_columns, spec_count)
+from material_index import compile_index, rank_by_index
+from pareto import normalize_objectives, pareto_cache
+from perf import perf_recorder
+from similarity import normalize_similar, similar_materials, similarity_distances
+
+
+RESULT_CACHE_BUDGET = 64 * 1024 * 1024  # bytes of cached filter results and sorted orders
+SORT_PERMUTATION_SHARE = 32  # results holding more than 1/32 of the rows are sorted from the column's permutation
+
+
+# Turn a user query spec into the canonical form used by the engine.
+# A spec is a dict (from JSON/YAML or the GUI) with the optional keys
+#   ranges:  {property: [min, max]}   null or a missing bound means unbounded
+#   types:   [material type, ...]     missing or null means every type
+#   name:    text the material name must match; matches come best first
+#   name_match: "exact", "prefix", "substring" or "fuzzy" (default, widest)
+#   sort:    column to sort by        name, type or any numeric property
+#   index:   material index to rank by, e.g. "young_modulus^(1/2)/density"
+#   order:   "asc" or "desc"            (default "desc" when ranking by an index)
+#   pareto:  [[property, "min"|"max"], ...] keep only the non-dominated matches
+#   similar: {"to": name, "k": 10, "weights": {property: weight}, "scale": "z"|"log"}
+#            keep the k matches closest to a material, nearest first
+#   limit:   keep only the first N results (top-k selection when ranking)
+#   columns: output columns (CSV/JSON output only)
+# Every numeric property gets a range so specs can be compared and reused.
+# Raises ValueError for anything the table does not know about.
+def normalize_spec(spec, table):
+    if not isinstance(spec, dict):
+        raise ValueError(f"A query must be an object, not {type(spec).__name__}")
+    unknown = set(spec) - {"ranges", "types", "name", "name_match", "sort", "index", "order", "pareto",
+                       "similar", "limit", "columns"}
+    if unknown:
+        raise ValueError(f"Unknown query key(s): {', '.join(sorted(unknown))}")
+
+    ranges = {prop: (-np.inf, np.inf) for prop in table.properties}
+    spec_ranges = spec.get("ranges") or {}
+    if not isinstance(spec_ranges, dict):
+        raise ValueError(f"ranges must be an object of property: [min, max], not {type(spec_ranges).__name__}")
+    for prop, bounds in spec_ranges.items():
+        if prop not in ranges:
+            raise ValueError(f"Unknown property in ranges: {prop}")
+        if isinstance(bounds, dict):
+            bounds = (bounds.get("min"), bounds.get("max"))
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+            raise ValueError(f"Range of {prop} must be [min, max] or {{\"min\": ..., \"max\": ...}}, not {bounds!r}")
+        for bound in bounds:
+            if bound is not None and (isinstance(bound, (bool, np.bool_)) or not isinstance(bound, numbers.Real)):
+                raise ValueError(f"Bounds of {prop} must be numbers or null, not {bound!r}")
+        low, high = bounds
+        try:
+            ranges[prop] = (-np.inf if low is None else float(low), np.inf if high is None else float(high))
+        except OverflowError:
+            raise ValueError(f"Bounds of {prop} are out of range: {bounds!r}")
+
+    types = spec.get("types")
+    if types is None:
+        types = list(table.type_names)
+    else:
+        if not isinstance(types, (list, tuple)) or not all(isinstance(material_type, str) for material_type in types):
+            raise ValueError(f"types must be a list of material type names, not {types!r}")
+        unknown_types = [material_type for material_type in types
+                         if material_type not in table.type_names and material_type not in MATERIAL_TYPES]
+        if unknown_types:
+            raise ValueError(f"Unknown material type(s): {', '.join(unknown_types)}")
+        types = list(types)
+
+    for key in ("name", "name_match", "sort", "index", "order"):
+        if spec.get(key) is not None and not isinstance(spec[key], str):
+            raise ValueError(f"{key} must be text, not {spec[key]!r}")
+    name = (spec.get("name") or "").strip() or None
+    name_match = (spec.get("name_match") or "fuzzy").lower()
+    if name_match not in NAME_MATCHES:
+        raise ValueError(f"name_match must be one of {', '.join(NAME_MATCHES)}, not {name_match}")
+
+    sort = spec.get("sort") or None
+    if sort is not None and sort not in sortable_columns(table):
+        raise ValueError(f"Cannot sort by {sort}")
+    index = spec.get("index") or None
+    if index is not None:
+        if sort is not None:
+            raise ValueError("A query can sort by a column or rank by an index, not both")
+        index = compile_index(index).expression
+    order = (spec.get("order") or ("asc" if index is None else "desc")).lower()
+    if order not in ("asc", "ascending", "desc", "descending"):
+        raise ValueError(f"Sort order must be asc or desc, not {order}")
+
+    pareto = spec.get("pareto")
+    if pareto:
+        pareto = normalize_objectives(pareto, table.properties)
+
+    similar = spec.get("similar")
+    if similar:
+        similar = normalize_similar(similar, table)
+
+    limit = spec.get("limit")
+    if limit is not None:
+        limit = spec_count(limit, "limit")
+
+    columns = spec.get("columns") or table.csv_columns()
+    if not isinstance(columns, (list, tuple)) or not all(isinstance(column, str) for column in columns):
+        raise ValueError(f"columns must be a list of column names, not {columns!r}")
+    missing = [column for column in columns if column not in table.csv_columns()]
+    if missing:
+        raise ValueError(f"Unknown output column(s): {', '.join(missing)}")
+
+    return {
+        "ranges": ranges,
+        "types": types,
+        "name": name,
+        "name_match": name_match,
+        "sort": sort,
+        "index": index,
+        "order": "desc" if order.startswith("desc") else "asc",
+        "pareto": pareto or None,
+        "similar": similar or None,
+        "limit": limit,
+        "columns": list(columns),
+    }
+
+
+# Name-match, Pareto-reduce, pick nearest neighbours, sort and truncate a
+# normalized spec's matches (row indices)
+def _finish_query(table, indices, spec, sort=sort_indices):
+    if spec["name"] is not None:
+        with perf_recorder.span("name search"):
+            matches = table.name_index.search(spec["name"], spec["name_match"])
+            selected = np.zeros(len(table), dtype=bool)
+            selected[indices] = True
+            indices = matches[selected[matches]]
+    if spec["pareto"] is not None:
+        with perf_recorder.span("pareto"):
+            indices = pareto_cache.front(table, indices, spec["pareto"])
+    if spec["similar"] is not None:
+        with perf_recorder.span("similar"):
+            indices = similar_materials(table, indices, spec["similar"])[0]
+    with perf_recorder.span("sort"):
+        if spec["index"] is not None:
+            indices = rank_by_index(table, indices, compile_index(spec["index"]), spec["order"] == "desc", spec["limit"])
+        elif spec["sort"] is not None:
+            indices = sort(table, indices, spec["sort"], ascending=spec["order"] == "asc")
+    if spec["limit"] is not None:
+        indices = indices[:spec["limit"]]
+    return indices
+
+
+# Run one query spec against a table; returns the matching row indices in result order
+def query(table, spec):
+    spec = normalize_spec(spec, table)
+    with perf_recorder.span("filter"):
+        indices = np.flatnonzero(filter_mask(table, spec["ranges"], spec["types"]))
+    return _finish_query(table, indices, spec)
+
+
+# Filter results of recent filter states, with the sorted orders asked for so
+# far, least recently used first out once their arrays pass a byte budget.
+# Cached arrays are read-only since the same one is handed out on every hit.
+class ResultCache:
+    def __init__(self, budget=RESULT_CACHE_BUDGET):
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()  # key -> {None: indices, column: ascending order}
+
+    # Cached array of an entry (None for the filter result, else a sort column), or None
+    def get(self, key, column=None):
+        entry = self._entries.get(key)
+        if entry is None or column not in entry:
+            if column is None:
+                self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if column is None:
+            self.hits += 1
+        return entry[column]
+
+    def put(self, key, array, column=None):
+        array.setflags(write=False)
+        entry = self._entries.setdefault(key, {})
+        self._entries.move_to_end(key)
+        if column in entry:
+            self.nbytes -= entry[column].nbytes
+        entry[column] = array
+        self.nbytes += array.nbytes
+        # The newest entry stays even when it alone is over budget
+        while self.nbytes > self.budget and len(self._entries) > 1:
+            evicted = self._entries.popitem(last=False)[1]
+            self.nbytes -= sum(cached.nbytes for cached in evicted.values())
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "nbytes": self.nbytes}
+
+
+# Query runner that keeps an IncrementalFilter between calls, so a series of
+# similar specs (a slider being dragged) only pays for the bounds that moved.
+# Filter results are memoized in a ResultCache keyed by the span of sorted
+# positions every range covers (so any two slider settings that select the
+# same rows share an entry), the selected types and the table version. Large
+# results are sorted by reading the column's precomputed argsort permutation
+# through the result's mask instead of sorting them again; a descending order
+# is the ascending one reversed, as in sort_indices. Permutations and cache
+# are dropped whenever the table changes; the filter only when more than
+# appends happened.
+class QueryEngine:
+    def __init__(self, table, cache_budget=RESULT_CACHE_BUDGET, histogram_edges=None):
+        self.table = table
+        self.cache = ResultCache(cache_budget)
+        self.histogram_edges = histogram_edges  # slider histograms kept by the filter, see IncrementalFilter
+        self._filter = None
+        self._permutations = {}  # name and type sort orders of every row
+
+    def run(self, spec):
+        spec = normalize_spec(spec, self.table)
+        if self._filter is None or self._filter.table is not self.table:
+            self._filter = IncrementalFilter(self.table, self.histogram_edges)
+            self._permutations = {}
+            self.cache.clear()
+        elif self._filter.version != self.table.version:
+            # Rows appended (a live reload) are merged into the filter; other edits rebuild it
+            if self.table.appended_since(self._filter.version) is not None:
+                self._filter.extend()
+            else:
+                self._filter = IncrementalFilter(self.table, self.histogram_edges)
+            self._permutations = {}
+            self.cache.clear()
+        key = self._cache_key(spec)
+        with perf_recorder.span("filter"):
+            indices = self.cache.get(key)
+            # The histograms follow the filter state, so it moves even on a cache hit
+            if indices is None or self.histogram_edges:
+                self._filter.update(spec["ranges"], spec["types"])
+            if indices is None:
+                indices = self._filter.indices()
+                self.cache.put(key, indices)
+        sort = sort_indices
+        if spec["name"] is None and spec["pareto"] is None and spec["similar"] is None:
+            sort = functools.partial(self._sort, key)
+        return _finish_query(self.table, indices, spec, sort)
+
+    # Copies of the slider histograms for the last run, with the number of
+    # rows that met every filter constraint: {"counts": {property: bins}, "matches": n}
+    def histograms(self):
+        if self._filter is None or self._filter.histograms is None:
+            return None
+        return {"counts": {prop: counts.copy() for prop, counts in self._filter.histograms.items()},
+                "matches": self._filter.match_count}
+
+    def _cache_key(self, spec):
+        spans = tuple(self._filter.indexes[prop].span(*spec["ranges"][prop]) for prop in self.table.properties)
+        codes = frozenset(self.table.type_code(material_type) for material_type in spec["types"]) - {-1}
+        return self.table.version, spans, codes
+
+    # The cached filter result `indices` of `key` ordered by a column
+    def _sort(self, key, table, indices, column, ascending=True):
+        order = self.cache.get(key, column)
+        if order is None:
+            if len(indices) * SORT_PERMUTATION_SHARE > len(self.table):
+                permutation = self._permutation(column)
+                selected = np.zeros(len(self.table), dtype=bool)
+                selected[indices] = True
+                order = permutation[selected[permutation]]
+            else:
+                order = sort_indices(self.table, indices, column)
+            self.cache.put(key, order, column)
+        return order if ascending else order[::-1]
+
+    # Stable ascending order of every row by a column
+    def _permutation(self, column):
+        if column not in (NAME_COLUMN, TYPE_COLUMN):
+            return self._filter.indexes[column].order
+        if column not in self._permutations:
+            self._permutations[column] = sort_indices(self.table, np.arange(len(self.table)), column)
+        return self._permutations[column]
+
+
+# Output fields and row dicts of query results; a material index adds an
+# "index" column and a similarity search a "distance" column
+def result_rows(table, indices, columns=None, index=None, similar=None):
+    columns = columns or table.csv_columns()
+    fields = list(columns)
+    rows = ({column: record[column] for column in columns} for record in table.records(indices))
+    if index is not None:
+        values = compile_index(index).evaluate(table, indices)
+        rows = (dict(row, index=None if np.isnan(value) else float(value)) for row, value in zip(rows, values))
+        fields.append("index")
+    if similar is not None:
+        distances = similarity_distances(table, similar, indices)
+        rows = (dict(row, distance=float(distance)) for row, distance in zip(rows, distances))
+        fields.append("distance")
+    return fields, rows
+
+
+# Render query results as CSV or JSON text, with the fields of result_rows
+def format_results(table, indices, columns=None, output_format="csv", index=None, similar=None):
+    fields, rows = result_rows(table, indices, columns, index, similar)
+    if output_format == "json":
+        return json.dumps(list(rows), indent=2)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+# Read one spec or a list of specs from a JSON or YAML file ("-" for stdin)
+def read_specs(path):
+    text = sys.stdin.read() if path == "-" else open(path, mode='r', encoding='utf-8').read()
+    if path.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML query files needs PyYAML (pip install pyyaml)")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict) and "queries" in data:
+        data = data["queries"]
+    return data if isinstance(data, list) else [data]
+
+
+# Table shared by the worker processes of a batch run
+_worker_table = None
+
+
+def _init_worker(filename):
+    global _worker_table
+    # Workers memory-map the same binary cache, so the OS keeps one copy of the columns
+    _worker_table, report, journal = open_database(filename)
+
+
+def _run_worker_query(spec):
+    return query(_worker_table, spec)
+
+
+# Run many specs, spread over `jobs` processes when jobs > 1; returns one index array per spec
+def run_batch(table, specs, filename=DATABASE_FILE, jobs=1):
+    specs = [normalize_spec(spec, table) for spec in specs]
+    if jobs <= 1 or len(specs) < 2:
+        return [query(table, spec) for spec in specs]
+    jobs = min(jobs, len(specs))
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(filename,)) as pool:
+        return pool.map(_run_worker_query, specs, chunksize=max(1, len(specs) // (jobs * 4)))
+
+
+def add_query_arguments(parser):
+    parser.add_argument("--spec", default="-",
+                        help="JSON or YAML file with one query or a list of queries ('-' reads stdin, the default)")
+    parser.add_argument("--database", default=DATABASE_FILE, help=f"materials CSV (default {DATABASE_FILE})")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv", help="output format (default csv)")
+    parser.add_argument("--output", default="-", help="output file ('-' writes stdout, the default)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for batches of queries (default 1)")
+
+
+# Command-line entry point: run query specs headlessly and print the results.
+# A single spec prints plain CSV/JSON rows; a batch adds the query number to each row.
+def run_query_command(args):
+    try:
+        specs = read_specs(args.spec)
+        table, report, journal = open_database(args.database)
+        results = run_batch(table, specs, args.database, args.jobs)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if len(specs) == 1:
+        spec = normalize_spec(specs[0], table)
+        text = format_results(table, results[0], spec["columns"], args.format, spec["index"], spec["similar"])
+    elif args.format == "json":
+        text = json.dumps([
+            {"query": i, "count": len(indices),
+             "results": json.loads(format_results(table, indices, spec["columns"], "json", spec["index"],
+                                                     spec["similar"]))}
+            for i, (spec, indices) in enumerate(zip((normalize_spec(spec, table) for spec in specs), results))
+        ], indent=2)
+    else:
+        # Same columns per query as the JSON output; one header with every
+        # query's fields, left empty where a query does not have them
+        outputs = []
+        fields = []
+        for spec, indices in zip((normalize_spec(spec, table) for spec in specs), results):
+            spec_fields, rows = result_rows(table, indices, spec["columns"], spec["index"], spec["similar"])
+            fields += [field for field in spec_fields if field not in fields]
+            outputs.append(rows)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["query"] + fields, restval="", lineterminator="\n")
+        writer.writeheader()
+        for i, rows in enumerate(outputs):
+            writer.writerows(dict(row, query=i) for row in rows)
+        text = buffer.getvalue()
+
+    if args.output == "-":
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+    else:
+        with open(args.output, mode='w', newline='', encoding='utf-8') as file:
+            file.write(text)
+    return 0
+
+
+# Runs filter queries on a background thread and keeps only the newest one.
+# submit() can be called on every slider tick: a request still waiting when a
+# newer one arrives is dropped without being computed, and the UI thread picks
+# up the newest finished result from its window.after polling loop, so Tk
+# widgets are only touched from the main loop. While a slider is dragged the
+# view keeps following it at the speed the worker can compute.
+class QueryScheduler:
+    def __init__(self, window, compute, apply, poll_interval=15):
+        self.window = window
+        self.compute = compute
+        self.apply = apply
+        self.poll_interval = poll_interval
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sequence = 0
+        self._pending = None  # (sequence, state) waiting for the worker
+        self._running_sequence = None  # sequence being computed right now
+        self._result = None  # (sequence, result, error) waiting for the UI thread
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="query-worker", daemon=True)
+        self._worker.start()
+        self.window.after(self.poll_interval, self._poll)
+
+    # Post the latest filter state; older unprocessed states are superseded
+    def submit(self, state):
+        with self._lock:
+            self._sequence += 1
+            self.submitted += 1
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (self._sequence, state)
+        self._wakeup.set()
+
+    # Requests not yet shown: waiting, being computed or ready for the UI
+    def queue_depth(self):
+        with self._lock:
+            return sum(item is not None for item in (self._pending, self._running_sequence, self._result))
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "queue_depth": self.queue_depth(),
+        }
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                self._wakeup.clear()
+                if self._stopped:
+                    return
+                job, self._pending = self._pending, None
+                if job is None:
+                    continue
+                self._running_sequence = job[0]
+            sequence, state = job
+            try:
+                result, error = self.compute(state), None
+            except Exception as e:
+                result, error = None, e
+            with self._lock:
+                self._running_sequence = None
+                if self._result is not None:
+                    self.dropped += 1  # the UI never got to show the previous one
+                self._result = (sequence, result, error)
+
+    def _poll(self):
+        if self._stopped:
+            return
+        with self._lock:
+            job, self._result = self._result, None
+        self.window.after(self.poll_interval, self._poll)
+        if job is not None:
+            sequence, result, error = job
+            self.completed += 1
+            if error is not None:
+                raise error  # reported through Tk's callback exception handler
+            self.apply(result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run material selection queries without the GUI")
+    add_query_arguments(parser)
+    sys.exit(run_query_command(parser.parse_args()))
@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+from material_table import TYPE_COLUMN
+
+
+# Table of filtered materials that only ever holds one screenful of rows.
+# The Treeview keeps a fixed pool of `height` items; scrolling re-fills those
+# items from the index array, so formatting and Tk work depend on the size of
+# the viewport and not on how many materials matched.
+# An optional score column (a material index) is computed the same way, only
+# for the rows in view, and hidden while there is no score.
+class VirtualResultsView(ttk.Frame):
+    def __init__(self, master, columns, on_sort=None, height=15, column_width=95, score_column=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = [column for column, heading in columns]
+        self.headings = dict(columns)
+        self.on_sort = on_sort
+        self.height = height
+        self.table = None
+        self.indices = np.empty(0, dtype=np.intp)
+        self.top = 0
+        self.sort_column = None
+        self.ascending = True
+        self.score_column = score_column
+        self.scores = None
+
+        self.summary_label = ttk.Label(self, text="")
+        self.summary_label.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", height=height, selectmode="browse")
+        for column in self.columns:
+            self.tree.heading(column, text=self.headings[column], command=lambda c=column: self._heading_clicked(c))
+            self.tree.column(column, width=column_width, minwidth=50, stretch=False, anchor=tk.E)
+        self.tree.column(self.columns[0], width=column_width * 2, anchor=tk.W)
+        self._show_score_column(False)
+        self.tree.grid(row=1, column=0, sticky=tk.NSEW)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky=tk.NS)
+        x_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        x_scrollbar.grid(row=2, column=0, sticky=tk.EW)
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+
+        # Pool of reusable rows; rows past the end of the data are detached
+        self.items = [self.tree.insert("", tk.END, values=()) for _ in range(height)]
+        self.attached = height
+
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_to(self.top - self.height))
+        self.tree.bind("<Next>", lambda e: self.scroll_to(self.top + self.height))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.indices)))
+
+    # Show a new result; indices are row numbers into table, already in display order.
+    # scores, if given, maps an index array to the score column's values,
+    # shown under score_heading.
+    def set_rows(self, table, indices, sort_column=None, ascending=True, scores=None, score_heading=None):
+        self.table = table
+        self.indices = indices
+        self.sort_column = sort_column
+        self.ascending = ascending
+        if (scores is None) != (self.scores is None):
+            self._show_score_column(scores is not None)
+        self.scores = scores
+        if score_heading is not None:
+            self.headings[self.score_column] = score_heading
+        if len(indices):
+            self.summary_label.config(text=f"Number of suitable materials found: {len(indices)}")
+        else:
+            self.summary_label.config(text="No materials meet your criteria.")
+        for column in self.columns:
+            arrow = ""
+            if column == sort_column:
+                arrow = " ▲" if ascending else " ▼"
+            self.tree.heading(column, text=self.headings[column] + arrow)
+        self.scroll_to(self.top)
+
+    # Material index of the selected row, or None
+    def selected_index(self):
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        position = self.top + self.items.index(selection[0])
+        return int(self.indices[position]) if position < len(self.indices) else None
+
+    def scroll_to(self, top):
+        self.top = max(0, min(int(top), len(self.indices) - self.height))
+        self._render()
+        return "break"
+
+    # Format only the rows inside the viewport
+    def _render(self):
+        window = self.indices[self.top:self.top + self.height]
+        visible = len(window)
+        if visible:
+            names = self.table.names[window]
+            types = self.table.types_of(window)
+            values = {column: self.table.columns[column][window] for column in self.columns if column in self.table.columns}
+            if self.scores is not None:
+                values[self.score_column] = self.scores(window)
+        for k, item in enumerate(self.items):
+            if k >= visible:
+                break
+            row = []
+            for column in self.columns:
+                if column in values:
+                    row.append(f"{values[column][k]:g}")
+                elif column == TYPE_COLUMN:
+                    row.append(types[k])
+                elif column == self.score_column:
+                    row.append("")
+                else:
+                    row.append(names[k])
+            self.tree.item(item, values=row)
+        # Detach pooled rows that have no data behind them, reattach when they do
+        for k in range(visible, self.attached):
+            self.tree.detach(self.items[k])
+        for k in range(self.attached, visible):
+            self.tree.move(self.items[k], "", k)
+        self.attached = visible
+
+        total = len(self.indices)
+        if total > self.height:
+            self.scrollbar.set(self.top / total, (self.top + visible) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _show_score_column(self, show):
+        if self.score_column is not None:
+            self.tree.configure(displaycolumns=[column for column in self.columns
+                                                if show or column != self.score_column])
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.indices)))
+        elif unit == "pages":
+            self.scroll_to(self.top + int(amount) * self.height)
+        else:
+            self.scroll_to(self.top + int(amount))
+
+    def _on_mousewheel(self, event):
+        direction = 1 if event.delta > 0 else -1
+        return self.scroll_to(self.top - direction * 3)
+
+    def _heading_clicked(self, column):
+        if self.on_sort is not None:
+            self.on_sort(column)
@@ -0,0 +1,343 @@
+import argparse
+import collections
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from material_io import DATABASE_FILE, open_database
+from query_engine import format_results, normalize_spec, query
+
+
+LATENCY_WINDOW = 1024  # latencies kept per endpoint for the /stats percentiles
+MAX_BATCH = 1000  # queries accepted in one /batch request
+
+
+# Latency samples per endpoint; the last LATENCY_WINDOW requests feed the percentiles
+class EndpointStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._counts = collections.Counter()
+        self._errors = collections.Counter()
+        self._not_modified = collections.Counter()
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            self._counts[endpoint] += 1
+            if status >= 400:
+                self._errors[endpoint] += 1
+            elif status == 304:
+                self._not_modified[endpoint] += 1
+
+    def to_dict(self):
+        with self._lock:
+            stats = {}
+            for endpoint, latencies in self._latencies.items():
+                samples = np.array(latencies) * 1000.0
+                stats[endpoint] = {
+                    "requests": self._counts[endpoint],
+                    "errors": self._errors[endpoint],
+                    "not_modified": self._not_modified[endpoint],
+                    "p50_ms": round(float(np.percentile(samples, 50)), 3),
+                    "p95_ms": round(float(np.percentile(samples, 95)), 3),
+                    "max_ms": round(float(samples.max()), 3),
+                }
+            return stats
+
+
+# The database shared by every request thread. Queries read a snapshot of
+# (table, generation); a reload builds a new table and swaps it in, so requests
+# already running finish against the table they started with.
+class MaterialService:
+    def __init__(self, filename=DATABASE_FILE, reload_interval=2.0):
+        self.filename = filename
+        self.reload_interval = reload_interval
+        self.stats = EndpointStats()
+        self.reloads = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._generation = 0
+        self._load()
+        self._watcher = None
+        if reload_interval:
+            self._watcher = threading.Thread(target=self._watch, name="database-watcher", daemon=True)
+            self._watcher.start()
+
+    def _file_state(self):
+        state = []
+        for path in (self.filename, self.filename + ".journal"):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                state.append(None)
+        return state
+
+    def _load(self):
+        file_state = self._file_state()
+        table, report, journal = open_database(self.filename)
+        with self._lock:
+            self._generation += 1
+            self.table = table
+            self.report = report
+            self.file_state = file_state
+            self.tag = f"{report.sha256[:16]}.{self._generation}.{table.version}"
+
+    # Current (table, etag prefix); hold on to both for the whole request
+    def snapshot(self):
+        with self._lock:
+            return self.table, self.tag
+
+    # Reload when the CSV or its journal changed on disk (GUI edits, external tools)
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            if self._file_state() == self.file_state:
+                continue
+            try:
+                self._load()
+                self.reloads += 1
+            except (OSError, ValueError) as e:
+                print(f"reload of {self.filename} failed, still serving the previous data: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+
+    def etag(self, tag, endpoint, payload):
+        key = json.dumps([endpoint, payload], sort_keys=True, separators=(",", ":"))
+        return '"' + tag + "-" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:16] + '"'
+
+    def info(self):
+        table, tag = self.snapshot()
+        return {
+            "database": self.filename,
+            "rows": len(table),
+            "types": list(table.present_types()),
+            "version": tag,
+            "reloads": self.reloads,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+# A request body or batch entry that must be a JSON object
+def _require_object(payload, what):
+    if not isinstance(payload, dict):
+        raise ValueError(f"{what} must be a JSON object, not {type(payload).__name__}")
+    return payload
+
+
+# One query spec as a JSON-ready result
+def _query_result(table, spec):
+    spec = normalize_spec(_require_object(spec, "a query"), table)
+    indices = query(table, spec)
+    results = format_results(table, indices, spec["columns"], "json", spec["index"], spec["similar"])
+    return {"count": len(indices), "results": json.loads(results)}
+
+
+# Top-k is a query sorted by one column with a limit; "k" and "by" read better in requests
+def _top_k_spec(payload):
+    _require_object(payload, "a top-k request")
+    spec = {key: value for key, value in payload.items() if key not in ("k", "by")}
+    if "by" not in payload:
+        raise ValueError("top-k needs a 'by' column")
+    spec["sort"] = payload["by"]
+    spec["limit"] = payload.get("k", 10)
+    spec.setdefault("order", "desc")
+    return spec
+
+
+def handle_query(table, payload):
+    return _query_result(table, payload)
+
+
+def handle_top_k(table, payload):
+    return _query_result(table, _top_k_spec(payload))
+
+
+def handle_batch(table, payload):
+    specs = payload.get("queries") if isinstance(payload, dict) else payload
+    if not isinstance(specs, list):
+        raise ValueError("a batch needs a list of queries")
+    if len(specs) > MAX_BATCH:
+        raise ValueError(f"a batch holds at most {MAX_BATCH} queries")
+    return {"count": len(specs), "results": [_query_result(table, spec) for spec in specs]}
+
+
+# Routes that run queries: path -> handler(table, payload)
+QUERY_ROUTES = {
+    "/query": handle_query,
+    "/topk": handle_top_k,
+    "/batch": handle_batch,
+}
+
+
+class SelectionRequestHandler(BaseHTTPRequestHandler):
+    server_version = "MaterialSelection/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path in ("/health", "/stats"):
+            self._timed(url.path, lambda: self._send_info(url.path))
+        elif url.path in QUERY_ROUTES or url.path == "/export":
+            # GET takes the request JSON in ?spec=..., which makes responses cacheable by URL
+            params = parse_qs(url.query)
+            self._timed(url.path, lambda: self._handle(url.path, params.get("spec", ["{}"])[0], params))
+        else:
+            self._timed("other", lambda: self._send_error(404, f"no route {url.path}"))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        endpoint = url.path if url.path in QUERY_ROUTES or url.path == "/export" else "other"
+        self._timed(endpoint, lambda: self._post(url))
+
+    # Read a POST body (its length must be given) and answer it like a GET
+    def _post(self, url):
+        length = self.headers.get("Content-Length")
+        if length is None or not (length.strip().isascii() and length.strip().isdigit()):
+            # The body cannot be told apart from the next request, so the connection ends here
+            self.close_connection = True
+            if length is None:
+                return self._send_error(411, "a POST needs a Content-Length header")
+            return self._send_error(400, f"Content-Length is not a byte count: {length!r}")
+        body = self.rfile.read(int(length))
+        if url.path not in QUERY_ROUTES and url.path != "/export":
+            return self._send_error(404, f"no route {url.path}")
+        try:
+            body = body.decode("utf-8") if body else "{}"
+        except UnicodeDecodeError as e:
+            return self._send_error(400, f"request is not UTF-8: {e}")
+        return self._handle(url.path, body, parse_qs(url.query))
+
+    def _timed(self, endpoint, handler):
+        start = time.perf_counter()
+        status = handler()
+        self.server.service.stats.record(endpoint, time.perf_counter() - start, status)
+
+    def _send_info(self, path):
+        service = self.server.service
+        info = service.info()
+        if path == "/stats":
+            info["endpoints"] = service.stats.to_dict()
+        else:
+            info = {"status": "ok", "rows": info["rows"], "version": info["version"]}
+        return self._send_json(200, info)
+
+    def _handle(self, path, body, params):
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            return self._send_error(400, f"request is not valid JSON: {e}")
+
+        service = self.server.service
+        table, tag = service.snapshot()
+        etag = service.etag(tag, path, [payload, params.get("format")])
+        if etag in [candidate.strip() for candidate in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(304, b"", None, etag)
+
+        try:
+            if path == "/export":
+                output_format = params.get("format", ["csv"])[0]
+                if output_format not in ("csv", "json"):
+                    raise ValueError(f"unknown export format {output_format}")
+                spec = normalize_spec(payload, table)
+                text = format_results(table, query(table, spec), spec["columns"], output_format, spec["index"],
+                                      spec["similar"])
+                content_type = "text/csv" if output_format == "csv" else "application/json"
+                return self._send(200, text.encode("utf-8"), content_type + "; charset=utf-8", etag)
+            return self._send_json(200, QUERY_ROUTES[path](table, payload), etag)
+        except (ValueError, KeyError) as e:
+            return self._send_error(400, str(e))
+        except Exception as e:
+            # A bug, not a bad request; still answered, so the client is not left hanging
+            traceback.print_exc()
+            return self._send_error(500, f"internal error: {type(e).__name__}: {e}")
+
+    def _send_error(self, status, message):
+        return self._send_json(status, {"error": message})
+
+    def _send_json(self, status, data, etag=None):
+        return self._send(status, json.dumps(data).encode("utf-8"), "application/json", etag)
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # revalidate, the database can change
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return status
+
+
+class SelectionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, SelectionRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
+
+
+# Start a server on a background thread (port 0 picks a free port); returns the
+# server, whose server_address holds the real port. Stop it with shutdown() and server_close().
+def start_server(filename=DATABASE_FILE, host="127.0.0.1", port=0, reload_interval=2.0):
+    server = SelectionServer((host, port), MaterialService(filename, reload_interval))
+    threading.Thread(target=server.serve_forever, name="selection-server", daemon=True).start()
+    return server
+
+
+def add_serve_arguments(parser):
+    parser.add_argument("--database", default=DATABASE_FILE, help=f"materials CSV (default {DATABASE_FILE})")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on, 0 for any free port (default 8765)")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="seconds between checks for a changed CSV, 0 disables reloading (default 2)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+
+
+def run_serve_command(args):
+    try:
+        service = MaterialService(args.database, args.reload_interval)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    server = SelectionServer((args.host, args.port), service, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving {len(service.table)} materials from {args.database} on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve material selection queries over HTTP")
+    add_serve_arguments(parser)
+    sys.exit(run_serve_command(parser.parse_args()))
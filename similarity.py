@@ -0,0 +1,295 @@
+import argparse
+import collections
+import heapq
+import math
+import numbers
+import threading
+import time
+
+import numpy as np
+
+from material_index import PROPERTY_ALIASES
+from material_table import spec_count
+
+
+SIMILARITY_SCALES = ("z", "log")  # z-score the columns as they are, or their logarithm
+SIMILARITY_LEAF_SIZE = 64  # rows per KD-tree leaf
+SIMILARITY_BRUTE_FORCE = 32768  # candidate rows few enough to compare directly
+SIMILARITY_CACHE_SIZE = 4
+
+
+# Similarity request as {"to": material name, "k": count, "weights": {property: weight},
+# "scale": "z"|"log"}. Weights may name a column or its index alias ("cost"),
+# missing properties weigh 1 and a weight of 0 ignores the property.
+# Raises ValueError for bad input.
+def normalize_similar(similar, table):
+    if isinstance(similar, str):
+        similar = {"to": similar}
+    if not isinstance(similar, dict) or not similar.get("to") or not isinstance(similar["to"], str):
+        raise ValueError("A similarity search needs the name of a material ('to')")
+    unknown = set(similar) - {"to", "k", "weights", "scale"}
+    if unknown:
+        raise ValueError(f"Unknown similarity key(s): {', '.join(sorted(unknown))}")
+    row = table.find(similar["to"])
+    if row is None:
+        raise ValueError(f"No material named {similar['to']!r}")
+
+    k = spec_count(similar.get("k", 10), "k")
+    scale = similar.get("scale", "z")
+    if isinstance(scale, str):
+        scale = scale.lower()
+    if scale not in SIMILARITY_SCALES:
+        raise ValueError(f"Similarity scale must be one of {', '.join(SIMILARITY_SCALES)}, not {scale}")
+
+    weights = {prop: 1.0 for prop in table.properties}
+    given = similar.get("weights") or {}
+    if not isinstance(given, dict):
+        raise ValueError(f"Similarity weights must be an object of property: weight, not {given!r}")
+    for prop, weight in given.items():
+        prop = PROPERTY_ALIASES.get(prop, prop)
+        if prop not in weights:
+            raise ValueError(f"Unknown property in similarity weights: {prop}")
+        if isinstance(weight, (bool, np.bool_)) or not isinstance(weight, numbers.Real) or not math.isfinite(weight):
+            raise ValueError(f"The similarity weight of {prop} must be a number, not {weight!r}")
+        weight = float(weight)
+        if not weight >= 0:
+            raise ValueError(f"Similarity weights must not be negative: {prop}")
+        weights[prop] = weight
+    if not any(weights.values()):
+        raise ValueError("Every similarity weight is 0")
+
+    return {"to": str(table.names[row]), "k": k, "weights": weights, "scale": scale}
+
+
+# Weights typed as text, e.g. "cost=0, density=2" (aliases or column names)
+def parse_weights(text):
+    weights = {}
+    for item in text.replace(",", " ").split():
+        prop, separator, value = item.partition("=")
+        if not separator:
+            raise ValueError(f"Write weights as property=weight, not {item!r}")
+        try:
+            weights[prop] = float(value)
+        except ValueError:
+            raise ValueError(f"The weight of {prop} is not a number: {value!r}")
+    return weights
+
+
+# Weighted, standardized property vectors, one row per material.
+# Each column is z-scored (after log10(1 + x) with the "log" scale), so a unit
+# of distance means one standard deviation whatever the property's unit, and
+# then multiplied by its weight. Missing values sit at the mean.
+def feature_matrix(table, weights, scale="z"):
+    props = [prop for prop in table.properties if weights.get(prop, 1.0)]
+    features = np.empty((len(table), len(props)), dtype=np.float64)
+    for j, prop in enumerate(props):
+        column = table.columns[prop]
+        if scale == "log":
+            column = np.log10(1.0 + np.maximum(column, 0.0))
+        finite = np.isfinite(column)
+        mean = column[finite].mean() if finite.any() else 0.0
+        std = column[finite].std() if finite.any() else 0.0
+        features[:, j] = np.where(finite, (column - mean) / (std if std > 0 else 1.0), 0.0) * weights.get(prop, 1.0)
+    return features
+
+
+# KD-tree over an (n, d) array of points for k-nearest-neighbour queries.
+# Nodes split at the median of their widest dimension until at most leaf_size
+# rows remain; the points are stored permuted so every node covers one
+# contiguous slice and a leaf is compared in a single vectorized step.
+# Every node keeps its bounding box, which gives the lower bound on distance
+# used to skip whole subtrees.
+class KDTree:
+    def __init__(self, points, leaf_size=SIMILARITY_LEAF_SIZE):
+        n, d = points.shape
+        self.order = np.arange(n)
+        starts, ends, lows, highs, children = [], [], [], [], []
+        stack = [(0, n, -1)]
+        while stack:
+            start, end, parent = stack.pop()
+            node = len(starts)
+            if parent >= 0:
+                children[parent].append(node)
+            block = points[self.order[start:end]]
+            low = block.min(axis=0) if end > start else np.zeros(d)
+            high = block.max(axis=0) if end > start else np.zeros(d)
+            starts.append(start)
+            ends.append(end)
+            lows.append(low)
+            highs.append(high)
+            children.append([])
+            if end - start > leaf_size:
+                axis = int(np.argmax(high - low))
+                middle = (end - start) // 2
+                split = np.argpartition(block[:, axis], middle)
+                self.order[start:end] = self.order[start:end][split]
+                stack.append((start + middle, end, node))
+                stack.append((start, start + middle, node))
+        self.points = np.ascontiguousarray(points[self.order])
+        self.position = np.empty(n, dtype=np.intp)
+        self.position[self.order] = np.arange(n)
+        self.starts = np.array(starts, dtype=np.intp)
+        self.ends = np.array(ends, dtype=np.intp)
+        self.lows = np.array(lows).reshape(len(starts), d)
+        self.highs = np.array(highs).reshape(len(starts), d)
+        self.children = [tuple(child) for child in children]
+
+    def __len__(self):
+        return len(self.order)
+
+    # Point of a row of the original array
+    def point(self, row):
+        return self.points[self.position[row]]
+
+    # Euclidean distances from x to the given rows
+    def distances(self, x, rows):
+        return np.sqrt(((self.points[self.position[rows]] - x) ** 2).sum(axis=1))
+
+    # The k rows nearest to x, nearest first, and their distances.
+    # rows (indices into the original array) restricts the search to a subset;
+    # when that subset is small its points are compared directly instead.
+    def query(self, x, k, rows=None):
+        k = min(k, len(self) if rows is None else len(rows))
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        allowed = None
+        if rows is not None:
+            positions = self.position[rows]
+            if len(positions) <= SIMILARITY_BRUTE_FORCE:
+                return self._nearest(positions, ((self.points[positions] - x) ** 2).sum(axis=1), k)
+            allowed = np.zeros(len(self), dtype=bool)
+            allowed[positions] = True
+            # Allowed rows under every node, so subtrees without any are never entered
+            if len(positions) * 16 < len(self):
+                found = np.sort(positions)
+                node_counts = np.searchsorted(found, self.ends) - np.searchsorted(found, self.starts)
+            else:
+                before = np.zeros(len(self) + 1, dtype=np.int32)
+                np.cumsum(allowed, dtype=np.int32, out=before[1:])
+                node_counts = before[self.ends] - before[self.starts]
+
+        best_positions = np.empty(0, dtype=np.intp)
+        best_distances = np.empty(0)
+        bound = np.inf
+        heap = [(0.0, 0)]
+        while heap:
+            lower, node = heapq.heappop(heap)
+            if lower > bound:
+                break
+            children = self.children[node]
+            if children:
+                children = np.array(children)
+                if allowed is not None:
+                    children = children[node_counts[children] > 0]
+                gaps = np.maximum(np.maximum(self.lows[children] - x, x - self.highs[children]), 0.0)
+                for child, distance in zip(children.tolist(), (gaps ** 2).sum(axis=1).tolist()):
+                    if distance <= bound:
+                        heapq.heappush(heap, (distance, child))
+                continue
+            positions = np.arange(self.starts[node], self.ends[node])
+            if allowed is not None:
+                positions = positions[allowed[positions]]
+            distances = ((self.points[positions] - x) ** 2).sum(axis=1)
+            best_positions = np.concatenate([best_positions, positions])
+            best_distances = np.concatenate([best_distances, distances])
+            if len(best_positions) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_positions, best_distances = best_positions[keep], best_distances[keep]
+            if len(best_positions) == k:
+                bound = best_distances.max()
+        return self._nearest(best_positions, best_distances, k)
+
+    def _nearest(self, positions, squared, k):
+        if len(positions) > k:
+            keep = np.argpartition(squared, k - 1)[:k]
+            positions, squared = positions[keep], squared[keep]
+        order = np.lexsort((self.order[positions], squared))
+        return self.order[positions[order]], np.sqrt(squared[order])
+
+
+# KD-trees of recent (table token, version, weights, scale) combinations. A tree is
+# built on first use and simply not found again once the table changes, so
+# edits cost nothing until the next similarity search.
+class SimilarityCache:
+    def __init__(self, max_entries=SIMILARITY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.builds = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def tree(self, table, weights, scale):
+        key = (table.token, table.version, tuple(sorted(weights.items())), scale)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        tree = KDTree(feature_matrix(table, weights, scale))
+        with self._lock:
+            self.builds += 1
+            self._entries[key] = tree
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tree
+
+
+similarity_cache = SimilarityCache()
+
+
+# The k materials among `indices` closest to similar["to"] (which is never
+# its own neighbour), nearest first, and their distances
+def similar_materials(table, indices, similar):
+    tree = similarity_cache.tree(table, similar["weights"], similar["scale"])
+    row = table.find(similar["to"])
+    indices = np.asarray(indices, dtype=np.intp)
+    return tree.query(tree.point(row), similar["k"], indices[indices != row])
+
+
+# Distances of rows from similar["to"], for display next to the results
+def similarity_distances(table, similar, rows):
+    tree = similarity_cache.tree(table, similar["weights"], similar["scale"])
+    return tree.distances(tree.point(table.find(similar["to"])), rows)
+
+
+# Build and query latency of k-nearest-neighbour searches over `rows` materials
+# resampled from a table (each value jittered by a few percent), for searches
+# over every row and restricted to random subsets of the given fractions
+def benchmark_similarity(table, rows=1_000_000, queries=50, k=10, fractions=(None, 0.5, 0.01), seed=0):
+    rng = np.random.default_rng(seed)
+    sample = table.take(rng.integers(0, len(table), rows))
+    sample.values *= rng.lognormal(0.0, 0.05, sample.values.shape)
+    features = feature_matrix(sample, {prop: 1.0 for prop in sample.properties})
+    start = time.perf_counter()
+    tree = KDTree(features)
+    results = {"rows": rows, "build_s": time.perf_counter() - start, "queries": []}
+    for fraction in fractions:
+        subset = None if fraction is None else np.flatnonzero(rng.random(rows) < fraction)
+        timings = []
+        for row in rng.integers(0, rows, queries):
+            start = time.perf_counter()
+            tree.query(features[row], k, subset)
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        candidates = features if subset is None else features[subset]
+        np.argpartition(((candidates - features[0]) ** 2).sum(axis=1), k)
+        timings = np.array(timings)
+        results["queries"].append({"fraction": fraction, "p50_s": float(np.median(timings)),
+                                   "p95_s": float(np.percentile(timings, 95)),
+                                   "brute_force_s": time.perf_counter() - start})
+    return results
+
+
+if __name__ == "__main__":
+    from material_io import DATABASE_FILE, open_database
+
+    parser = argparse.ArgumentParser(description="Benchmark similar-material searches")
+    parser.add_argument("--database", default=DATABASE_FILE)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="materials to search, resampled from the database")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    table, report, journal = open_database(args.database)
+    result = benchmark_similarity(table, args.rows, k=args.k)
+    print(f"{result['rows']} rows: KD-tree built in {result['build_s']:.2f} s")
+    for timing in result["queries"]:
+        scope = "all rows" if timing["fraction"] is None else f"{timing['fraction']:.0%} of rows"
+        print(f"  k={args.k} over {scope}: p50 {timing['p50_s'] * 1000:.2f} ms, p95 {timing['p95_s'] * 1000:.2f} ms "
+              f"(brute force {timing['brute_force_s'] * 1000:.1f} ms)")
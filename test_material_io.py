@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+
+import pytest
+
+from material_io import _write_temp_csv, open_database, prepare_import, read_material_csv
+from material_table import CSV_COLUMNS, NUMERIC_PROPERTIES, MaterialTable
+
+
+GOOD_ROW = ["Steel"] + ["1"] * len(NUMERIC_PROPERTIES) + ["Metals"]
+
+
+# Write a materials CSV with the schema header and the given rows
+def write_csv(path, rows, header=CSV_COLUMNS):
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_loader_reports_bad_rows_in_line_order(tmp_path):
+    rows = [
+        GOOD_ROW,
+        ["Short", "1", "2"],
+        ["Bad", "abc"] + ["1"] * (len(NUMERIC_PROPERTIES) - 1) + ["Metals"],
+        ["Long"] + ["1"] * (len(NUMERIC_PROPERTIES) + 2),
+        ["Worse"] + ["x"] * len(NUMERIC_PROPERTIES) + ["Metals"],
+        ["Copper"] + ["2"] * len(NUMERIC_PROPERTIES) + ["Metals"],
+    ]
+    table, report = read_material_csv(write_csv(tmp_path / "materials.csv", rows), chunk_rows=4)
+    assert list(table.names) == ["Steel", "Copper"]
+    assert report.rows_loaded == 2
+    assert report.bad_row_count == 4
+    assert [bad_row[0] for bad_row in report.bad_rows] == [3, 4, 5, 6]
+    assert report.bad_rows[1][1:3] == ("density_(kg/m^3)", "abc")
+    assert [bad_row[4] for bad_row in report.bad_rows] == ["Short", "Bad", "Long", "Worse"]
+    assert "line 3 (Short): expected 12 fields, found 3" in report.summary()
+
+
+def test_loader_skips_blank_lines_and_keeps_extra_columns(tmp_path):
+    rows = [GOOD_ROW + ["note"], [], ["Tin"] + ["3"] * len(NUMERIC_PROPERTIES) + ["Metals", ""]]
+    path = write_csv(tmp_path / "materials.csv", rows, CSV_COLUMNS + ["source"])
+    table, report = read_material_csv(path)
+    assert report.bad_row_count == 0
+    assert list(table.extra_columns["source"]) == ["note", ""]
+    assert table.record(1)["UTS_(MPa)"] == 3.0
+
+
+def material(name, value=1.0, material_type="Metals"):
+    return dict({"name": name, "type": material_type}, **{prop: value for prop in NUMERIC_PROPERTIES})
+
+
+# Database with two materials and a pending journal entry adding "Pending"
+def database_with_pending_add(tmp_path):
+    path = write_csv(tmp_path / "materials.csv", [GOOD_ROW, ["Copper"] + ["2"] * len(NUMERIC_PROPERTIES) + ["Metals"]])
+    table, report, journal = open_database(path, read_only=False)
+    journal.add([material("Pending")])
+    return path, journal
+
+
+def append_line(path, row):
+    with open(path, mode='a', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerow(row)
+
+
+def test_reader_applies_journal_after_outside_append(tmp_path):
+    path, journal = database_with_pending_add(tmp_path)
+    append_line(path, ["Tin"] + ["3"] * len(NUMERIC_PROPERTIES) + ["Metals"])
+    before = open(journal.path, 'rb').read()
+    table, report, reader = open_database(path)
+    assert list(table.names) == ["Steel", "Copper", "Tin", "Pending"]
+    assert open(journal.path, 'rb').read() == before
+    with pytest.raises(OSError):
+        reader.add([material("Nope")])
+
+
+def test_writer_rebases_journal_after_outside_append(tmp_path):
+    path, journal = database_with_pending_add(tmp_path)
+    append_line(path, ["Tin"] + ["3"] * len(NUMERIC_PROPERTIES) + ["Metals"])
+    table, report, writer = open_database(path, read_only=False)
+    assert list(table.names) == ["Steel", "Copper", "Tin", "Pending"]
+    assert json.loads(open(writer.path).readline())["sha256"] == report.sha256
+    writer.compact(table)
+    assert not os.path.exists(writer.path)
+    assert list(open_database(path)[0].names) == ["Steel", "Copper", "Tin", "Pending"]
+
+
+def test_journal_for_rewritten_csv_is_set_aside_not_deleted(tmp_path):
+    path, journal = database_with_pending_add(tmp_path)
+    write_csv(path, [["Lead"] + ["4"] * len(NUMERIC_PROPERTIES) + ["Metals"]])
+    before = open(journal.path, 'rb').read()
+    assert list(open_database(path)[0].names) == ["Lead"]
+    assert open(journal.path, 'rb').read() == before  # a reader leaves it alone
+    table, report, writer = open_database(path, read_only=False)
+    assert list(table.names) == ["Lead"]
+    assert not os.path.exists(journal.path)
+    assert writer.orphaned == journal.path + ".orphaned"
+    assert open(writer.orphaned, 'rb').read() == before
+
+
+def test_torn_line_is_only_cut_off_by_the_writer(tmp_path):
+    path, journal = database_with_pending_add(tmp_path)
+    with open(journal.path, mode='a', encoding='utf-8') as file:
+        file.write('{"op": "add", "rec')
+    size = os.path.getsize(journal.path)
+    assert list(open_database(path)[0].names) == ["Steel", "Copper", "Pending"]
+    assert os.path.getsize(journal.path) == size
+    table, report, writer = open_database(path, read_only=False)
+    assert list(table.names) == ["Steel", "Copper", "Pending"]
+    assert open(journal.path, 'rb').read().endswith(b"\n")
+
+
+def test_interrupted_compaction_is_not_replayed_twice(tmp_path):
+    path, journal = database_with_pending_add(tmp_path)
+    table = open_database(path)[0]
+    temp_path, sha256, size = _write_temp_csv(path, table)
+    journal._append([{"op": "compacted", "sha256": sha256, "size": size}])
+    os.replace(temp_path, path)  # and the journal is never removed
+    append_line(path, ["Tin"] + ["3"] * len(NUMERIC_PROPERTIES) + ["Metals"])
+    table, report, writer = open_database(path, read_only=False)
+    assert list(table.names) == ["Steel", "Copper", "Pending", "Tin"]
+    assert not os.path.exists(journal.path)
+
+
+def test_compaction_waits_while_rows_could_not_be_read(tmp_path):
+    rows = [GOOD_ROW, ["Bad", "abc"] + ["1"] * (len(NUMERIC_PROPERTIES) - 1) + ["Metals"], ["Short", "1", "2"]]
+    path = write_csv(tmp_path / "materials.csv", rows)
+    before = open(path, 'rb').read()
+    table, report, journal = open_database(path, read_only=False, use_cache=False)
+    journal.compact_after = 2
+    journal.add([material("One"), material("Two")])
+    assert not journal.needs_compaction()
+    journal.add_table(table, MaterialTable.from_records([material("Three")]))
+    with pytest.raises(ValueError, match="2 row"):
+        journal.compact(table)
+    assert open(path, 'rb').read() == before
+    assert list(open_database(path)[0].names) == ["Steel", "One", "Two", "Three"]
+
+
+def test_import_report_names_rejected_rows(tmp_path):
+    table = open_database(write_csv(tmp_path / "materials.csv", [GOOD_ROW]))[0]
+    big = material("Big", 10.0)
+    del big["UTS_(MPa)"]
+    path = tmp_path / "new.json"
+    path.write_text(json.dumps([material("Fine", 10.0), big, material("Steel", 10.0), 5]))
+    result = prepare_import(table, str(path))
+    rows = sorted(result.rows)
+    assert [(row, name, status) for row, name, status, reason in rows] == [
+        (1, "Fine", "accepted"), (2, "Big", "rejected"), (3, "Steel", "rejected"), (4, "", "rejected")]
+    assert "UTS_(MPa) is not a number" in rows[1][3]
@@ -0,0 +1,29 @@
+import numpy as np
+
+from material_table import NAME_MATCHES, NameIndex
+
+
+def test_name_index_follows_renames_deletes_and_appends(random_table):
+    table = random_table(6, 300)
+    table.names[10] = table.names[20] = table.names[30] = "Shared"
+    index = table.name_index
+    rng = np.random.default_rng(6)
+    for step in range(200):
+        operation = step % 4
+        if operation == 0:
+            table.delete_rows(rng.choice(len(table), size=rng.integers(1, 4), replace=False))
+        elif operation == 1:
+            record = table.record(int(rng.integers(len(table))))
+            table.update_record(int(rng.integers(len(table))), dict(record, name=rng.choice(["Shared", f"New {step}"])))
+        elif operation == 2:
+            table.append_records([dict(table.record(0), name=rng.choice(["Shared", f"Added {step}"]))])
+        fresh = NameIndex(table.names)
+        for name in set(table.names.tolist()) | {"Shared", "Missing"}:
+            assert table.find(name) == fresh.find(name)
+        if step % 20 == 0:
+            for match in NAME_MATCHES:
+                np.testing.assert_array_equal(table.name_index.search("Material 1", match),
+                                              fresh.search("Material 1", match))
+    assert table.name_index is index
+    assert table.name_index.search("Shared", "exact").tolist() == [
+        row for row, name in enumerate(table.names) if name == "Shared"]
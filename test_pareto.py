@@ -0,0 +1,30 @@
+import gc
+
+import numpy as np
+
+from pareto import ParetoCache, pareto_front
+
+
+OBJECTIVES = [("young_modulus_(GPa)", "max"), ("density_(kg/m^3)", "min")]
+
+
+# A reloaded table (same size, version 0, often the freed table's id()) gets its own front
+def test_front_recomputed_after_reload(random_table):
+    cache = ParetoCache()
+    indices = np.arange(200)
+    for seed in range(50):
+        table = random_table(seed)
+        front = cache.front(table, indices, OBJECTIVES)
+        np.testing.assert_array_equal(front, pareto_front(table, indices, OBJECTIVES))
+        del table
+        gc.collect()
+    assert cache.misses == 50
+
+
+def test_front_reused_for_same_table(random_table):
+    cache = ParetoCache()
+    table = random_table(0)
+    indices = np.arange(200)
+    first = cache.front(table, indices, OBJECTIVES)
+    assert cache.front(table, indices, OBJECTIVES) is first
+    assert cache.hits == 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from material_table import MATERIAL_TYPES, NUMERIC_PROPERTIES
+from query_engine import QueryEngine, normalize_spec, query
+
+
+# Specs a slider drag produces: one bound moving at a time, with the type
+# selection, sort column and limit changing now and then
+def drag_specs(seed, count=60):
+    rng = np.random.default_rng(seed)
+    ranges = {prop: [0.0, 1.0] for prop in NUMERIC_PROPERTIES}
+    types = list(MATERIAL_TYPES)
+    specs = []
+    for step in range(count):
+        prop = NUMERIC_PROPERTIES[rng.integers(len(NUMERIC_PROPERTIES))]
+        ranges[prop][rng.integers(2)] = float(rng.random())
+        ranges[prop].sort()
+        if step % 7 == 0:
+            types = [material_type for material_type in MATERIAL_TYPES if rng.random() < 0.7]
+        spec = {"ranges": {prop: list(bounds) for prop, bounds in ranges.items()}, "types": types}
+        if step % 3 == 0:
+            spec["sort"] = ["name", "type", prop][step % 9 // 3]
+            spec["order"] = "desc" if step % 2 else "asc"
+        if step % 5 == 0:
+            spec["limit"] = 10
+        specs.append(spec)
+    return specs
+
+
+@pytest.mark.parametrize("histograms", [False, True])
+def test_run_matches_query(random_table, histograms):
+    table = random_table(1, 500)
+    edges = {prop: np.linspace(0, 1, 11) for prop in NUMERIC_PROPERTIES} if histograms else None
+    engine = QueryEngine(table, histogram_edges=edges)
+    for spec in drag_specs(1) + drag_specs(1):  # the second pass is served from the cache
+        np.testing.assert_array_equal(engine.run(spec), query(table, spec))
+    assert engine.cache.hits
+
+
+def test_run_follows_table_edits(random_table):
+    table = random_table(2, 300)
+    engine = QueryEngine(table)
+    specs = drag_specs(2, 20)
+    for spec in specs:
+        engine.run(spec)
+    table.append_table(random_table(3, 50))
+    for spec in specs:
+        np.testing.assert_array_equal(engine.run(spec), query(table, spec))
+    record = table.record(5)
+    record["UTS_(MPa)"] = 0.5
+    table.update_record(7, dict(record, name="Edited"))
+    table.delete_rows([0, 100])
+    for spec in specs:
+        np.testing.assert_array_equal(engine.run(spec), query(table, spec))
+
+
+def test_name_search_keeps_best_matches_first(random_table):
+    table = random_table(4, 300)
+    spec = {"name": "Material 12", "name_match": "prefix"}
+    result = QueryEngine(table).run(spec)
+    np.testing.assert_array_equal(result, query(table, spec))
+    assert result[0] == 12
+    assert set(result) == {12} | set(range(120, 130))
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"limit": [1]}, "limit must be a whole number"),
+    ({"limit": 1e400}, "limit must be a whole number"),
+    ({"limit": 2.5}, "limit must be a whole number"),
+    ({"limit": True}, "limit must be a whole number"),
+    ({"limit": -1}, "limit must not be negative"),
+    ({"columns": 5}, "columns must be a list"),
+    ({"columns": "name"}, "columns must be a list"),
+    ({"name": 5}, "name must be text"),
+    ({"order": ["asc"]}, "order must be text"),
+    ({"ranges": {"UTS_(MPa)": [0, 10 ** 400]}}, "out of range"),
+    ({"pareto": 5}, "Pareto objectives must be a list"),
+    ({"pareto": "ab"}, "Pareto objectives must be a list"),
+    ({"pareto": [["UTS_(MPa)"]]}, "A Pareto objective must be"),
+    ({"similar": {"to": "Material 1", "weights": 5}}, "weights must be an object"),
+    ({"similar": {"to": "Material 1", "weights": {"cost": "x"}}}, "weight of cost_per_kg_\\(\\$\\) must be a number"),
+    ({"similar": {"to": "Material 1", "k": [1]}}, "k must be a whole number"),
+    ({"similar": {"to": "Material 1", "scale": ["z"]}}, "scale must be one of"),
+    ({"similar": {"to": 5}}, "needs the name of a material"),
+])
+def test_bad_specs_raise_value_error(random_table, spec, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_spec(spec, random_table(5, 20))
+
+
+def test_whole_float_counts_are_accepted(random_table):
+    spec = normalize_spec({"limit": 3.0, "similar": {"to": "Material 1", "k": 2.0}}, random_table(5, 20))
+    assert spec["limit"] == 3 and spec["similar"]["k"] == 2
@@ -0,0 +1,76 @@
+import http.client
+import json
+import time
+
+import pytest
+
+from server import start_server
+from test_material_io import GOOD_ROW, write_csv
+from material_table import NUMERIC_PROPERTIES
+
+
+@pytest.fixture
+def server(tmp_path):
+    rows = [GOOD_ROW, ["Copper"] + ["2"] * len(NUMERIC_PROPERTIES) + ["Metals"]]
+    server = start_server(write_csv(tmp_path / "materials.csv", rows), reload_interval=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# (status, decoded JSON body) of one request on a fresh connection
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        if headers is None:
+            connection.request(method, path, body=body)
+        else:
+            connection.putrequest(method, path)
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        connection.close()
+
+
+# Errors /stats has counted for a route; a request is recorded just after its answer is sent
+def stats_errors(server, path, expected):
+    deadline = time.monotonic() + 5
+    while True:
+        errors = request(server, "GET", "/stats")[1]["endpoints"].get(path, {}).get("errors")
+        if errors == expected or time.monotonic() > deadline:
+            return errors
+        time.sleep(0.01)
+
+
+def test_query(server):
+    status, data = request(server, "POST", "/query", json.dumps({"sort": "name", "columns": ["name"]}))
+    assert status == 200
+    assert data == {"count": 2, "results": [{"name": "Copper"}, {"name": "Steel"}]}
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/query", '{"limit": 1e400}'),
+    ("/topk", '{"by": "UTS_(MPa)", "k": 1e400}'),
+    ("/query", '{"similar": {"to": "Steel", "weights": 5}}'),
+    ("/query", '{"columns": "name"}'),
+    ("/query", '[1]'),
+    ("/batch", '{"queries": [{"pareto": "ab"}]}'),
+    ("/export", '{"limit": [1]}'),
+    ("/query", 'not json'),
+    ("/query", b'"\xff"'),
+])
+def test_bad_requests_get_400(server, path, body):
+    status, data = request(server, "POST", path, body)
+    assert status == 400
+    assert data["error"]
+    assert stats_errors(server, path, 1) == 1
+
+
+def test_post_needs_content_length(server):
+    assert request(server, "POST", "/query", headers={})[0] == 411
+    assert request(server, "POST", "/query", headers={"Content-Length": "ten"})[0] == 400
+    assert request(server, "POST", "/query", headers={"Content-Length": "-1"})[0] == 400
+    assert stats_errors(server, "/query", 3) == 3
@@ -0,0 +1,17 @@
+import gc
+
+import numpy as np
+
+from similarity import SimilarityCache, feature_matrix
+
+
+# A reloaded table (same size, version 0, often the freed table's id()) gets its own KD-tree
+def test_tree_rebuilt_after_reload(random_table):
+    cache = SimilarityCache()
+    for seed in range(50):
+        table = random_table(seed, 100)
+        tree = cache.tree(table, {}, "z")
+        np.testing.assert_array_equal(tree.point(0), feature_matrix(table, {}, "z")[0])
+        del table, tree
+        gc.collect()
+    assert cache.builds == 50